@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the time it takes to import pyplotthemes in a fresh interpreter,
+and check it against a budget relative to importing matplotlib itself.
+
+Importing pyplotthemes must not import matplotlib.pyplot, nor
+instantiate any theme.
+
+Usage:
+python benchmarks/bench_import.py [--repeat N] [--budget SECONDS]
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+_timer = '''
+import sys, time
+t = time.perf_counter()
+import {module}
+t = time.perf_counter() - t
+assert {check}, "import had side effects"
+print(t)
+'''
+
+_check = ("'matplotlib.pyplot' not in sys.modules and "
+          "not any(n in vars(pyplotthemes) for n in "
+          "('basetheme', 'prettytheme', 'classictheme'))")
+
+
+def import_time(module, check='True', repeat=5):
+    '''
+    Return the median time in seconds to import module in a new
+    interpreter, after verifying check afterwards.
+    '''
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, '-c', _timer.format(module=module, check=check)],
+            env=env)
+        times.append(float(out))
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.1,
+                        help="Seconds allowed on top of importing matplotlib")
+    args = parser.parse_args(argv)
+
+    base = import_time('matplotlib', repeat=args.repeat)
+    ours = import_time('pyplotthemes', _check, repeat=args.repeat)
+    print("import matplotlib   {:.3f} s".format(base))
+    print("import pyplotthemes {:.3f} s (budget {:.3f} s)"
+          .format(ours, base + args.budget))
+    return 0 if ours <= base + args.budget else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmarks of importing pyplotthemes, applying themes, plotting with
+them and saving figures. Everything runs offline on the Agg backend.
+
+Each benchmark reports its best time and the peak memory allocated
+while running it, as traced by tracemalloc. Results are compared with
+a stored baseline, and the run fails if any benchmark is slower or uses
+more memory than the baseline by more than the thresholds. Baselines
+depend on the machine, so save one on the machine that checks them.
+The baseline records the environment and the commit it was measured
+at; save it again after changes which are meant to change the results.
+
+Usage:
+python benchmarks/suite.py [--filter REGEX] [--max-size N] [--repeat N]
+                           [--baseline FILE] [--save] [--no-memory]
+                           [--threshold RATIO] [--memory-threshold RATIO]
+'''
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_here))
+
+from pyplotthemes import BaseTheme, PrettyTheme, ClassicTheme, get_savefig
+from pyplotthemes.base import pyplot
+from bench_import import import_time, _check
+
+
+_baseline = os.path.join(_here, 'baseline.json')
+
+# Data sizes of the plotting benchmarks
+_sizes = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+# Largest sizes of methods which draw an artist per point, as they need
+# several GB of memory beyond them
+_max_sizes = {'errorbar': 10**6}
+
+# Registered benchmarks, as (name, setup). setup returns the function
+# to time, and an optional cleanup function.
+_cases = []
+
+
+def case(name):
+    '''
+    Decorator registering a benchmark named name. The decorated function
+    prepares everything needed, and returns the function to time.
+    '''
+    def decorator(setup):
+        _cases.append((name, setup))
+        return setup
+    return decorator
+
+
+def measure(run, repeat=3, memory=True, budget=2.0):
+    '''
+    Return the best time of repeat calls to run, and the peak memory
+    traced during one more call. Stops repeating once the calls have
+    taken budget seconds in total.
+    '''
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t)
+        if sum(times) > budget:
+            break
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak
+
+
+def _series(n):
+    '''
+    A positive random walk of n points, usable on log axes.
+    '''
+    rng = np.random.RandomState(0)
+    x = np.arange(1, n + 1, dtype=float)
+    y = np.exp(np.cumsum(rng.randn(n)) / np.sqrt(n))
+    return x, y
+
+
+def _drawn(draw):
+    '''
+    Return a function which calls draw in a new figure, renders the
+    figure and closes it.
+    '''
+    plt = pyplot()
+
+    def run():
+        fig = plt.figure()
+        try:
+            draw()
+            fig.canvas.draw()
+        finally:
+            plt.close(fig)
+    return run
+
+
+# How each themed method is called with n data points
+_calls = {
+    'plot': lambda t, x, y: t.plot(x, y),
+    'plot[minmax]': lambda t, x, y: t.plot(x, y, decimate='minmax'),
+    'errorbar': lambda t, x, y: t.errorbar(x, y, yerr=0.1 * y),
+    'semilogx': lambda t, x, y: t.semilogx(x, y),
+    'semilogy': lambda t, x, y: t.semilogy(x, y),
+    'loglog': lambda t, x, y: t.loglog(x, y),
+    'hist': lambda t, x, y: t.hist(np.log(y), bins=100),
+    'pcolormesh': lambda t, x, y: t.pcolormesh(
+        y[:int(np.sqrt(y.size)) ** 2].reshape(int(np.sqrt(y.size)), -1)),
+    'boxplot': lambda t, x, y: t.boxplot(y[:y.size // 10 * 10]
+                                         .reshape(-1, 10)),
+    'legend': lambda t, x, y: (t.plot(x, y, label='a'),
+                               t.plot(x, 1 / y, label='b'),
+                               t.legend()),
+}
+
+
+def _register_methods():
+    for themename, theme in (('pretty', PrettyTheme), ('classic', ClassicTheme)):
+        for method, call in _calls.items():
+            for n in _sizes:
+                if n > _max_sizes.get(method, n):
+                    continue
+
+                def setup(theme=theme, call=call, n=n):
+                    t = theme()
+                    x, y = _series(n)
+                    return _drawn(lambda: call(t, x, y))
+                setup.size = n
+                case('{}/{}/{}'.format(themename, method, n))(setup)
+
+
+@case('import')
+def bench_import():
+    # In a new interpreter, so only the time is measured
+    return lambda: import_time('pyplotthemes', _check, repeat=1)
+
+
+@case('setstyle/noop x1000')
+def bench_setstyle_noop():
+    theme = PrettyTheme()
+
+    def run():
+        for _ in range(1000):
+            theme.setstyle()
+    return run
+
+
+@case('setstyle/switch x1000')
+def bench_setstyle_switch():
+    pretty, classic = PrettyTheme(), ClassicTheme()
+
+    def run():
+        for _ in range(500):
+            pretty.setstyle()
+            classic.setstyle()
+    return run
+
+
+@case('setstyle/override x1000')
+def bench_setstyle_override():
+    theme = PrettyTheme()
+
+    def run():
+        for _ in range(1000):
+            theme.setstyle(**{'axes.grid': True})
+    return run
+
+
+@case('theme/create')
+def bench_create():
+    return PrettyTheme
+
+
+@case('getattr/first x100')
+def bench_getattr_first():
+    def run():
+        for _ in range(100):
+            BaseTheme().gca
+    return run
+
+
+@case('getattr/cached x10000')
+def bench_getattr_cached():
+    theme = BaseTheme()
+    theme.gca
+
+    def run():
+        for _ in range(10000):
+            theme.gca
+    return run
+
+
+_register_methods()
+
+
+def _register_savefig():
+    for ext in ('png', 'pdf', 'svg', 'eps'):
+        for dpi in (72, 150, 300):
+            def setup(ext=ext, dpi=dpi):
+                plt = pyplot()
+                theme = PrettyTheme()
+                x, y = _series(10**4)
+                fig = plt.figure()
+                theme.subplot(211)
+                theme.plot(x, y)
+                theme.subplot(212)
+                theme.pcolormesh(y[:10**4].reshape(100, 100))
+                savedir = tempfile.mkdtemp()
+                savefig = get_savefig(savedir, extensions=[ext], theme=theme)
+
+                def run():
+                    savefig('bench', fig=fig, dpi=dpi)
+
+                def cleanup():
+                    plt.close(fig)
+                    shutil.rmtree(savedir)
+                return run, cleanup
+            case('savefig/{}/{}dpi'.format(ext, dpi))(setup)
+
+
+_register_savefig()
+
+
+def _register_pool():
+    # Ten similar figures, in new figures or reused from a FigurePool,
+    # only plotted or also drawn
+    for reuse in (False, True):
+        for draw in (False, True):
+            def setup(reuse=reuse, draw=draw):
+                plt = pyplot()
+                theme = PrettyTheme()
+                pool = theme.figure_pool()
+                x, y = _series(10**3)
+
+                def plot(fig, ax):
+                    theme.plot(x, y, ax=ax)
+                    if draw:
+                        fig.canvas.draw()
+
+                def run():
+                    for _ in range(10):
+                        if reuse:
+                            with pool.subplots(figsize=(4, 3)) as figax:
+                                plot(*figax)
+                        else:
+                            fig, ax = theme.subplots(figsize=(4, 3))
+                            plot(fig, ax)
+                            plt.close(fig)
+                return run, pool.clear
+            case('pool/{}/{} x10'.format('reused' if reuse else 'new',
+                                         'drawn' if draw else 'plotted'))(
+                setup)
+
+
+_register_pool()
+
+
+def run_cases(pattern=None, max_size=None, repeat=3, memory=True):
+    '''
+    Run the benchmarks whose names match pattern and whose data size is
+    at most max_size. Returns {name: {'time': seconds, 'peak': bytes}}.
+    '''
+    results = {}
+    for name, setup in _cases:
+        if pattern and not re.search(pattern, name):
+            continue
+        if max_size and getattr(setup, 'size', 0) > max_size:
+            continue
+        run = setup()
+        cleanup = None
+        if isinstance(run, tuple):
+            run, cleanup = run
+        try:
+            t, peak = measure(run, repeat,
+                              memory=memory and name != 'import')
+        finally:
+            if cleanup is not None:
+                cleanup()
+        results[name] = {'time': t, 'peak': peak}
+        print(format_result(name, results[name]))
+        sys.stdout.flush()
+    return results
+
+
+def format_result(name, result, base=None):
+    line = '{:36s} {:10.4f} s'.format(name, result['time'])
+    if result['peak'] is not None:
+        line += ' {:9.2f} MiB'.format(result['peak'] / 2.**20)
+    if base is not None:
+        line += '  x{:.2f}'.format(result['time'] / base['time'])
+    return line
+
+
+def environment():
+    '''
+    Describe what the results were measured with.
+    '''
+    return {'python': platform.python_version(),
+            'matplotlib': matplotlib.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'system': platform.system()}
+
+
+def revision():
+    '''
+    Return the git commit the benchmarked tree is at, or None outside
+    of git.
+    '''
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                      cwd=_here, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode().strip()
+
+
+def compare(results, baseline, threshold=1.5, memory_threshold=1.25,
+            tolerance=1e-3):
+    '''
+    Return a list of descriptions of the results which regressed compared
+    to baseline. Times within tolerance seconds of the baseline are
+    never regressions, as they are mostly noise.
+    '''
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if (result['time'] > base['time'] * threshold and
+                result['time'] - base['time'] > tolerance):
+            regressions.append('{}: time {:.4f} s, baseline {:.4f} s'
+                               .format(name, result['time'], base['time']))
+        if (result['peak'] is not None and base.get('peak') and
+                result['peak'] > base['peak'] * memory_threshold):
+            regressions.append('{}: peak {:.2f} MiB, baseline {:.2f} MiB'
+                               .format(name, result['peak'] / 2.**20,
+                                       base['peak'] / 2.**20))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help="Only run benchmarks matching this")
+    parser.add_argument('--max-size', type=int, default=None,
+                        help="Skip plotting benchmarks with more data")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=_baseline)
+    parser.add_argument('--save', action='store_true',
+                        help="Store the results as the new baseline")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Do not measure peak memory, which is slow")
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help="Allowed ratio of time to the baseline")
+    parser.add_argument('--memory-threshold', type=float, default=1.25,
+                        help="Allowed ratio of peak memory to the baseline")
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.filter, args.max_size, args.repeat,
+                        not args.no_memory)
+
+    if args.save:
+        # Results of a partial run are added to those of the same commit
+        # and environment, others are replaced
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f)
+            if (previous.get('revision') == revision() and
+                    previous['environment'] == environment()):
+                stored = previous['results']
+        stored.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'environment': environment(), 'revision': revision(),
+                       'results': stored}, f, indent=1, sort_keys=True)
+        print("Saved baseline to {}".format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, nothing to compare with"
+              .format(args.baseline))
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print("Comparing with the baseline measured at {} with {}"
+          .format(baseline.get('revision', 'an unknown commit'),
+                  baseline['environment']))
+    if baseline['environment'] != environment():
+        print("Warning: the baseline was measured in another environment")
+    regressions = compare(results, baseline['results'], args.threshold,
+                          args.memory_threshold)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
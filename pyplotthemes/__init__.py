@@ -4,7 +4,27 @@ from .pretty import PrettyTheme
 from .classic import ClassicTheme
 
 
-# Instantiate the themes for easy importing
-basetheme = BaseTheme()
-prettytheme = PrettyTheme()
-classictheme = ClassicTheme()
+# The themes are instantiated on first access, for easy importing:
+# from pyplotthemes import classictheme as plt
+_themes = {'basetheme': BaseTheme,
+           'prettytheme': PrettyTheme,
+           'classictheme': ClassicTheme}
+
+
+def __getattr__(name):
+    if name in _themes:
+        return globals().setdefault(name, _themes[name]())
+    raise AttributeError("module {!r} has no attribute {!r}"
+                         .format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_themes))
+
+
+__all__ = ['BaseTheme', 'PrettyTheme', 'ClassicTheme',
+           'basetheme', 'prettytheme', 'classictheme',
+           'themed', 'pyplot', 'pyplot_wraps', 'get_savefig',
+           'rcparams_modified', 'cadd', 'get_ax', 'axes_is_polar',
+           'remove_spines', 'set_spines', 'move_spines', 'set_axiscolors',
+           'remove_ticks', 'set_ticks_position']
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+'''
+Artists built as single collections from vectorized coordinates,
+so that drawing time does not grow with the number of elements.
+'''
+
+import matplotlib as mpl
+import numpy as np
+# Artist modules are imported in the functions using them, as they are
+# slow to import and not needed until something is drawn.
+
+
+def _outline(box):
+    '''
+    Return the vertices of a box from a boxplot, drawn either as a line
+    or as a patch (patch_artist=True).
+    '''
+    if hasattr(box, 'get_xydata'):
+        return box.get_xydata()
+    return box.get_path().vertices
+
+
+def fill_boxes(ax, boxes, colors):
+    '''
+    Fill the boxes of a boxplot with colors, cycled, as a single
+    PolyCollection placed beneath the box outlines. Handles notched
+    boxes too. Returns the collection.
+    '''
+    from matplotlib.collections import PolyCollection
+    verts = [_outline(box) for box in boxes]
+    facecolors = [colors[i % len(colors)] for i in range(len(verts))]
+    polygons = PolyCollection(verts, facecolors=facecolors)
+    ax.add_collection(polygons, autolim=False)
+    return polygons
+
+
+# Arguments of errorbar which errorbar_collections leaves to matplotlib
+_errorbar_fallback = ('lolims', 'uplims', 'xlolims', 'xuplims',
+                      'errorevery', 'data')
+
+
+def _bounds(v, err):
+    '''
+    Return the lower and upper ends of error bars err around v. err is
+    a scalar, one value per point or a (2, N) array of lower and upper.
+    '''
+    err = np.asarray(err, dtype=float)
+    if err.ndim == 2:
+        return v - err[0], v + err[1]
+    err = np.broadcast_to(err, v.shape)
+    return v - err, v + err
+
+
+def _numeric(values):
+    '''
+    Returns true if values are plain numbers, without units.
+    '''
+    return np.asarray(values).dtype.kind in 'biuf'
+
+
+def _to_numbers(axis, values):
+    '''
+    Return values as floats, converted through the units of axis if they
+    are not numbers already, such as dates or categories.
+    '''
+    values = np.atleast_1d(values)
+    if not _numeric(values):
+        axis.update_units(values)
+        values = axis.convert_units(values)
+    return np.asarray(values, dtype=float)
+
+
+def errorbar_collections(ax, args, kwargs):
+    '''
+    Draw errorbar(*args, **kwargs) on ax with all error bars, in both
+    x and y, in one LineCollection, and the caps of each direction in
+    one Line2D of markers. Returns an ErrorbarContainer, as errorbar,
+    with the bars and caps styled and ordered as errorbar would.
+
+    x and y which are not numbers, such as dates or categories, are
+    converted through the units of the axes. Falls back to Axes.errorbar
+    for options it does not support, like limits or errorevery, and for
+    error bars along such an axis.
+    '''
+    from matplotlib import cbook
+    from matplotlib.collections import LineCollection
+    from matplotlib.container import ErrorbarContainer
+    from matplotlib.lines import Line2D
+
+    names = ['x', 'y', 'yerr', 'xerr', 'fmt']
+    if len(args) > len(names) or any(k in kwargs for k in
+                                     _errorbar_fallback):
+        return ax.errorbar(*args, **kwargs)
+
+    kwargs = dict(kwargs)
+    for name, value in zip(names, args):
+        if name in kwargs:
+            raise TypeError("errorbar got multiple values for " + name)
+        kwargs[name] = value
+    if any(kwargs.get(err) is not None and not _numeric(kwargs[name])
+           for name, err in (('x', 'xerr'), ('y', 'yerr'))):
+        return ax.errorbar(**kwargs)
+
+    x = _to_numbers(ax.xaxis, kwargs.pop('x'))
+    y = _to_numbers(ax.yaxis, kwargs.pop('y'))
+    yerr = kwargs.pop('yerr', None)
+    xerr = kwargs.pop('xerr', None)
+    fmt = kwargs.pop('fmt', '')
+    ecolor = kwargs.pop('ecolor', None)
+    elinewidth = kwargs.pop('elinewidth', None)
+    elinestyle = kwargs.pop('elinestyle', None)
+    capsize = kwargs.pop('capsize', None)
+    capthick = kwargs.pop('capthick', None)
+    barsabove = kwargs.pop('barsabove', False)
+    label = kwargs.pop('label', None)
+    kwargs = {k: v for k, v in cbook.normalize_kwargs(kwargs, Line2D).items()
+              if v is not None}
+    kwargs.setdefault('zorder', 2)
+    kwargs['label'] = '_nolegend_'
+
+    if fmt.lower() == 'none':
+        data_line = None
+        color = kwargs.get('color', 'C0')
+    else:
+        data_line, = ax.plot(x, y, fmt, **kwargs)
+        color = data_line.get_color()
+        # Bars go beneath the line unless barsabove
+        data_line.set_zorder(kwargs['zorder'] + (-.1 if barsabove else .1))
+    if ecolor is None:
+        ecolor = color
+    if elinewidth is None:
+        elinewidth = mpl.rcParams.get('errorbar.elinewidth')
+    if elinewidth is None:
+        elinewidth = kwargs.get('linewidth', mpl.rcParams['lines.linewidth'])
+    if capsize is None:
+        capsize = mpl.rcParams.get('errorbar.capsize', 3)
+    if capthick is None:
+        capthick = mpl.rcParams.get('errorbar.capthick')
+
+    # Properties bars and caps take from the line, as with errorbar
+    shared = {k: kwargs[k] for k in ('transform', 'alpha', 'zorder',
+                                     'rasterized') if k in kwargs}
+    cap_style = dict(shared, linestyle='none', color=ecolor,
+                     markersize=2 * capsize, label='_nolegend_')
+    capthick = kwargs.get('markeredgewidth', capthick)
+    if capthick is not None:
+        cap_style['markeredgewidth'] = capthick
+
+    segments = []
+    caps = []
+    for err, marker in ((xerr, '|'), (yerr, '_')):
+        if err is None:
+            continue
+        if marker == '|':
+            x0, x1 = _bounds(x, err)
+            y0, y1 = y, y
+        else:
+            y0, y1 = _bounds(y, err)
+            x0, x1 = x, x
+        segments.append(np.stack((np.column_stack((x0, y0)),
+                                  np.column_stack((x1, y1))), axis=1))
+        if capsize > 0:
+            cap = Line2D(np.concatenate((x0, x1)), np.concatenate((y0, y1)),
+                         marker=marker, **cap_style)
+            caps.append(cap)
+
+    barcols = []
+    if segments:
+        bars = LineCollection(np.concatenate(segments), colors=ecolor,
+                              linewidths=elinewidth, label='_nolegend_',
+                              **shared)
+        if elinestyle is not None:
+            bars.set_linestyle(elinestyle)
+        ax.add_collection(bars)
+        barcols.append(bars)
+    # Caps are drawn over the bars
+    for cap in caps:
+        ax.add_line(cap)
+    ax.autoscale_view()
+
+    container = ErrorbarContainer((data_line, tuple(caps), tuple(barcols)),
+                                  has_xerr=xerr is not None,
+                                  has_yerr=yerr is not None,
+                                  label=label)
+    ax.add_container(container)
+    return container
+
+
+def _series(args):
+    '''
+    Split the arguments of a collection plot, (y,) or (x, y), into a
+    list of x and a list of y arrays, one of each per series. A 2-D y
+    has one series per column, as with plot, and may also be a list of
+    1-D arrays. x may be shared, 2-D or a list as well.
+    '''
+    if not 1 <= len(args) <= 2 or any(isinstance(a, str) for a in args):
+        raise ValueError("Collection plots take (y) or (x, y), "
+                         "without format strings")
+    y = args[-1]
+    if isinstance(y, (list, tuple)) and len(y) and np.ndim(y[0]) == 1:
+        ys = [np.asarray(v, dtype=float) for v in y]
+    else:
+        y = np.asarray(y, dtype=float)
+        ys = list(y.T) if y.ndim == 2 else [y]
+
+    if len(args) == 1:
+        return [np.arange(len(v), dtype=float) for v in ys], ys
+    x = args[0]
+    if isinstance(x, (list, tuple)) and len(x) and np.ndim(x[0]) == 1:
+        xs = [np.asarray(v, dtype=float) for v in x]
+    else:
+        x = np.asarray(x, dtype=float)
+        xs = list(x.T) if x.ndim == 2 else [x] * len(ys)
+    if len(xs) != len(ys):
+        raise ValueError("x and y have different numbers of series")
+    return xs, ys
+
+
+# Arguments of plot and what they are called on a LineCollection
+_collection_kwargs = {'color': 'colors', 'c': 'colors',
+                      'linewidth': 'linewidths', 'lw': 'linewidths',
+                      'linestyle': 'linestyles', 'ls': 'linestyles'}
+
+
+def _labels(kwargs):
+    '''
+    Pop label from kwargs if it is a list of one label per series, and
+    return it, or None.
+    '''
+    labels = kwargs.get('label')
+    if isinstance(labels, str) or labels is None:
+        return None
+    return kwargs.pop('label')
+
+
+def series_collection(ax, args, kwargs, palette, decimate=None, dpi=None):
+    '''
+    Draw every series of plot(*args, **kwargs) on ax as a single
+    LineCollection, colored from palette, an (N, 4) RGBA array, in turn.
+    See _series for the accepted arguments. decimate, if given, reduces
+    each series, as with decimated_plot, to the pixels of the axes at
+    dpi, by default the highest the figure is likely saved at.
+
+    label may be a list with one label per series, shown in the legend
+    by themed legend calls. Returns the collection.
+    '''
+    from matplotlib.collections import LineCollection
+    xs, ys = _series(args)
+
+    if decimate is not None:
+        from .decimate import output_dpi, pixel_size
+        npoints = 2 * pixel_size(ax, output_dpi(ax.figure, dpi))[0]
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            if len(y) > npoints:
+                index = decimate(x, y, npoints)
+                xs[i], ys[i] = x[index], y[index]
+
+    if len(set(len(y) for y in ys)) == 1:
+        # All as one (series, points, 2) array, which is cheaper
+        segments = np.stack((np.array(xs), np.array(ys)), axis=-1)
+    else:
+        segments = [np.column_stack(xy) for xy in zip(xs, ys)]
+
+    kwargs = dict(kwargs)
+    for key, name in _collection_kwargs.items():
+        if key in kwargs:
+            kwargs[name] = kwargs.pop(key)
+    if 'colors' not in kwargs:
+        kwargs['colors'] = palette[np.arange(len(ys)) % len(palette)]
+    if 'linewidths' not in kwargs:
+        kwargs['linewidths'] = mpl.rcParams['lines.linewidth']
+    labels = _labels(kwargs)
+
+    collection = LineCollection(segments, **kwargs)
+    # For legend_handles, one entry per series
+    collection.series_labels = labels
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+# Arguments of fill_between which fill_bands leaves to matplotlib
+_fill_fallback = ('where', 'interpolate', 'step', 'data')
+
+
+def fill_bands(ax, args, kwargs, palette, decimate=True):
+    '''
+    Draw fill_between(*args, **kwargs) on ax. If decimate is true, bands
+    over sorted x with more than four points per pixel column, at the dpi
+    the figure is saved at (see decimate.output_dpi), are first reduced
+    to the points which keep their outline, see decimate.envelope.
+
+    y1 and y2 may be 2-D, with one band per column, in which case all
+    bands are drawn as a single PolyCollection, colored from palette, an
+    (N, 4) RGBA array, in turn. label may then be a list with one label
+    per band, shown in the legend by themed legend calls.
+
+    Falls back to Axes.fill_between for where, interpolate and step.
+    Returns the collection.
+    '''
+    from matplotlib.collections import PolyCollection
+    from .decimate import envelope, output_dpi, pixel_size
+
+    names = ['x', 'y1', 'y2']
+    if len(args) > len(names) or any(k in kwargs for k in _fill_fallback):
+        return ax.fill_between(*args, **kwargs)
+    kwargs = dict(kwargs)
+    values = dict(zip(names, args))
+    values.update((k, kwargs.pop(k)) for k in names if k in kwargs)
+    x, y1, y2 = np.asarray(values['x']), values['y1'], values.get('y2', 0)
+
+    npoints = None
+    if decimate:
+        # A bucket per pixel column at the dpi the figure is saved at
+        npoints = 4 * pixel_size(ax, output_dpi(ax.figure))[0]
+    if np.ndim(y1) < 2 and np.ndim(y2) < 2:
+        if npoints is not None:
+            index = envelope(x, y1, y2, npoints)
+            y1 = y1 if np.ndim(y1) == 0 else np.asarray(y1)[index]
+            y2 = y2 if np.ndim(y2) == 0 else np.asarray(y2)[index]
+            x = x[index]
+        return ax.fill_between(x, y1, y2, **kwargs)
+
+    shape = np.broadcast(np.empty((len(x), 1)), np.asarray(y1),
+                         np.asarray(y2)).shape
+    y1 = np.broadcast_to(np.asarray(y1, dtype=float), shape)
+    y2 = np.broadcast_to(np.asarray(y2, dtype=float), shape)
+    if npoints is None:
+        # Along y1 and back along y2, as (bands, 2 * points, 2)
+        xs = np.broadcast_to(np.concatenate((x, x[::-1])),
+                             (shape[1], 2 * len(x)))
+        ys = np.concatenate((y1, y2[::-1])).T
+        verts = np.stack((xs, ys), axis=-1)
+    else:
+        verts = []
+        for k in range(shape[1]):
+            index = envelope(x, y1[:, k], y2[:, k], npoints)
+            xk = x[index]
+            verts.append(np.column_stack((
+                np.concatenate((xk, xk[::-1])),
+                np.concatenate((y1[index, k], y2[index[::-1], k])))))
+
+    labels = _labels(kwargs)
+    for key, name in (('color', 'facecolors'), ('facecolor', 'facecolors'),
+                      ('fc', 'facecolors'), ('linewidth', 'linewidths'),
+                      ('lw', 'linewidths')):
+        if key in kwargs:
+            kwargs[name] = kwargs.pop(key)
+    if 'facecolors' not in kwargs:
+        kwargs['facecolors'] = palette[np.arange(shape[1]) % len(palette)]
+    kwargs.setdefault('linewidths', 0)
+
+    collection = PolyCollection(verts, **kwargs)
+    collection.series_labels = labels
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def legend_handles(ax):
+    '''
+    Return the handles and labels a legend of ax shows by default, with
+    collections from series_collection and fill_bands replaced by a
+    proxy line or patch for each labelled series.
+    '''
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+    handles, labels = ax.get_legend_handles_labels()
+    for collection in ax.collections:
+        series_labels = getattr(collection, 'series_labels', None)
+        if not series_labels:
+            continue
+        lines = isinstance(collection, LineCollection)
+        colors = (collection.get_colors() if lines
+                  else collection.get_facecolors())
+        widths = collection.get_linewidths()
+        for i, label in enumerate(series_labels):
+            if label is None or str(label).startswith('_'):
+                continue
+            if lines:
+                handles.append(Line2D([], [], color=colors[i % len(colors)],
+                                      linewidth=widths[i % len(widths)]))
+            else:
+                handles.append(Patch(facecolor=colors[i % len(colors)],
+                                     alpha=collection.get_alpha()))
+            labels.append(label)
+    return handles, labels
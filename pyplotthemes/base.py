@@ -1,8 +1,84 @@
 # -*- coding: utf-8 -*-
 
 import matplotlib as mpl
-from matplotlib import pyplot as plt
 import os
+import sys
+import threading
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import update_wrapper, wraps
+from .cache import SaveCache, digest, figure_digest, params_digest
+from .export import save_formats
+from .instrument import Recorder, measured, timed
+from .params import ParamSet, TrackedParams, _color_cycler, compile_params
+from .fonts import resolve_stacks
+
+
+# Guards matplotlib.rcParams for scoped themes, and imports
+_lock = threading.RLock()
+
+
+class _LazyPyplot(object):
+    '''
+    Stands in for matplotlib.pyplot, which is only imported when
+    something is first looked up on it.
+    '''
+
+    def __getattr__(self, name):
+        return getattr(pyplot(), name)
+
+
+plt = _LazyPyplot()
+
+# Methods waiting for pyplot to be imported to get their documentation
+_undocumented = []
+
+
+def pyplot():
+    '''
+    Import and return matplotlib.pyplot.
+
+    If there is no display to show figures on, and no backend has been
+    chosen, through MPLBACKEND, matplotlib.use or a matplotlibrc, the
+    Agg backend is selected first.
+    '''
+    module = sys.modules.get('matplotlib.pyplot')
+    if module is not None and not _undocumented:
+        return module
+
+    with _lock:
+        if module is None:
+            # rcParams holds a sentinel, not a name, until one is chosen
+            if (sys.platform.startswith('linux') and
+                    not isinstance(dict.get(mpl.rcParams, 'backend'), str) and
+                    not os.environ.get('MPLBACKEND') and
+                    not os.environ.get('DISPLAY') and
+                    not os.environ.get('WAYLAND_DISPLAY')):
+                mpl.use('Agg')
+            from matplotlib import pyplot as module
+
+        while _undocumented:
+            method, name = _undocumented.pop()
+            update_wrapper(method, getattr(module, name))
+    return module
+
+
+def pyplot_wraps(name):
+    '''
+    Decorator which, like functools.wraps(pyplot.name), gives a method
+    the documentation of the corresponding pyplot function. As pyplot
+    is imported lazily, this happens once pyplot has been imported.
+    '''
+    def decorator(method):
+        if not method.__doc__:
+            method.__doc__ = "Themed version of pyplot.{}".format(name)
+        with _lock:
+            _undocumented.append((method, name))
+        if 'matplotlib.pyplot' in sys.modules:
+            pyplot()
+        return method
+    return decorator
 
 
 class BaseTheme(object):
@@ -12,14 +88,36 @@ class BaseTheme(object):
 
     Valid keyword arguments are anything that is accepted
     by matplotlib.rcParams. These values can be overridden
-    for each seperate function call as well.
+    for each seperate function call as well. They are validated
+    when the theme is created, so invalid ones raise there.
 
     Some additional convenience arguments/properties have also been defined:
     - latex : False/True, Force LaTeX and Computer Modern (font) everywhere
+              'mathtext', Computer Modern everywhere without running
+              LaTeX, which is much faster
     - colors: [list of colors], The color cycle to use when plotting
+    - scoped: False/True, Restore the previous rcParams after each call
+              and hold a lock meanwhile, making threaded use safe
+    - resolve_fonts: False/True, Narrow the font stacks, like font.serif,
+              to the installed fonts when the theme is created, so text
+              layout does not search for missing ones. The fonts used
+              and those missing are then listed in theme.fonts and
+              theme.missing_fonts. Warns if none of the fonts text
+              is drawn in are installed.
     '''
 
-    def __init__(self, latex=False, colors=None, **kwargs):
+    # Set by instrument
+    recorder = None
+    # Themed scatter draws a density image above this many points
+    density_threshold = 10**5
+    # Artists with more vertices are rasterized in vector files saved by
+    # get_savefig, None to keep everything vector
+    rasterize_threshold = None
+    # The palette, and the params it was computed from
+    _palette = (None, None)
+
+    def __init__(self, latex=False, colors=None, scoped=False,
+                 resolve_fonts=False, **kwargs):
         # Matplotlib defaults
         cadd(kwargs, 'lines.linewidth', 1.0)
         cadd(kwargs, 'lines.linestyle', '-')
@@ -49,7 +147,6 @@ class BaseTheme(object):
         cadd(kwargs, 'text.latex.preamble', '')
         cadd(kwargs, 'text.dvipnghack', 'None')
         cadd(kwargs, 'text.hinting', 'auto')
-        cadd(kwargs, 'text.hinting_factor', 8)
         cadd(kwargs, 'text.antialiased', True)
 
         cadd(kwargs, 'mathtext.cal', 'cursive')
@@ -153,10 +250,51 @@ class BaseTheme(object):
         cadd(kwargs, 'savefig.directory', '~')
         #cadd(kwargs, 'savefig.transparent', False)
 
+        # The legacy color cycle is kept as the cycler it compiles to
+        legacy = kwargs.pop('axes.color_cycle')
+        cadd(kwargs, 'axes.prop_cycle', _color_cycler(legacy))
+
         self.rcParams = kwargs
+        self._compiled = ((None, None), None)
         # Should be last to override rcParams properly
         self.latex = latex
         self.colors = colors
+        self.scoped = scoped
+        self.resolve_fonts = resolve_fonts
+        self.fonts = {}
+        self.missing_fonts = {}
+        # Fail early on invalid parameters
+        self.params
+
+    @property
+    def rcParams(self):
+        '''
+        The theme's rcParams as given, before compiling. Replace values
+        rather than changing them in place, so the change is seen.
+        '''
+        return self._rcParams
+
+    @rcParams.setter
+    def rcParams(self, params):
+        self._rcParams = TrackedParams(params)
+
+    @property
+    def params(self):
+        '''
+        The theme's rcParams compiled into a validated ParamSet, with
+        font stacks resolved if resolve_fonts is set. It is compiled
+        again if rcParams has been changed since.
+        '''
+        (source, version), params = self._compiled
+        if source is not self._rcParams or version != source.version:
+            params = self._rcParams
+            if self.resolve_fonts:
+                params, self.fonts, self.missing_fonts = \
+                    resolve_stacks(params)
+            params = compile_params(params)
+            self._compiled = ((self._rcParams, self._rcParams.version),
+                              params)
+        return params
 
     @property
     def latex(self):
@@ -164,8 +302,21 @@ class BaseTheme(object):
 
     @latex.setter
     def latex(self, val):
+        # Restore what mathtext mode changed
+        self.rcParams.update(self.__dict__.pop('_before_mathtext', {}))
         self._latex = val
-        if (self._latex):
+        if self._latex == 'mathtext':
+            self._before_mathtext = dict(
+                (k, self.rcParams[k]) for k in _mathtext_params
+                if k in self.rcParams)
+            self.rcParams['text.usetex'] = False
+            # Computer Modern, shipped with matplotlib
+            self.rcParams['mathtext.fontset'] = 'cm'
+            self.rcParams['font.family'] = 'serif'
+            self.rcParams['font.serif'] = ['cmr10', 'DejaVu Serif']
+            # cmr10 has no minus sign, mathtext does
+            self.rcParams['axes.formatter.use_mathtext'] = True
+        elif (self._latex):
             self.rcParams['text.usetex'] = True
             self.rcParams['text.latex.unicode'] = True
             # Use Latex font always
@@ -179,38 +330,358 @@ class BaseTheme(object):
 
     @property
     def colors(self):
-        return self.rcParams['axes.color_cycle']
+        '''
+        The colors of the theme's color cycle, axes.prop_cycle.
+        '''
+        return self.params['axes.prop_cycle'].by_key().get('color', [])
 
     @colors.setter
     def colors(self, cl):
         if cl is not None:
-            self.rcParams['axes.color_cycle'] = self._colorcycle
+            self.rcParams['axes.prop_cycle'] = _color_cycler(cl)
+
+    @property
+    def palette(self):
+        '''
+        The colors of the theme's color cycle, as a read-only (N, 4)
+        array of RGBA values. Computed again when the colors change.
+        '''
+        params = self.params
+        if self._palette[0] is not params:
+            from matplotlib.colors import to_rgba_array
+            cycle = params.get('axes.prop_cycle',
+                               mpl.rcParams['axes.prop_cycle'])
+            colors = cycle.by_key().get('color', ['C0'])
+            palette = to_rgba_array(colors)
+            palette.flags.writeable = False
+            self._palette = (params, palette)
+        return self._palette[1]
 
     def __getattr__(self, name):
         '''
         This method is called last in the getattribute chain and will
         only be called if an attribute with that name does not exist
-        on this or any child classes. In that case, it will try to call
+        on this or any child classes. In that case, it will try to return
         the corresponding method/property from the pyplot module.
 
-        If successful, the theme's rcParams are set before returning.
+        Functions are wrapped so that the theme's rcParams are set when
+        they are called, not when they are looked up. The result is cached
+        on the theme, so later lookups never reach this method.
         '''
+        if name.startswith('__'):
+            raise AttributeError(name)
         plt_attr = getattr(plt, name)
-        # Set style first
-        self.setstyle()
+
+        if (isinstance(plt_attr, (types.FunctionType,
+                                  types.BuiltinFunctionType)) and
+                name not in _unstyled):
+            plt_attr = self._styled(plt_attr)
+
+        self.__dict__[name] = plt_attr
         return plt_attr
 
+    def __getstate__(self):
+        # Functions cached by __getattr__ are looked up again, and
+        # recording is not carried over to copies
+        return dict((k, v) for k, v in self.__dict__.items()
+                    if k != 'recorder' and not callable(v))
+
+    def _styled(self, func):
+        '''
+        Wrap a pyplot function so the style is set before it is called.
+        '''
+        @wraps(func)
+        def styled(*args, **kwargs):
+            if self.recorder is None:
+                with self.style():
+                    return func(*args, **kwargs)
+            with self.recorder.call(func.__name__), self.style():
+                return func(*args, **kwargs)
+        return styled
+
+    def instrument(self, enable=True, callbacks=None):
+        '''
+        Start recording where time goes in calls made through the theme,
+        and in get_savefig when given the theme. Returns the Recorder,
+        whose stats() is also available as theme.stats().
+
+        Time is recorded in the phases:
+        - style: setting rcParams
+        - decorate: styling axes, with remove_spines, set_spines, ...
+        - plot: the rest of each themed call, mostly matplotlib itself
+        - layout: computing the tight bounding box shared by the files
+                  of a figure saved in several formats
+        - encode: writing files when saving, including the tight
+                  bounding box of a figure saved to a single file
+
+        callbacks - Functions called as callback(phase, seconds, info)
+                    for everything recorded, see Recorder.
+
+        Call with enable=False to stop recording. When not recording,
+        the overhead is an attribute check per call.
+
+        Examples:
+        theme.instrument()
+        theme.instrument(callbacks=[exporter.observe])
+        theme.instrument(False)
+        '''
+        if not enable:
+            self.recorder = None
+        else:
+            self.recorder = Recorder(callbacks)
+        return self.recorder
+
+    def stats(self):
+        '''
+        Return a snapshot of what has been recorded since instrument was
+        called, or None if the theme is not instrumented.
+        '''
+        if self.recorder is None:
+            return None
+        return self.recorder.stats()
+
+    def render_many(self, specs, savedir, workers=None, **kwargs):
+        '''
+        Render and save many figures with this theme, in parallel in a
+        pool of workers processes. Returns the status of each figure.
+        See pyplotthemes.batch.render_many for the format of specs.
+
+        Example:
+        theme.render_many([{'name': 'a', 'calls': [('plot', (x, y))]},
+                           {'name': 'b', 'calls': [('hist', (y,))]}],
+                          'figures', workers=4, extensions=['png'])
+        '''
+        from .batch import render_many
+        return render_many(self, specs, savedir, workers, **kwargs)
+
+    def figure_pool(self, maxsize=8):
+        '''
+        Return a FigurePool of figures styled by this theme, which are
+        reused between plots of the same layout. See
+        pyplotthemes.pool.FigurePool.
+
+        Example:
+        pool = theme.figure_pool()
+        with pool.subplots(figsize=(4, 3)) as (fig, ax):
+            theme.plot(x, y, ax=ax)
+        '''
+        from .pool import FigurePool
+        return FigurePool(self, maxsize)
+
+    def frame_exporter(self, savedir, fig=None, **kwargs):
+        '''
+        Return a FrameExporter writing the frames of an animation drawn
+        on fig, by default the current figure, with this theme. See
+        pyplotthemes.frames.FrameExporter for the keyword arguments.
+
+        Example:
+        line, = theme.plot(x, ys[0])
+        with theme.frame_exporter('frames') as frames:
+            for y in ys:
+                line.set_ydata(y)
+                frames.add()
+        '''
+        from .frames import FrameExporter
+        return FrameExporter(self, savedir, fig, **kwargs)
+
+    def warm_tex(self, strings=(), **kwargs):
+        '''
+        Render strings, such as labels and legend entries, and common
+        tick labels with LaTeX ahead of time, in parallel, in the font
+        sizes of the theme. Later figures then find them in matplotlib's
+        TeX cache instead of running LaTeX. Only useful with latex=True.
+        Takes the keyword arguments of pyplotthemes.tex.warm_tex, and
+        returns the counts it does.
+
+        Example:
+        theme = PrettyTheme(latex=True)
+        theme.warm_tex(['Time (s)', r'$\alpha$'])
+        '''
+        from .tex import warm_tex
+        with self.style():
+            return warm_tex(strings, **kwargs)
+
     def setstyle(self, **kwargs):
         '''
         Set the theme's rcParams on matplotlib, as well as any
         additional parameters specified.
+
+        Only parameters which differ from what is currently applied
+        are written to matplotlib. If this theme is already active and
+        nothing has modified matplotlib.rcParams since, this is a no-op.
+        '''
+        with _lock, measured(self.recorder, 'style'):
+            _apply(self, kwargs)
+
+    @contextmanager
+    def style(self, **kwargs):
+        '''
+        Context manager which sets the theme's rcParams, as setstyle,
+        for the duration of the block.
+
+        If the theme is scoped, a lock is held for the whole block and
+        the previous rcParams are restored when it exits. This makes it
+        safe to plot with different themes from several threads.
+
+        Example:
+        with theme.style(**{'axes.grid': True}):
+            plt.plot(x, y)
         '''
-        # Set internal first
-        for k, v in self.rcParams.items():
-            mpl.rcParams[k] = v
-        # Allow kwargs to override
-        for k, v in kwargs.items():
-            mpl.rcParams[k] = v
+        if not self.scoped:
+            self.setstyle(**kwargs)
+            yield self
+            return
+
+        with _lock:
+            with measured(self.recorder, 'style'):
+                undo = _apply(self, kwargs)
+            try:
+                yield self
+            finally:
+                _undo(undo)
+
+
+def themed(method=None, **overrides):
+    '''
+    Decorator for theme methods. Sets the theme's style, plus any
+    overriding rcParams, around each call. See BaseTheme.style.
+
+    Examples:
+    @themed
+    def plot(self, *args, **kwargs):
+
+    @themed(**{'axes.grid': False})
+    def hist(self, *args, **kwargs):
+    '''
+    if method is None:
+        return lambda method: themed(method, **overrides)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.recorder is None:
+            with self.style(**overrides):
+                return method(self, *args, **kwargs)
+        with self.recorder.call(method.__name__), self.style(**overrides):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Parameters the latex='mathtext' mode changes
+_mathtext_params = ('text.usetex', 'mathtext.fontset', 'font.family',
+                    'font.serif', 'axes.formatter.use_mathtext')
+
+# Pyplot functions which never create or draw anything, so calling
+# them through a theme does not need to set the style.
+_unstyled = frozenset(['close', 'get_fignums', 'get_figlabels', 'ion',
+                       'ioff', 'isinteractive', 'get_backend',
+                       'switch_backend', 'rc', 'rcdefaults', 'rc_context',
+                       'get_cmap', 'setp', 'getp', 'get'])
+
+# Book-keeping of what setstyle has written to matplotlib.rcParams
+_active = {'theme': None, 'params': None, 'values': {}}
+
+# Compiled overrides, by the kwargs they were compiled from
+_overrides = {}
+
+
+def _compile_overrides(kwargs):
+    '''
+    Return kwargs compiled to a ParamSet, cached as the same overrides
+    are typically given on every call.
+    '''
+    if not kwargs:
+        return None
+    key = ParamSet(kwargs)
+    params = _overrides.get(key)
+    if params is None:
+        if len(_overrides) > 128:
+            _overrides.clear()
+        params = _overrides[key] = compile_params(kwargs)
+    return params
+
+
+def _apply(theme, kwargs):
+    '''
+    Write the theme's params, overridden by kwargs, to matplotlib.rcParams.
+    Returns what is needed to undo the change with _undo.
+    '''
+    params = (theme.params, _compile_overrides(kwargs))
+    undo = (dict(_active), {})
+
+    # Fast path, same theme and params already active
+    if (_active['theme'] is theme and _active['params'] == params and
+            not rcparams_modified()):
+        return undo
+
+    values = dict(params[0])
+    if params[1] is not None:
+        values.update(params[1])
+
+    # Only write what differs. Values are compiled, so they are written
+    # as they are, and can be compared by identity.
+    previous = undo[1]
+    changed = {}
+    for k, v in values.items():
+        current = dict.get(mpl.rcParams, k)
+        if current is not v:
+            previous[k] = current
+            changed[k] = v
+    dict.update(mpl.rcParams, changed)
+
+    _active.update(theme=theme, params=params, values=values)
+    return undo
+
+
+def _undo(undo):
+    '''
+    Restore matplotlib.rcParams and the book-keeping to how they were
+    before the _apply call which returned undo.
+    '''
+    active, previous = undo
+    # Values came from matplotlib, so there is no need to validate them
+    dict.update(mpl.rcParams, previous)
+    _active.update(active)
+
+
+def _undo_unchanged(undo):
+    '''
+    As _undo, but keeps the parameters someone else changed since the
+    _apply call, without taking the lock, such as the main thread while
+    a background save runs.
+    '''
+    active, previous = undo
+    values = _active['values']
+    dict.update(mpl.rcParams, dict(
+        (k, v) for k, v in previous.items()
+        if dict.get(mpl.rcParams, k) is values.get(k)))
+    _active.update(active)
+
+
+@contextmanager
+def _isolated_style(theme):
+    '''
+    Context manager setting the theme's style for a save in another
+    thread, scoped even if the theme is not. The lock is held, so themed
+    calls in other threads wait for the save, and what the save changed
+    in matplotlib.rcParams is restored afterwards.
+    '''
+    with _lock:
+        undo = _apply(theme, {})
+        try:
+            yield
+        finally:
+            _undo_unchanged(undo)
+
+
+def rcparams_modified():
+    '''
+    Returns true if any parameter last set by a theme has since been
+    changed in matplotlib.rcParams by someone else.
+    '''
+    for k, v in _active['values'].items():
+        if dict.get(mpl.rcParams, k) is not v:
+            return True
+    return False
 
 
 def cadd(d, key, value):
@@ -232,6 +703,7 @@ def get_ax(kwargs):
     return ax
 
 
+@timed('decorate')
 def remove_spines(ax, sides=None):
     '''
     Remove spines of axis. Default: 'top' and 'right'
@@ -260,6 +732,7 @@ def axes_is_polar(ax):
         return False
 
 
+@timed('decorate')
 def set_spines(ax, color='black', lw=0.5, sides=None):
     '''
     Set properties of spines. By default: 'top', 'bottom', 'right', 'left',
@@ -282,6 +755,7 @@ def set_spines(ax, color='black', lw=0.5, sides=None):
         ax.spines[side].set_color(color)
 
 
+@timed('decorate')
 def move_spines(ax, sides, dists):
     '''
     Move the entire spine relative to the figure.
@@ -292,6 +766,7 @@ def move_spines(ax, sides, dists):
         ax.spines[side].set_position(('axes', dist))
 
 
+@timed('decorate')
 def set_axiscolors(ax, color, xy=None):
     '''
     Set colors on axis, 'x' and/or 'y'. Default is both.
@@ -309,6 +784,7 @@ def set_axiscolors(ax, color, xy=None):
         ax.yaxis.label.set_color(color)
 
 
+@timed('decorate')
 def remove_ticks(ax, xy=None):
     '''
     Remove ticks from axis. Default: 'x' and 'y'
@@ -326,6 +802,7 @@ def remove_ticks(ax, xy=None):
         ax.yaxis.set_ticks_position('none')
 
 
+@timed('decorate')
 def set_ticks_position(ax, x=None, y=None):
     '''
     Set position of ticks.
@@ -339,7 +816,9 @@ def set_ticks_position(ax, x=None, y=None):
     ax.xaxis.set_ticks_position(x)
 
 
-def get_savefig(savedir, prefix=None, filename=None, extensions=None):
+def get_savefig(savedir, prefix=None, filename=None, extensions=None,
+                theme=None, parallel=None, workers=None, background=0,
+                max_pending=None, rasterize=None, cache=False):
     '''
     Returns a function which saves the current matplotlib figure
     when called. Will set suitable values for bbox_inches.
@@ -360,6 +839,55 @@ def get_savefig(savedir, prefix=None, filename=None, extensions=None):
                  defaults to [png]. For publication, try
                  [pdf, png]. Always put eps last since it
                  crashes for large images.
+
+    theme - Optional theme whose style is set while saving. With a
+            scoped theme, this also holds the theme lock. If the theme
+            is instrumented, saving is recorded on it.
+
+    parallel - None, 'thread' or 'process'. With several extensions,
+               the tight bounding box is always computed only once.
+               If parallel is set, the formats are also written
+               concurrently by copies of the figure in a worker pool.
+
+    workers - Optional size of the worker pool.
+
+    background - Number of background threads to save with. If larger
+                 than zero, the figure is closed in pyplot and handed to
+                 the threads, and savefig returns a Future at once.
+                 Call savefig.flush() to wait for all pending saves, it
+                 raises the first error encountered. From asyncio code,
+                 use "await savefig.asave(...)" and "await savefig.aflush()".
+                 Saves hold the theme's lock, so themed calls wait for
+                 them, and restore the rcParams they changed, even if the
+                 theme is not scoped.
+
+    max_pending - Maximum number of figures waiting to be saved before
+                  savefig blocks. Defaults to twice background.
+
+    rasterize - In pdf, eps and svg files, draw lines, collections and
+                patches with more than this many vertices or points as
+                images at the save dpi. Axes, text and spines stay vector.
+                Defaults to the theme's rasterize_threshold, which is
+                None, so everything stays vector unless set, for example
+                to 10**5. False keeps everything vector. savefig returns
+                the list of artists rasterized, which are vector again
+                afterwards.
+
+    cache - If true, a figure is only saved if it changed since it was
+            last saved to savedir, as recorded in an index file there.
+            The key is a hash of the theme's parameters, the extensions
+            and savefig arguments, and the data, text, colors and limits
+            on the figure, see cache.figure_digest. To also skip the
+            plotting, ask savefig.is_cached(name, *inputs) first, with
+            the data and anything else the figure is made from:
+
+            if not savefig.is_cached('fig1', x, y, title):
+                theme.plot(x, y)
+                theme.title(title)
+                savefig('fig1')
+
+            savefig.cache counts hits and misses, and savefig.cache.prune()
+            drops the entries of figures not saved or asked about since.
     '''
     # First make sure savedir exists
     if not os.path.exists(savedir):
@@ -368,8 +896,18 @@ def get_savefig(savedir, prefix=None, filename=None, extensions=None):
     if extensions is None:
         extensions = ['png']
 
-    # Define function which saves figures there
-    def savefig(*args, **kwargs):
+    def path(name):
+        fname, ext = os.path.splitext(name)
+        # prefixing with path and prefix
+        fileprefix = prefix
+        if prefix is None:
+            fileprefix = ''
+        elif not prefix.endswith("_"):
+            fileprefix += "_"
+        fname = fileprefix + fname
+        return os.path.join(savedir, fname)
+
+    def prepare(args, kwargs):
         # Make sure we use bbox_inches
         if 'bbox_inches' not in kwargs:
             kwargs['bbox_inches'] = 'tight'
@@ -384,15 +922,7 @@ def get_savefig(savedir, prefix=None, filename=None, extensions=None):
             args = []  # Just make sure it's a list
         else:
             args = list(args)
-            fname, ext = os.path.splitext(args.pop(0))
-            # prefixing with path and prefix
-            fileprefix = prefix
-            if prefix is None:
-                fileprefix = ''
-            elif not prefix.endswith("_"):
-                fileprefix += "_"
-            fname = fileprefix + fname
-            fname = os.path.join(savedir, fname)
+            fname = path(args.pop(0))
 
         if fname is None:
             raise ValueError("A filename must be specified!")
@@ -401,8 +931,152 @@ def get_savefig(savedir, prefix=None, filename=None, extensions=None):
         if fig is None:
             fig = plt.gcf()
 
-        for ext in extensions:
-            fig.savefig(*([fname + '.' + ext] + args), **kwargs)
+        fnames = [fname + '.' + ext for ext in extensions]
+        return fig, fnames, args, kwargs
+
+    threshold = rasterize
+    if threshold is None and theme is not None:
+        threshold = theme.rasterize_threshold
+    if threshold is False:
+        threshold = None
+
+    def save(fig, fnames, args, kwargs, key=None):
+        if theme is None:
+            rasterized = save_formats(fig, fnames, args, kwargs, parallel,
+                                      workers, rasterize=threshold)
+        else:
+            with theme.style():
+                rasterized = save_formats(fig, fnames, args, kwargs, parallel,
+                                          workers, theme.recorder, threshold)
+        if key is not None:
+            savefig.cache.store(fnames, key)
+        return rasterized
+
+    def style_digest():
+        if theme is None:
+            return params_digest(mpl.rcParams)
+        return params_digest(theme.params)
+
+    # Keys from is_cached, by filename, for the coming save
+    looked_up = {}
+
+    def is_cached(name, *inputs):
+        '''
+        Returns true if the figure name was saved from the same inputs,
+        with the same theme parameters, by a savefig(name) after an
+        is_cached(name, *inputs) which returned false. Any arrays in
+        inputs are hashed through their buffers.
+        '''
+        fnames = [path(name) + '.' + ext for ext in extensions]
+        key = digest('inputs', style_digest(), extensions, threshold, inputs)
+        if savefig.cache.lookup(fnames, key):
+            return True
+        looked_up[fnames[0]] = key
+        return False
+
+    def cached(job):
+        '''
+        Returns the key to save the figure of job with, or None if it
+        is up to date already.
+        '''
+        fig, fnames, args, kwargs = job
+        key = looked_up.pop(fnames[0], None)
+        if key is not None:
+            # Already looked up by is_cached
+            return key
+        key = digest('figure', style_digest(), extensions, threshold,
+                     args, kwargs, figure_digest(fig))
+        return None if savefig.cache.lookup(fnames, key) else key
+
+    # Define function which saves figures there
+    def savefig(*args, **kwargs):
+        job = prepare(args, kwargs)
+        key = None
+        if cache:
+            key = cached(job)
+            if key is None:
+                if not background:
+                    return []
+                plt.close(job[0])
+                done = Future()
+                done.set_result([])
+                return done
+        if not background:
+            return save(*job, key=key)
+        slots.acquire()
+        return submit(job + (key,))
+
+    if background:
+        pool = ThreadPoolExecutor(background)
+        slots = threading.BoundedSemaphore(max_pending or 2 * background)
+        pending = []
+
+        def run(job):
+            try:
+                if theme is None:
+                    return save(*job)
+                # Not to change rcParams under the thread plotting
+                with _isolated_style(theme):
+                    return save(*job)
+            finally:
+                slots.release()
+
+        def submit(job):
+            # Detach from pyplot, the figure is freed once saved
+            plt.close(job[0])
+            future = pool.submit(run, job)
+            # Forget successful saves, keep errors for flush
+            pending[:] = [f for f in pending
+                          if not f.done() or f.exception() is not None]
+            pending.append(future)
+            return future
+
+        def flush():
+            '''
+            Wait for all pending saves to finish. Raises the first
+            error any of them encountered.
+            '''
+            jobs = pending[:]
+            del pending[:len(jobs)]
+            for future in jobs:
+                future.result()
+
+        async def asave(*args, **kwargs):
+            '''
+            As savefig, but waits for a free slot without blocking
+            the event loop. Returns an asyncio Future for the save, which
+            can be awaited for it to finish.
+            '''
+            import asyncio
+            job = prepare(args, kwargs)
+            loop = asyncio.get_running_loop()
+            key = None
+            if cache:
+                key = cached(job)
+                if key is None:
+                    plt.close(job[0])
+                    done = loop.create_future()
+                    done.set_result([])
+                    return done
+            await loop.run_in_executor(None, slots.acquire)
+            return asyncio.wrap_future(submit(job + (key,)), loop=loop)
+
+        async def aflush():
+            '''
+            As flush, but without blocking the event loop.
+            '''
+            import asyncio
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, flush)
+
+        savefig.flush = flush
+        savefig.wait = flush
+        savefig.asave = asave
+        savefig.aflush = aflush
+
+    if cache:
+        savefig.cache = SaveCache(savedir)
+        savefig.is_cached = is_cached
 
     savefig.__doc__ = '''
         Use as plt.savefig. File extension will be ignored, and saved
@@ -412,10 +1086,9 @@ def get_savefig(savedir, prefix=None, filename=None, extensions=None):
         Use as savefig(filename) or savefig() if a default filename
         has been defined.
 
-        Accepts any arguments that plt.savefig accepts:
-
-        {pltdoc}
-        '''.format(ext=extensions, savedir=savedir,
-                   pltdoc=plt.savefig.__doc__[plt.savefig.__doc__.find("Keyword arguments:"):])
+        Accepts any arguments that plt.savefig accepts. Returns the
+        artists which were rasterized in vector files, none if the
+        figure was cached.
+        '''.format(ext=extensions, savedir=savedir)
 
     return savefig
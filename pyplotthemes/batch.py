@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+'''
+Render many independent figures with a theme in a pool of worker
+processes. See render_many.
+'''
+
+import gc
+import numpy as np
+import os
+import traceback
+from time import perf_counter
+from .base import get_savefig, pyplot
+
+
+class SharedArray(object):
+    '''
+    Stands in for a NumPy array copied to shared memory, when sending
+    it to a worker.
+    '''
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _share(value, blocks, min_bytes, used):
+    '''
+    Return value with arrays of at least min_bytes, also in lists, tuples
+    and dicts, replaced by SharedArray copies. Shared memory blocks are
+    kept in blocks, by the id of the array, so an array used in several
+    places is only copied once while a job using it is pending. The ids
+    used are added to used.
+    '''
+    if type(value) is np.ndarray:
+        if value.nbytes < min_bytes or value.dtype.hasobject:
+            return value
+        key = id(value)
+        if key not in blocks:
+            from multiprocessing.shared_memory import SharedMemory
+            shm = SharedMemory(create=True, size=max(1, value.nbytes))
+            copy = np.ndarray(value.shape, value.dtype, buffer=shm.buf)
+            copy[...] = value
+            shared = SharedArray(shm.name, value.shape, value.dtype.str)
+            # The array is kept so its id is not reused meanwhile, and
+            # the count of pending jobs using the block
+            blocks[key] = [shm, shared, value, 0]
+        if key not in used:
+            used.add(key)
+            blocks[key][3] += 1
+        return blocks[key][1]
+    if type(value) in (list, tuple):
+        return type(value)(_share(v, blocks, min_bytes, used)
+                           for v in value)
+    if type(value) is dict:
+        return dict((k, _share(v, blocks, min_bytes, used))
+                    for k, v in value.items())
+    return value
+
+
+def _release(blocks, used):
+    '''
+    Free the shared memory blocks no pending job uses any longer, once
+    a job which used those in used is done.
+    '''
+    for key in used:
+        block = blocks[key]
+        block[3] -= 1
+        if block[3] == 0:
+            del blocks[key]
+            block[0].close()
+            block[0].unlink()
+
+
+# State of each worker process, set by _init_worker
+_worker = {}
+
+
+def _attach(shared, attached):
+    '''
+    Return a read-only view of a SharedArray, in a worker. The shared
+    memory opened is added to attached, by name.
+    '''
+    from multiprocessing.shared_memory import SharedMemory
+    if shared.name not in attached:
+        attached[shared.name] = SharedMemory(shared.name)
+    array = np.ndarray(shared.shape, shared.dtype,
+                       buffer=attached[shared.name].buf)
+    array.flags.writeable = False
+    return array
+
+
+def _detach(attached):
+    '''
+    Close the shared memory opened by _attach, once the views of it are
+    no longer used.
+    '''
+    for shm in attached.values():
+        try:
+            shm.close()
+        except BufferError:
+            # Views are still held by reference cycles, of the figure
+            gc.collect()
+            shm.close()
+    attached.clear()
+
+
+def _restore(value, attached):
+    '''
+    Inverse of _share, in a worker.
+    '''
+    if isinstance(value, SharedArray):
+        return _attach(value, attached)
+    if type(value) in (list, tuple):
+        return type(value)(_restore(v, attached) for v in value)
+    if type(value) is dict:
+        return dict((k, _restore(v, attached)) for k, v in value.items())
+    return value
+
+
+def _init_worker(theme, savedir, savefig_options):
+    '''
+    Prepare a worker process: import pyplot and set up the theme and
+    its savefig once, for all figures rendered by the worker.
+    '''
+    pyplot()
+    theme.instrument()
+    _worker['theme'] = theme
+    _worker['savefig'] = get_savefig(savedir, theme=theme, **savefig_options)
+
+
+def _calls(spec):
+    for call in spec.get('calls', ()):
+        name, args = call[0], call[1] if len(call) > 1 else ()
+        kwargs = call[2] if len(call) > 2 else {}
+        yield name, args, kwargs
+
+
+def _render(spec):
+    '''
+    Render and save one figure specification, in a worker. Returns its
+    status and timings.
+    '''
+    start = perf_counter()
+    theme = _worker['theme']
+    plt = pyplot()
+    status = {'name': spec.get('name'), 'ok': True, 'error': None,
+              'pid': os.getpid()}
+    theme.recorder.reset()
+    attached = {}
+    fig = None
+    try:
+        fig = theme.figure(**spec.get('figure', {}))
+        for name, args, kwargs in _calls(spec):
+            getattr(theme, name)(*_restore(args, attached),
+                                 **_restore(kwargs, attached))
+        _worker['savefig'](spec['name'], fig=fig,
+                           **_restore(spec.get('savefig', {}), attached))
+    except Exception as e:
+        status['ok'] = False
+        status['error'] = '{}: {}'.format(type(e).__name__, e)
+        status['traceback'] = traceback.format_exc()
+    finally:
+        if fig is not None:
+            plt.close(fig)
+        fig = None
+        _detach(attached)
+
+    stats = theme.recorder.stats()
+    status['time'] = dict(stats['time'], total=perf_counter() - start)
+    status['bytes'] = stats['bytes']
+    return status
+
+
+def render_many(theme, specs, savedir, workers=None, min_shared=2**16,
+                **savefig_options):
+    '''
+    Render and save many figures with theme in a pool of worker processes.
+    Returns a list with a status dict for each spec, in the same order.
+
+    Every worker process imports pyplot and copies the theme once. Each
+    figure is drawn in a new figure of its own and saved with
+    get_savefig(savedir, theme=theme, **savefig_options), so prefix and
+    extensions are accepted. NumPy arrays of at least min_shared bytes
+    are handed to the workers in shared memory, instead of being pickled
+    once per figure. Workers only get read-only views of them. Specs are
+    submitted a few per worker at a time, and an array is kept in shared
+    memory only while a figure using it is pending.
+
+    A spec is a dict:
+    {'name': 'figure1',                         # filename for savefig
+     'calls': [('plot', (x, y)),                # (method, args[, kwargs])
+               ('xlabel', ('Time',)),
+               ('legend', (), {'loc': 'best'})],
+     'figure': {'figsize': (4, 3)},             # optional, for figure()
+     'savefig': {'dpi': 150}}                   # optional, for savefig
+
+    Methods are looked up on the theme, so themed methods as well as
+    any pyplot function can be called.
+
+    A status is a dict:
+    {'name': 'figure1', 'ok': True, 'error': None, 'pid': 1234,
+     'time': {'total': ..., 'style': ..., 'plot': ..., ...},
+     'bytes': bytes written}
+    and when ok is False, error and traceback describe what went wrong.
+
+    Example:
+    theme.render_many([{'name': 'run{}'.format(i),
+                        'calls': [('plot', (t, y[i]))]}
+                       for i in range(len(y))], 'figures', workers=8)
+    '''
+    from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                    wait)
+    specs = list(specs)
+    if not os.path.exists(savedir):
+        os.mkdir(savedir)
+
+    def failed(spec, e):
+        # The worker itself failed, or the spec did not pickle
+        return {'name': spec.get('name'), 'ok': False,
+                'error': '{}: {}'.format(type(e).__name__, e),
+                'pid': None, 'time': {}, 'bytes': 0}
+
+    blocks = {}
+    statuses = [None] * len(specs)
+    pending = {}
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(theme, savedir,
+                                           savefig_options)) as pool:
+            # Arrays are only shared while jobs using them are pending,
+            # with a few jobs per worker submitted at a time
+            limit = 2 * (workers or os.cpu_count() or 1)
+
+            def collect(done):
+                for future in done:
+                    i, used = pending.pop(future)
+                    try:
+                        statuses[i] = future.result()
+                    except Exception as e:
+                        statuses[i] = failed(specs[i], e)
+                    _release(blocks, used)
+
+            for i, spec in enumerate(specs):
+                if len(pending) >= limit:
+                    collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+                used = set()
+                shared = dict(spec)
+                try:
+                    shared['calls'] = [
+                        (name, _share(tuple(args), blocks, min_shared, used),
+                         _share(dict(kwargs), blocks, min_shared, used))
+                        for name, args, kwargs in _calls(spec)]
+                    future = pool.submit(_render, shared)
+                except Exception as e:
+                    statuses[i] = failed(spec, e)
+                    _release(blocks, used)
+                    continue
+                pending[future] = (i, used)
+            collect(list(pending))
+            return statuses
+    finally:
+        for shm, _, _, _ in blocks.values():
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+'''
+Skip saving figures which have not changed since they were last saved,
+for get_savefig with cache=True.
+
+Each saved figure gets a key, a hash of the theme's parameters, how it
+was saved and either what it shows or inputs given by the caller. Keys
+are kept in an index file in the directory the figures are saved to.
+'''
+
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+
+_index_name = '.pyplotthemes-cache.json'
+
+# Getters whose values decide what an artist, axes or figure looks like
+_getters = ('get_xydata', 'get_offsets', 'get_paths', 'get_coordinates',
+            'get_array', 'get_extent', 'get_text', 'get_position',
+            'get_rotation', 'get_fontsize', 'get_color', 'get_facecolor',
+            'get_edgecolor', 'get_linestyle', 'get_linewidth', 'get_marker',
+            'get_markersize', 'get_alpha', 'get_visible', 'get_zorder',
+            'get_label', 'get_rasterized', 'get_xlim', 'get_ylim',
+            'get_xscale', 'get_yscale', 'get_size_inches')
+
+
+def _update(h, value):
+    '''
+    Feed value to the hash h. Arrays are hashed through their buffers,
+    with their type and shape, which is all there is to empty ones, and
+    containers element by element.
+    Objects of other types only contribute their type name.
+    '''
+    if isinstance(value, np.ndarray):
+        if np.ma.isMaskedArray(value):
+            _update(h, np.ma.getmaskarray(value))
+            value = value.data
+        if value.dtype.hasobject:
+            _update(h, value.tolist())
+            return
+        value = np.ascontiguousarray(value)
+        h.update('{}{}'.format(value.dtype.str, value.shape).encode())
+        if value.size:
+            h.update(memoryview(value).cast('B'))
+    elif isinstance(value, (list, tuple)):
+        h.update(b'(')
+        for v in value:
+            _update(h, v)
+        h.update(b')')
+    elif isinstance(value, dict):
+        _update(h, sorted(value.items(), key=lambda item: repr(item[0])))
+    elif isinstance(value, (str, bytes, int, float, complex, np.generic,
+                            type(None))):
+        h.update(repr(value).encode())
+    elif hasattr(value, 'vertices') and hasattr(value, 'codes'):
+        # A Path
+        _update(h, (value.vertices, value.codes))
+    elif hasattr(value, 'get_points'):
+        # A Bbox
+        _update(h, value.get_points())
+    else:
+        h.update(type(value).__name__.encode())
+
+
+def digest(*values):
+    '''
+    Return a hex digest of values, stable across processes and sessions.
+    '''
+    h = hashlib.blake2b(digest_size=20)
+    _update(h, values)
+    return h.hexdigest()
+
+
+def params_digest(params):
+    '''
+    Return a digest of rcParams, or of a theme's params.
+    '''
+    return digest([(k, repr(v)) for k, v in sorted(params.items())
+                   if not k.startswith('backend')])
+
+
+def _drawn(artist):
+    '''
+    Yield artist and everything on it, except ticks and the offset text
+    of axes, which are only filled in when the figure is drawn, and
+    follow from the limits and scales anyway.
+    '''
+    from matplotlib.axis import Axis, Tick
+    yield artist
+    skip = artist.offsetText if isinstance(artist, Axis) else None
+    for child in artist.get_children():
+        if child is not skip and not isinstance(child, Tick):
+            for a in _drawn(child):
+                yield a
+
+
+def figure_digest(fig):
+    '''
+    Return a digest of what fig shows: the data, text, colors, styles
+    and limits of it and everything on it, read through _getters, the
+    same whether or not it has been drawn. Other changes, such as to a
+    tick formatter, are not seen.
+    '''
+    from matplotlib.axes import Axes
+    from matplotlib.axis import Axis
+    h = hashlib.blake2b(digest_size=20)
+    # Text placed when drawn, next to the ticks
+    placed = set()
+    for artist in _drawn(fig):
+        if isinstance(artist, Axis):
+            placed.add(artist.label)
+        elif isinstance(artist, Axes):
+            placed.update(getattr(artist, name, None) for name in
+                          ('title', '_left_title', '_right_title'))
+        if (hasattr(artist, 'update_scalarmappable') and
+                artist.get_array() is not None):
+            # Colors of mapped collections, as drawing sets them
+            artist.update_scalarmappable()
+        h.update(type(artist).__name__.encode())
+        for name in _getters:
+            getter = getattr(artist, name, None)
+            if getter is None or (name == 'get_paths' and
+                                  hasattr(artist, 'get_coordinates')):
+                # A mesh's paths are built from its coordinates
+                continue
+            if name == 'get_position' and artist in placed:
+                continue
+            try:
+                value = getter()
+            except Exception:
+                continue
+            h.update(name.encode())
+            _update(h, value)
+    return h.hexdigest()
+
+
+class SaveCache(object):
+    '''
+    The index of the figures saved to savedir, with the key each was
+    saved with. A figure is up to date if it was saved with the same key
+    and all its files still exist.
+
+    hits and misses count lookups. Entries not looked up or stored since
+    the cache was created are stale, and removed by prune.
+
+    Changes are merged into the index on disk when written, so caches
+    of the same directory in other processes do not undo each other's.
+    '''
+
+    def __init__(self, savedir):
+        self.savedir = savedir
+        self.path = os.path.join(savedir, _index_name)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._used = set()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write(self, stored=None, removed=None):
+        '''
+        Merge the entries stored and removed, {name: entry}, into the
+        index on disk, and write it atomically, so readers see either the
+        old or the new version. Removed entries are kept if they changed
+        on disk meanwhile. Returns the names of those removed. Call with
+        the lock held.
+        '''
+        entries = self._load()
+        entries.update(stored or {})
+        gone = sorted(name for name, entry in (removed or {}).items()
+                      if entries.get(name) == entry)
+        for name in gone:
+            del entries[name]
+        tmp = '{}.{}.{}.tmp'.format(self.path, os.getpid(),
+                                    threading.get_ident())
+        with open(tmp, 'w') as f:
+            json.dump(entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        self._entries = entries
+        return gone
+
+    def _name(self, fnames):
+        return os.path.relpath(os.path.splitext(fnames[0])[0], self.savedir)
+
+    def lookup(self, fnames, key):
+        '''
+        Returns true if the files fnames of a figure were saved with key
+        and all still exist. Counts a hit or a miss.
+        '''
+        name = self._name(fnames)
+        with self._lock:
+            self._used.add(name)
+            entry = self._entries.get(name)
+            hit = (entry is not None and entry['key'] == key and
+                   set(entry['files']) >= set(os.path.basename(f)
+                                              for f in fnames) and
+                   all(os.path.exists(f) for f in fnames))
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return hit
+
+    def store(self, fnames, key):
+        '''
+        Record that the files fnames of a figure were saved with key.
+        '''
+        name = self._name(fnames)
+        entry = {'key': key, 'files': sorted(os.path.basename(f)
+                                             for f in fnames)}
+        with self._lock:
+            self._used.add(name)
+            self._write(stored={name: entry})
+
+    def prune(self, remove_files=False):
+        '''
+        Remove the entries of figures neither looked up nor saved since
+        the cache was created, typically figures a build no longer makes,
+        and also their files if remove_files is true. Entries saved again
+        by another process meanwhile are kept. Returns the names of the
+        figures removed.
+        '''
+        with self._lock:
+            stale = dict((name, self._entries[name])
+                         for name in set(self._entries) - self._used)
+            if not stale:
+                return []
+            removed = self._write(removed=stale)
+            if remove_files:
+                for name in removed:
+                    folder = os.path.dirname(os.path.join(self.savedir, name))
+                    for f in stale[name]['files']:
+                        try:
+                            os.remove(os.path.join(folder, f))
+                        except OSError:
+                            pass
+            self.evictions += len(removed)
+            return removed
+
+    def stats(self):
+        '''
+        Return {'hits': ..., 'misses': ..., 'evictions': ...,
+        'entries': ...}.
+        '''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries)}
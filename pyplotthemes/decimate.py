@@ -0,0 +1,586 @@
+# -*- coding: utf-8 -*-
+'''
+Reduce data to what can actually be seen on screen, so that
+large arrays are cheap to draw and save.
+'''
+
+import numpy as np
+import warnings
+
+
+_reducers = {'mean': np.nanmean,
+             'max': np.nanmax,
+             'min': np.nanmin}
+
+
+def as_float(data):
+    '''
+    Return data as a float array with masked values replaced by NaN.
+    '''
+    if np.ma.isMaskedArray(data):
+        return np.ma.filled(data.astype(float), np.nan)
+    data = np.asarray(data)
+    if data.dtype.kind != 'f':
+        data = data.astype(float)
+    return data
+
+
+def nanminmax(data, chunksize=2**16):
+    '''
+    Return (min, max) of data, ignoring NaN and masked values.
+
+    The data is traversed in chunks small enough to stay in cache,
+    so memory is only read once for both values.
+    '''
+    if np.ma.isMaskedArray(data):
+        data = data.compressed()
+    flat = np.asarray(data).reshape(-1)
+    lo, hi = np.inf, -np.inf
+    for i in range(0, flat.size, chunksize):
+        chunk = flat[i:i + chunksize]
+        lo = np.fmin(lo, np.fmin.reduce(chunk))
+        hi = np.fmax(hi, np.fmax.reduce(chunk))
+    if lo > hi:
+        # Empty, or nothing but NaN
+        return np.nan, np.nan
+    return lo, hi
+
+
+# The dpi get_savefig saves at by default
+save_dpi = 300
+
+
+def output_dpi(fig, dpi=None):
+    '''
+    Return dpi, or if None the highest resolution fig is likely drawn
+    at: its own dpi, savefig.dpi, or the dpi get_savefig saves at.
+    '''
+    if dpi is not None:
+        return dpi
+    import matplotlib as mpl
+    dpis = [fig.dpi, save_dpi]
+    if mpl.rcParams['savefig.dpi'] != 'figure':
+        dpis.append(mpl.rcParams['savefig.dpi'])
+    return max(dpis)
+
+
+def pixel_size(ax, dpi=None):
+    '''
+    Return the size of the axes in pixels, (width, height), on screen or
+    if dpi is given, when saved at dpi.
+    '''
+    bbox = ax.get_window_extent()
+    scale = 1.0 if dpi is None else dpi / ax.figure.dpi
+    return (max(1, int(np.ceil(bbox.width * scale))),
+            max(1, int(np.ceil(bbox.height * scale))))
+
+
+def block_reduce(data, factors, how='mean'):
+    '''
+    Reduce a 2-D array by combining blocks of factors=(rows, cols)
+    values into one. how is one of 'mean', 'max' or 'min'. NaN values
+    are ignored, and the edges are padded with NaN if necessary.
+    '''
+    reduce = _reducers[how]
+    data = as_float(data)
+    fy, fx = factors
+    if fy == 1 and fx == 1:
+        return data
+
+    ny, nx = data.shape
+    py, px = -ny % fy, -nx % fx
+    if py or px:
+        data = np.pad(data, ((0, py), (0, px)), mode='constant',
+                      constant_values=np.nan)
+    blocks = data.reshape(data.shape[0] // fy, fy, data.shape[1] // fx, fx)
+    with warnings.catch_warnings():
+        # All-NaN blocks are fine, they stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return reduce(blocks, axis=(1, 3))
+
+
+def is_regular(x, rtol=1e-6):
+    '''
+    Returns true if x is 1-D and evenly spaced.
+    '''
+    x = np.asarray(x)
+    if x.ndim != 1 or x.size < 2:
+        return x.ndim == 1
+    step = np.diff(x)
+    return np.allclose(step, step[0], rtol=rtol, atol=0)
+
+
+def _reduce_coords(c, n, f, axis):
+    '''
+    Pick every f:th coordinate of c, edges or centers of n cells,
+    along axis. The last edge is always kept.
+    '''
+    c = np.asarray(c)
+    if f == 1:
+        return c
+    if c.shape[axis] == n + 1:
+        index = np.r_[0:n:f, n]
+    else:
+        index = np.arange(0, n, f)
+    return np.take(c, index, axis=axis)
+
+
+def _extent(c, n):
+    '''
+    Return the outer edges of regularly spaced coordinates c, which are
+    either edges or centers of n cells.
+    '''
+    c = np.asarray(c, dtype=float)
+    if c.size == n + 1:
+        return c[0], c[-1]
+    step = c[1] - c[0] if c.size > 1 else 1.0
+    return c[0] - step / 2, c[-1] + step / 2
+
+
+def decimated_pcolormesh(ax, args, kwargs, how='mean', dpi=None):
+    '''
+    Draw pcolormesh(*args, **kwargs) on ax, with the data first block
+    reduced to the pixel resolution of the axes at dpi, by default the
+    highest the figure is likely saved at, see output_dpi.
+
+    Regular grids are drawn as an image instead of a mesh, which is
+    much cheaper. In that case an AxesImage is returned and arguments
+    specific to pcolormesh are ignored.
+    '''
+    if len(args) == 3:
+        x, y, data = args
+    else:
+        data = args[0]
+        x, y = None, None
+
+    ny, nx = np.shape(data)
+    width, height = pixel_size(ax, output_dpi(ax.figure, dpi))
+    # At least one cell per pixel
+    factors = (max(1, ny // height), max(1, nx // width))
+    reduced = block_reduce(data, factors, how)
+    if np.ma.isMaskedArray(data):
+        reduced = np.ma.masked_invalid(reduced)
+
+    if x is None or (is_regular(x) and is_regular(y)):
+        if x is None:
+            extent = (0, nx, 0, ny)
+        else:
+            extent = _extent(x, nx) + _extent(y, ny)
+        for key in ('shading', 'edgecolors', 'edgecolor', 'antialiased',
+                    'antialiaseds', 'linewidth', 'linewidths', 'snap'):
+            kwargs.pop(key, None)
+        return ax.imshow(reduced, extent=extent, origin='lower',
+                         aspect='auto', interpolation='nearest', **kwargs)
+
+    x, y = np.asarray(x), np.asarray(y)
+    if x.ndim == 1:
+        x = _reduce_coords(x, nx, factors[1], 0)
+        y = _reduce_coords(y, ny, factors[0], 0)
+    else:
+        x = _reduce_coords(_reduce_coords(x, ny, factors[0], 0),
+                           nx, factors[1], 1)
+        y = _reduce_coords(_reduce_coords(y, ny, factors[0], 0),
+                           nx, factors[1], 1)
+    return ax.pcolormesh(x, y, reduced, **kwargs)
+
+
+def _segment_argmax(values, starts):
+    '''
+    Return the index of the first largest value in each segment
+    values[starts[i]:starts[i + 1]]. Segments must not be empty, and
+    values must not contain NaN.
+    '''
+    maxs = np.maximum.reduceat(values, starts)
+    lengths = np.diff(np.append(starts, values.size))
+    hits = np.flatnonzero(values == np.repeat(maxs, lengths))
+    segment = np.searchsorted(starts, hits, side='right') - 1
+    first = np.ones(hits.size, dtype=bool)
+    first[1:] = segment[1:] != segment[:-1]
+    return hits[first]
+
+
+def _finite_or(values, fill):
+    '''
+    Return values as float with NaN replaced by fill.
+    '''
+    values = np.asarray(values, dtype=float)
+    nans = np.isnan(values)
+    if nans.any():
+        values = np.where(nans, fill, values)
+    return values
+
+
+def _numeric(x):
+    '''
+    Return x as a float array, or None if it is not numeric.
+    '''
+    x = np.asarray(x)
+    if x.dtype.kind not in 'iuf':
+        return None
+    return x.astype(float, copy=False)
+
+
+def _bucket_starts(x, nbuckets):
+    '''
+    Start index of each bucket when splitting a series in nbuckets.
+    Buckets are equally wide in x if x is sorted, and equally long
+    otherwise. Empty buckets are dropped.
+    '''
+    n = len(x)
+    xf = _numeric(x)
+    if xf is not None and n > 1 and np.all(xf[1:] >= xf[:-1]):
+        bounds = np.linspace(xf[0], xf[-1], nbuckets + 1)[:-1]
+        starts = np.searchsorted(xf, bounds)
+    else:
+        starts = np.linspace(0, n, nbuckets + 1).astype(int)[:-1]
+    return np.unique(starts[starts < n])
+
+
+def minmax(x, y, npoints):
+    '''
+    Return indices of at most about npoints points of the series (x, y),
+    keeping the smallest and largest y in each of npoints / 2 buckets
+    as well as both end points. Drawn as a line at one bucket per pixel
+    column, the result is indistinguishable from the full series.
+    '''
+    n = len(y)
+    if n <= npoints:
+        return np.arange(n)
+    starts = _bucket_starts(x, max(1, npoints // 2))
+    y = np.asarray(y, dtype=float)
+    imax = _segment_argmax(_finite_or(y, -np.inf), starts)
+    imin = _segment_argmax(_finite_or(-y, -np.inf), starts)
+    return np.unique(np.concatenate(([0], imin, imax, [n - 1])))
+
+
+def lttb(x, y, npoints):
+    '''
+    Return indices of npoints points of the series (x, y) chosen with
+    Largest-Triangle-Three-Buckets. The first and last points are always
+    kept. In each bucket between them, the point forming the largest
+    triangle with the previous and the next bucket's averages is kept.
+    Using the previous average rather than the previously kept point
+    makes every bucket independent, so all are computed at once.
+    '''
+    n = len(y)
+    if n <= npoints or npoints < 3:
+        return np.arange(n)
+    xf = _numeric(x)
+    if xf is None:
+        xf = np.arange(n, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Buckets of the inner points
+    starts = np.unique(np.linspace(1, n - 1, npoints - 1).astype(int)[:-1])
+    lengths = np.diff(np.append(starts, n - 1))
+    inner_x, inner_y = xf[1:n - 1], _finite_or(y[1:n - 1], 0.0)
+    offsets = starts - 1
+    mean_x = np.add.reduceat(inner_x, offsets) / lengths
+    mean_y = np.add.reduceat(inner_y, offsets) / lengths
+
+    # Previous and next bucket averages, end points at the edges
+    first, last = _finite_or(y[[0, -1]], 0.0)
+    prev_x = np.repeat(np.r_[xf[0], mean_x[:-1]], lengths)
+    prev_y = np.repeat(np.r_[first, mean_y[:-1]], lengths)
+    next_x = np.repeat(np.r_[mean_x[1:], xf[-1]], lengths)
+    next_y = np.repeat(np.r_[mean_y[1:], last], lengths)
+
+    area = np.abs((prev_x - next_x) * (inner_y - prev_y) -
+                  (prev_x - inner_x) * (next_y - prev_y))
+    area = _finite_or(area, -np.inf)
+    picked = _segment_argmax(area, offsets) + 1
+    return np.concatenate(([0], picked, [n - 1]))
+
+
+def envelope(x, y1, y2, npoints):
+    '''
+    Return indices of about npoints points of the band between y1 and y2
+    over sorted x, or of all points if x is not sorted. In each of
+    npoints / 4 buckets, the first and last points are kept, as are
+    those with the highest value of either bound and the lowest. Filled
+    at one bucket per pixel column, the result covers the same pixels as
+    the full band.
+    '''
+    n = len(x)
+    xf = _numeric(x)
+    if n <= npoints or xf is None or not np.all(xf[1:] >= xf[:-1]):
+        return np.arange(n)
+    y1 = np.broadcast_to(as_float(y1), (n,))
+    y2 = np.broadcast_to(as_float(y2), (n,))
+    starts = _bucket_starts(xf, max(1, npoints // 4))
+    ends = np.append(starts[1:], n) - 1
+    upper = _segment_argmax(_finite_or(np.fmax(y1, y2), -np.inf), starts)
+    lower = _segment_argmax(_finite_or(-np.fmin(y1, y2), -np.inf), starts)
+    return np.unique(np.concatenate((starts, ends, upper, lower)))
+
+
+decimators = {'minmax': minmax,
+              'lttb': lttb}
+
+
+def split_plot_args(args):
+    '''
+    Split the positional arguments of plot into groups of
+    ([x,] y[, fmt]) the same way matplotlib does.
+    '''
+    groups = []
+    while args:
+        this, args = args[:2], args[2:]
+        if args and isinstance(args[0], str):
+            this += args[0],
+            args = args[1:]
+        groups.append(this)
+    return groups
+
+
+def decimated_plot(ax, args, kwargs, how='minmax', dpi=None):
+    '''
+    Draw plot(*args, **kwargs) on ax, with every long 1-D series reduced
+    to a few points per pixel column of the axes using the decimator
+    how, 'minmax' or 'lttb'. Pixels are counted at dpi, by default the
+    highest the figure is likely saved at, see output_dpi.
+
+    When the x-limits change, for example when zooming interactively,
+    the visible part of each series with sorted x is reduced again from
+    the full data.
+    '''
+    decimate = decimators[how]
+    if 'data' in kwargs:
+        return ax.plot(*args, **kwargs)
+
+    npoints = 2 * pixel_size(ax, output_dpi(ax.figure, dpi))[0]
+    newargs = []
+    series = []
+    nlines = 0
+    for group in split_plot_args(args):
+        group = list(group)
+        fmt = [group.pop()] if isinstance(group[-1], str) else []
+        y = np.asarray(group[-1])
+        x = np.asarray(group[0]) if len(group) == 2 else np.arange(len(y))
+
+        if y.ndim != 1 or x.shape != y.shape or y.size <= npoints:
+            newargs += group + fmt
+            nlines += y.shape[1] if y.ndim == 2 else 1
+            continue
+
+        idx = decimate(x, y, npoints)
+        newargs += [x[idx], y[idx]] + fmt
+        series.append((nlines, x, y))
+        nlines += 1
+
+    lines = ax.plot(*newargs, **kwargs)
+
+    if series:
+        _redecimate_on_zoom(ax, [(lines[i], x, y) for i, x, y in series],
+                            decimate, dpi)
+    return lines
+
+
+def _redecimate_on_zoom(ax, series, decimate, dpi=None):
+    '''
+    Connect a callback which re-reduces the visible part of each
+    (line, x, y) in series when the x-limits of ax change.
+    '''
+    series = [(line, x, y, _numeric(x)) for line, x, y in series]
+    series = [s for s in series
+              if s[3] is not None and np.all(s[3][1:] >= s[3][:-1])]
+    if not series:
+        return
+    views = {}
+
+    def on_xlim(ax):
+        lo, hi = sorted(ax.get_xlim())
+        npoints = 2 * pixel_size(ax, output_dpi(ax.figure, dpi))[0]
+        for line, x, y, xf in series:
+            i0 = max(0, np.searchsorted(xf, lo) - 1)
+            i1 = min(len(xf), np.searchsorted(xf, hi, side='right') + 1)
+            if views.get(id(line)) == (i0, i1, npoints):
+                continue
+            views[id(line)] = (i0, i1, npoints)
+            idx = decimate(x[i0:i1], y[i0:i1], npoints) + i0
+            line.set_data(x[idx], y[idx])
+
+    ax.callbacks.connect('xlim_changed', on_xlim)
+
+
+# Arguments of scatter which only apply to markers
+_marker_kwargs = ('s', 'marker', 'linewidths', 'linewidth', 'edgecolors',
+                  'edgecolor', 'facecolors', 'facecolor', 'plotnonfinite',
+                  'verts')
+
+
+def wants_density(args, kwargs, density, threshold):
+    '''
+    Returns true if scatter(*args, **kwargs) should be drawn as a density
+    image: always if density is true, never if it is False, and if None,
+    when there are more than threshold points, unless threshold is None.
+    '''
+    if density is not None:
+        return bool(density)
+    x = args[0] if args else kwargs.get('x')
+    return threshold is not None and np.size(x) > threshold
+
+
+def _bin_index(x, y, lo, scale, shape):
+    '''
+    Return the flat index of the bin of each finite point (x, y) in a
+    grid of shape (rows, cols) starting at lo, with scale bins per unit,
+    and a mask of the points which are finite.
+    '''
+    x, y = as_float(x).reshape(-1), as_float(y).reshape(-1)
+    valid = np.isfinite(x) & np.isfinite(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    ix = ((x - lo[0]) * scale[0]).astype(np.intp)
+    iy = ((y - lo[1]) * scale[1]).astype(np.intp)
+    # The largest values fall on the last edge
+    np.clip(ix, 0, shape[1] - 1, out=ix)
+    np.clip(iy, 0, shape[0] - 1, out=iy)
+    return iy * shape[1] + ix, valid
+
+
+def _grid(extent, shape):
+    '''
+    Return the start and bins per unit, in x and y, of a grid of shape
+    (rows, cols) spanning extent, (xmin, xmax, ymin, ymax).
+    '''
+    return ((extent[0], extent[2]),
+            (shape[1] / (extent[1] - extent[0]),
+             shape[0] / (extent[3] - extent[2])))
+
+
+def bin_points(x, y, shape, weights=None, chunksize=2**20):
+    '''
+    Count the points (x, y) in a grid of shape (rows, cols) spanning
+    their range, and sum weights, if given, over the same bins. Returns
+    (counts, sums, extent) where extent is (xmin, xmax, ymin, ymax) and
+    sums is None without weights. NaN points are ignored. A range of a
+    single value is widened by 0.5 each way, with the points in the
+    middle.
+
+    The points are read chunksize at a time, so x, y and weights can be
+    memory mapped arrays larger than memory.
+    '''
+    x0, x1 = nanminmax(x)
+    y0, y1 = nanminmax(y)
+    if not (np.isfinite(x0) and np.isfinite(y0)):
+        x0 = x1 = y0 = y1 = 0.0
+    if x1 == x0:
+        x0, x1 = x0 - 0.5, x1 + 0.5
+    if y1 == y0:
+        y0, y1 = y0 - 0.5, y1 + 0.5
+    extent = (x0, x1, y0, y1)
+    lo, scale = _grid(extent, shape)
+    nbins = shape[0] * shape[1]
+
+    counts = np.zeros(nbins, dtype=np.int64)
+    sums = None if weights is None else np.zeros(nbins)
+    n = np.size(x)
+    for i in range(0, n, chunksize):
+        index, valid = _bin_index(x[i:i + chunksize], y[i:i + chunksize],
+                                  lo, scale, shape)
+        counts += np.bincount(index, minlength=nbins)
+        if weights is not None:
+            w = as_float(weights[i:i + chunksize]).reshape(-1)[valid]
+            sums += np.bincount(index, weights=np.nan_to_num(w),
+                                minlength=nbins)
+
+    if sums is not None:
+        sums = sums.reshape(shape)
+    return counts.reshape(shape), sums, extent
+
+
+def sparse_points(x, y, counts, extent, most=1, chunksize=2**20):
+    '''
+    Return the points (x, y) in bins of counts, from bin_points, holding
+    at most most points, as two arrays.
+    '''
+    shape = counts.shape
+    lo, scale = _grid(extent, shape)
+    sparse = (counts <= most).reshape(-1)
+    xs, ys = [], []
+    for i in range(0, np.size(x), chunksize):
+        cx, cy = x[i:i + chunksize], y[i:i + chunksize]
+        index, valid = _bin_index(cx, cy, lo, scale, shape)
+        keep = sparse[index]
+        xs.append(as_float(cx).reshape(-1)[valid][keep])
+        ys.append(as_float(cy).reshape(-1)[valid][keep])
+    if not xs:
+        return np.array([]), np.array([])
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _density_cmap(color):
+    '''
+    A colormap from transparent to color, so sparse areas fade into
+    the background.
+    '''
+    from matplotlib.colors import LinearSegmentedColormap, to_rgba
+    r, g, b, _ = to_rgba(color)
+    return LinearSegmentedColormap.from_list('density', [(r, g, b, 0.15),
+                                                         (r, g, b, 1.0)])
+
+
+def density_scatter(ax, args, kwargs, color, outliers=False, bins=None,
+                    dpi=None):
+    '''
+    Draw scatter(*args, **kwargs) on ax as an image of the number of
+    points in each pixel of the axes at dpi, by default the highest the
+    figure is likely saved at, see output_dpi, or in bins=(cols, rows)
+    bins, with a logarithmic color scale. The points are binned in chunks with
+    numpy.bincount, see bin_points, so they can be memory mapped.
+
+    If c is a number per point, the image shows the mean of c in each
+    bin instead. Otherwise the colormap goes from transparent to c, or
+    color, and cmap and norm are used if given. Arguments which only
+    apply to markers are ignored.
+
+    If outliers is true, points in bins with at most outliers points
+    (1 for True) are also drawn as markers, with s and marker, so that
+    isolated points stay visible. Returns the AxesImage, with the
+    markers, or None, as its outliers attribute.
+    '''
+    from matplotlib.colors import LogNorm, is_color_like
+    args = list(args)
+    names = ['x', 'y', 's', 'c']
+    values = dict(zip(names, args[:4]))
+    values.update((k, kwargs.pop(k)) for k in names if k in kwargs)
+    if len(args) > 4:
+        kwargs.setdefault('marker', args[4])
+    x, y, c = values['x'], values['y'], values.get('c')
+    color = kwargs.pop('color', color)
+    if c is not None and is_color_like(c):
+        color, c = c, None
+    if c is not None and np.size(c) != np.size(x):
+        raise ValueError("density scatter needs c as one color or "
+                         "one number per point")
+
+    if bins is None:
+        bins = pixel_size(ax, output_dpi(ax.figure, dpi))
+    shape = (bins[1], bins[0])
+    counts, sums, extent = bin_points(x, y, shape, c)
+
+    markers = {'s': values.get('s'), 'marker': kwargs.get('marker'),
+               'zorder': kwargs.get('zorder')}
+    for key in _marker_kwargs:
+        kwargs.pop(key, None)
+    empty = counts == 0
+    if sums is None:
+        data = np.ma.masked_array(counts, empty)
+        if 'norm' not in kwargs and data.count():
+            kwargs['norm'] = LogNorm(vmin=max(1, kwargs.pop('vmin', 1)),
+                                     vmax=kwargs.pop('vmax', data.max()))
+        kwargs.setdefault('cmap', _density_cmap(color))
+    else:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data = np.ma.masked_array(sums / counts, empty)
+
+    image = ax.imshow(data, extent=extent, origin='lower', aspect='auto',
+                      interpolation='nearest', **kwargs)
+    image.outliers = None
+    if outliers:
+        most = 1 if outliers is True else outliers
+        ox, oy = sparse_points(x, y, counts, extent, most)
+        markers = dict((k, v) for k, v in markers.items() if v is not None)
+        image.outliers = ax.scatter(ox, oy, color=color, **markers)
+    return image
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+'''
+Helpers for writing figures to disk, used by get_savefig.
+'''
+
+import matplotlib as mpl
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from .instrument import measured
+
+
+# Executors are expensive to start, so they are kept between calls
+_pools = {}
+
+
+def get_pool(kind, workers=None):
+    '''
+    Return a shared executor of the given kind, 'thread' or 'process'.
+    '''
+    key = (kind, workers)
+    if key not in _pools:
+        if kind == 'process':
+            # Imports multiprocessing, so only when needed
+            from concurrent.futures import ProcessPoolExecutor
+            _pools[key] = ProcessPoolExecutor(workers)
+        elif kind == 'thread':
+            _pools[key] = ThreadPoolExecutor(workers)
+        else:
+            raise ValueError("Unknown pool kind: {}".format(kind))
+    return _pools[key]
+
+
+def tight_bbox(fig, pad_inches=None, bbox_extra_artists=None, dpi=None):
+    '''
+    Compute the padded bounding box which bbox_inches='tight' would
+    result in when saving at dpi, by default savefig.dpi. The figure is
+    drawn, without rendering, first, so its layout engine has placed
+    everything as savefig would. Returns None if the figure's canvas
+    can not provide a renderer to measure with.
+    '''
+    get_renderer = getattr(fig.canvas, 'get_renderer', None)
+    if get_renderer is None:
+        return None
+    if dpi is None:
+        dpi = mpl.rcParams['savefig.dpi']
+    if dpi == 'figure':
+        dpi = fig.dpi
+
+    engine = fig.get_layout_engine()
+    if pad_inches == 'layout' and hasattr(engine, 'get') and \
+            'w_pad' in engine.get():
+        # Constrained layout's own padding
+        pads = (engine.get()['w_pad'], engine.get()['h_pad'])
+    else:
+        if pad_inches in (None, 'layout'):
+            pad_inches = mpl.rcParams['savefig.pad_inches']
+        pads = (pad_inches, pad_inches)
+
+    figure_dpi = fig.dpi
+    fig.dpi = dpi
+    try:
+        fig.draw_without_rendering()
+        bbox = fig.get_tightbbox(get_renderer(),
+                                 bbox_extra_artists=bbox_extra_artists)
+    finally:
+        fig.dpi = figure_dpi
+    return bbox.padded(*pads)
+
+
+def pickle_figure(fig):
+    '''
+    Pickle a figure without tying the copy to pyplot, so loading it
+    does not register a new pyplot figure.
+    '''
+    manager = getattr(fig.canvas, 'manager', None)
+    fig.canvas.manager = None
+    try:
+        return pickle.dumps(fig, pickle.HIGHEST_PROTOCOL)
+    finally:
+        fig.canvas.manager = manager
+
+
+def _save_copy(data, rc, fname, args, kwargs):
+    '''
+    Load a pickled figure and save it. Runs in a worker.
+    '''
+    if rc is not None:
+        # Values come from matplotlib, so there is no need to validate them
+        dict.update(mpl.rcParams, rc)
+    fig = pickle.loads(data)
+    fig.savefig(*([fname] + args), **kwargs)
+
+
+# Formats written as vector paths, where rasterizing heavy artists pays
+vector_formats = frozenset(['pdf', 'eps', 'ps', 'svg', 'svgz', 'pgf'])
+
+
+def vertex_count(artist):
+    '''
+    Return the number of vertices, or of points for markers, an artist
+    writes to a vector file.
+    '''
+    from matplotlib.collections import Collection, QuadMesh
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, QuadMesh):
+        return artist.get_coordinates()[..., 0].size
+    if isinstance(artist, Collection):
+        vertices = sum(len(p.vertices) for p in artist.get_paths())
+        return max(vertices, len(artist.get_offsets()))
+    if isinstance(artist, Patch):
+        return len(artist.get_path().vertices)
+    return 0
+
+
+def heavy_artists(fig, threshold):
+    '''
+    Return the lines, collections and patches plotted on the axes of fig
+    with more than threshold vertices, see vertex_count. Axes, spines,
+    ticks, text and legends are never included.
+    '''
+    heavy = []
+    for ax in fig.axes:
+        for artist in list(ax.lines) + list(ax.collections) + list(ax.patches):
+            if (artist.get_visible() and not artist.get_rasterized() and
+                    vertex_count(artist) > threshold):
+                heavy.append(artist)
+    return heavy
+
+
+@contextmanager
+def rasterized_heavy(fig, threshold):
+    '''
+    Context manager marking the artists of fig with more than threshold
+    vertices as rasterized, so vector backends draw them as an image at
+    the save dpi. Yields the list of those artists, which are made vector
+    again on exit. Does nothing if threshold is None.
+    '''
+    heavy = [] if threshold is None else heavy_artists(fig, threshold)
+    for artist in heavy:
+        artist.set_rasterized(True)
+    try:
+        yield heavy
+    finally:
+        for artist in heavy:
+            artist.set_rasterized(False)
+
+
+def record_saved(recorder, fig, fnames):
+    '''
+    Count the figure, its artists and the files written on recorder.
+    '''
+    recorder.increment('figures')
+    recorder.increment('artists', len(fig.findobj()))
+    for fname in fnames:
+        if isinstance(fname, str) and os.path.exists(fname):
+            recorder.increment('files', file=fname)
+            recorder.increment('bytes', os.path.getsize(fname), file=fname)
+
+
+def save_formats(fig, fnames, args, kwargs, parallel=None, workers=None,
+                 recorder=None, rasterize=None):
+    '''
+    Save the figure once for each filename in fnames.
+
+    If bbox_inches is 'tight' it is computed a single time and reused for
+    all files. With parallel set to 'thread' or 'process', all files
+    but the first are written concurrently by copies of the figure in a
+    pool of workers. Returns when all files have been written.
+
+    If rasterize is a number and a file is in a vector format, artists
+    with more than that many vertices are rasterized while saving, see
+    rasterized_heavy. Returns the list of artists rasterized.
+
+    If a Recorder is given, computing the shared bounding box is recorded
+    as layout, and writing the files as encode. A single file is saved
+    exactly as without a Recorder.
+    '''
+    if not any(os.path.splitext(f)[1][1:].lower() in vector_formats
+               for f in fnames if isinstance(f, str)):
+        rasterize = None
+    with rasterized_heavy(fig, rasterize) as rasterized:
+        _save_formats(fig, fnames, args, kwargs, parallel, workers, recorder)
+    if recorder is not None and rasterized:
+        recorder.increment('rasterized', len(rasterized))
+    return rasterized
+
+
+def _save_formats(fig, fnames, args, kwargs, parallel, workers, recorder):
+    kwargs = dict(kwargs)
+    if len(fnames) > 1 and kwargs.get('bbox_inches') == 'tight':
+        with measured(recorder, 'layout'):
+            bbox = tight_bbox(fig, kwargs.get('pad_inches'),
+                              kwargs.get('bbox_extra_artists'),
+                              kwargs.get('dpi'))
+        if bbox is not None:
+            kwargs['bbox_inches'] = bbox
+            kwargs.pop('bbox_extra_artists', None)
+
+    jobs = []
+    if parallel and len(fnames) > 1:
+        try:
+            data = pickle_figure(fig)
+        except Exception:
+            # Some figures, with lambda formatters say, can't be pickled
+            data = None
+
+        if data is not None:
+            rc = None
+            if parallel == 'process':
+                rc = dict((k, v) for k, v in dict.items(mpl.rcParams)
+                          if not k.startswith('backend'))
+            pool = get_pool(parallel, workers)
+            jobs = [pool.submit(_save_copy, data, rc, fname, args, kwargs)
+                    for fname in fnames[1:]]
+
+    with measured(recorder, 'encode'):
+        for fname in fnames[:1] if jobs else fnames:
+            fig.savefig(*([fname] + args), **kwargs)
+
+        for job in jobs:
+            job.result()
+
+    if recorder is not None:
+        record_saved(recorder, fig, fnames)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+'''
+Resolve the font stacks of rcParams, such as font.serif, to the fonts
+actually installed, so matplotlib does not search through missing ones
+every time it lays out text. Used by themes with resolve_fonts=True.
+
+What each font name resolves to is cached on disk, in matplotlib's
+cache directory, for as long as the installed fonts stay the same.
+'''
+
+import hashlib
+import json
+import os
+import threading
+import warnings
+
+
+# The font stacks, and what matplotlib falls back to for each when
+# none of the fonts are installed
+stacks = {'font.serif': 'DejaVu Serif',
+          'font.sans-serif': 'DejaVu Sans',
+          'font.cursive': 'DejaVu Sans',
+          'font.fantasy': 'DejaVu Sans',
+          'font.monospace': 'DejaVu Sans Mono'}
+
+# Names of whole families rather than of fonts
+_generic = frozenset(['serif', 'sans-serif', 'sans serif', 'cursive',
+                      'fantasy', 'monospace', 'sans'])
+
+_cache_name = 'pyplotthemes-fonts.json'
+_cache_lock = threading.Lock()
+# The cache, once loaded: {'key': installed fonts, 'fonts': {name: file}}
+_cache = {}
+
+
+def _installed():
+    '''
+    Return matplotlib's font manager and a key identifying the fonts it
+    knows of.
+    '''
+    from matplotlib import font_manager
+    manager = font_manager.fontManager
+    files = sorted(f.fname for f in manager.ttflist)
+    key = hashlib.sha1('\n'.join(files).encode('utf-8')).hexdigest()
+    return manager, key
+
+
+def _cache_path():
+    import matplotlib as mpl
+    return os.path.join(mpl.get_cachedir(), _cache_name)
+
+
+def _load_cache(key):
+    '''
+    Return the cached {name: file or None} for the installed fonts.
+    '''
+    if _cache.get('key') != key:
+        _cache.update(key=key, fonts={})
+        try:
+            with open(_cache_path()) as f:
+                stored = json.load(f)
+            if stored.get('key') == key:
+                _cache['fonts'] = stored['fonts']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+    return _cache['fonts']
+
+
+def _save_cache():
+    '''
+    Write the cache to disk, atomically, so other processes see either
+    the old or the new version.
+    '''
+    path = _cache_path()
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(_cache, f)
+        os.replace(tmp, path)
+    except (IOError, OSError):
+        pass
+
+
+def _find(manager, name):
+    '''
+    Return the file of the regular face of the installed font name,
+    or None if there is no such font. Only TrueType and OpenType fonts
+    count, as the AFM fonts are only used by the PS and PDF backends
+    when asked to.
+    '''
+    name = name.lower()
+    faces = [f for f in manager.ttflist if f.name.lower() == name]
+    if not faces:
+        return None
+    regular = [f for f in faces if f.style == 'normal' and f.weight == 400]
+    return (regular or faces)[0].fname
+
+
+def resolve_fonts(names):
+    '''
+    Return {name: file} for the fonts in names, with None as the file of
+    those which are not installed. Generic family names are left out.
+    '''
+    names = [n for n in names if n.lower() not in _generic]
+    with _cache_lock:
+        manager, key = _installed()
+        fonts = _load_cache(key)
+        missing = [n for n in names if n not in fonts or
+                   (fonts[n] is not None and not os.path.exists(fonts[n]))]
+        if missing:
+            for name in missing:
+                fonts[name] = _find(manager, name)
+            _save_cache()
+        return dict((n, fonts[n]) for n in names)
+
+
+def _family_stack(name):
+    '''
+    Return the font stack a generic family name in font.family refers to,
+    or None if name is the name of a font.
+    '''
+    name = name.lower()
+    if name in ('sans-serif', 'sans serif', 'sans'):
+        return 'font.sans-serif'
+    if name in _generic:
+        return 'font.' + name
+    return None
+
+
+def _warn_missing(stack, names, fallback):
+    if names:
+        warnings.warn("None of the fonts in {} are installed ({}), text is "
+                      "drawn in {} instead".format(stack, ', '.join(names),
+                                                   fallback), stacklevel=4)
+
+
+def _names(value):
+    if isinstance(value, str):
+        return [n.strip() for n in value.split(',')]
+    return list(value)
+
+
+def resolve_stacks(params):
+    '''
+    Return params with every font stack narrowed to the fonts which are
+    installed, in the same order, or matplotlib's fallback if none are.
+    Stacks not in params are taken from matplotlib's rcParams, so the
+    result has them all.
+    Fonts named directly in font.family, rather than through a family
+    like serif, are narrowed too, falling back to sans-serif. Also
+    returns {stack: [(name, file)]} of the fonts used and {stack: [name]}
+    of those missing.
+
+    Warns when none of the fonts font.family uses are installed, as
+    text is then drawn in the fallback.
+
+    Stacks are left alone when text.usetex is set, as LaTeX picks the
+    fonts then.
+    '''
+    if params.get('text.usetex'):
+        return params, {}, {}
+
+    import matplotlib as mpl
+    params = dict(params)
+    found, missing, fallen = {}, {}, []
+    for stack, fallback in stacks.items():
+        names = _names(params.get(stack, mpl.rcParams[stack]))
+        files = resolve_fonts(names)
+        found[stack] = [(n, files[n]) for n in names
+                        if files.get(n) is not None]
+        missing[stack] = [n for n in names if n in files and files[n] is None]
+        if not found[stack]:
+            found[stack] = [(fallback, resolve_fonts([fallback])[fallback])]
+            fallen.append(stack)
+        params[stack] = [n for n, _ in found[stack]]
+
+    family = params.get('font.family')
+    if family is not None:
+        names = _names(family)
+        files = resolve_fonts(names)
+        missing['font.family'] = [n for n in names if n in files and
+                                  files[n] is None]
+        family = [n for n in names if _family_stack(n) or files[n]]
+        if not family:
+            family = ['sans-serif']
+            _warn_missing('font.family', missing['font.family'], family[0])
+        elif _family_stack(family[0]) in fallen:
+            # Text is drawn in the first, the others are only used for
+            # characters it lacks
+            stack = _family_stack(family[0])
+            _warn_missing(stack, missing[stack], stacks[stack])
+        found['font.family'] = [(n, files.get(n)) for n in family]
+        params['font.family'] = family
+    return params, found, missing
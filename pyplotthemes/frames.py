@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+'''
+Write the frames of an animation, drawn by updating one figure in place,
+as numbered PNG files or a single .npy file. See FrameExporter.
+'''
+
+import numpy as np
+import os
+import queue
+from time import perf_counter
+from .export import get_pool
+from .instrument import measured
+
+
+def canvas_rgba(fig):
+    '''
+    Draw fig and return its pixels as a read-only (height, width, 4)
+    uint8 view of the Agg canvas buffer, without copying. The view is
+    only valid until the figure is drawn again. Figures on canvases
+    without such a buffer are given an Agg canvas.
+    '''
+    if not hasattr(fig.canvas, 'buffer_rgba'):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        FigureCanvasAgg(fig)
+    fig.canvas.draw()
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    rgba.flags.writeable = False
+    return rgba
+
+
+def _encode_png(rgba, fname, compress_level):
+    '''
+    Write an RGBA array as a PNG file. Runs in a worker thread; Pillow
+    releases the GIL while compressing.
+    '''
+    try:
+        from PIL import Image
+    except ImportError:
+        from matplotlib.image import imsave
+        imsave(fname, rgba)
+        return
+    height, width = rgba.shape[:2]
+    image = Image.frombuffer('RGBA', (width, height), rgba, 'raw', 'RGBA',
+                             0, 1)
+    image.save(fname, compress_level=compress_level)
+
+
+class FrameExporter(object):
+    '''
+    Grabs frames from a figure which is updated in place between them,
+    and writes them either as numbered PNG files in savedir, encoded in
+    parallel by workers threads, or with format='npy' as one array of
+    shape (nframes, height, width, 4) in savedir/prefix.npy, memory
+    mapped so frames go straight from the canvas to the file.
+
+    Each frame is copied from the canvas once, into one of buffers
+    reused buffers, so that the next frame can be drawn while earlier
+    ones are encoded. add blocks while all buffers are waiting to be
+    encoded.
+
+    Figures are drawn with the theme's style. If the theme is
+    instrumented, drawing frames is recorded as encode, and the files
+    written are counted.
+
+    Example:
+    fig = theme.figure()
+    line, = theme.plot(x, ys[0])
+    with theme.frame_exporter('frames', fig=fig) as frames:
+        for y in ys:
+            line.set_ydata(y)
+            frames.add()
+    print(frames.stats()['fps'])
+    '''
+
+    def __init__(self, theme, savedir, fig=None, format='png', prefix='frame',
+                 nframes=None, workers=None, buffers=None, compress_level=6):
+        if format not in ('png', 'npy'):
+            raise ValueError("Unknown frame format: {}".format(format))
+        if format == 'npy' and nframes is None:
+            raise ValueError("nframes must be given for npy frames")
+        if not os.path.exists(savedir):
+            os.mkdir(savedir)
+        self.theme = theme
+        self.savedir = savedir
+        self.fig = fig if fig is not None else theme.gcf()
+        self.format = format
+        self.prefix = prefix
+        self.nframes = nframes
+        self.compress_level = compress_level
+        self.frames = 0
+        self.fnames = []
+        self._pool = get_pool('thread', workers) if format == 'png' else None
+        self._nbuffers = buffers or 2 * (workers or os.cpu_count() or 1)
+        # Buffers free for the next frame, created with the first one
+        self._free = queue.Queue()
+        self._created = 0
+        self._jobs = []
+        self._array = None
+        self._start = None
+        self._seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _buffer(self, rgba):
+        '''
+        Return a free buffer for a frame like rgba, waiting for one if
+        all are in use.
+        '''
+        if self._free.empty() and self._created < self._nbuffers:
+            self._created += 1
+            return np.empty_like(rgba)
+        buffer = self._free.get()
+        if buffer.shape != rgba.shape:
+            # The figure changed size
+            buffer = np.empty_like(rgba)
+        return buffer
+
+    def _done(self, buffer):
+        def done(future):
+            self._free.put(buffer)
+        return done
+
+    def add(self):
+        '''
+        Draw the figure as it is now and write it as the next frame.
+        '''
+        if self._start is None:
+            self._start = perf_counter()
+        recorder = self.theme.recorder
+        with self.theme.style(), measured(recorder, 'encode'):
+            rgba = canvas_rgba(self.fig)
+
+        if self.format == 'npy':
+            if self._array is None:
+                from numpy.lib.format import open_memmap
+                fname = os.path.join(self.savedir, self.prefix + '.npy')
+                self._array = open_memmap(fname, 'w+', np.uint8,
+                                          (self.nframes,) + rgba.shape)
+                self.fnames.append(fname)
+            if self.frames >= self.nframes:
+                raise IndexError("Only room for {} frames"
+                                 .format(self.nframes))
+            self._array[self.frames] = rgba
+        else:
+            fname = os.path.join(self.savedir, '{}{:05d}.png'.format(
+                self.prefix, self.frames))
+            buffer = self._buffer(rgba)
+            buffer[...] = rgba
+            job = self._pool.submit(_encode_png, buffer, fname,
+                                    self.compress_level)
+            job.add_done_callback(self._done(buffer))
+            self._jobs.append(job)
+            self.fnames.append(fname)
+        self.frames += 1
+        # Forget finished frames, keep errors for close
+        self._jobs = [j for j in self._jobs
+                      if not j.done() or j.exception() is not None]
+
+    def close(self):
+        '''
+        Wait for all frames to be written. Raises the first error an
+        encoder encountered. Returns stats().
+        '''
+        jobs, self._jobs = self._jobs, []
+        for job in jobs:
+            job.result()
+        if self._array is not None:
+            self._array.flush()
+            self._array = None
+        if self._start is not None:
+            self._seconds = perf_counter() - self._start
+            self._start = None
+            recorder = self.theme.recorder
+            if recorder is not None:
+                for fname in set(self.fnames):
+                    recorder.increment('files', file=fname)
+                    recorder.increment('bytes', os.path.getsize(fname),
+                                       file=fname)
+        return self.stats()
+
+    def stats(self):
+        '''
+        Return {'frames': frames written, 'seconds': from the first
+        frame until close, 'fps': frames per second}.
+        '''
+        seconds = self._seconds
+        if self._start is not None:
+            seconds = perf_counter() - self._start
+        return {'frames': self.frames, 'seconds': seconds,
+                'fps': self.frames / seconds if seconds else 0.0}
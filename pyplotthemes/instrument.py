@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+'''
+Opt-in recording of where the time goes when plotting with a theme.
+See BaseTheme.instrument.
+'''
+
+import sys
+import threading
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+
+
+# The phases time is recorded in
+phases = ('style', 'decorate', 'plot', 'layout', 'encode')
+
+# Recorder of the themed call running in each thread
+_current = threading.local()
+
+
+def current():
+    '''
+    Return the recorder of the themed call running in this thread, if
+    it is instrumented, else None.
+    '''
+    return getattr(_current, 'recorder', None)
+
+
+class _Nothing(object):
+    '''
+    A context manager which does nothing, used when not recording.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_nothing = _Nothing()
+
+
+def measured(recorder, phase):
+    '''
+    Return a context manager recording the time spent in it as phase
+    on recorder, or doing nothing if recorder is None.
+    '''
+    if recorder is None:
+        return _nothing
+    return _Phase(recorder, phase)
+
+
+class _Phase(object):
+    '''
+    Times a phase. Time spent in phases nested in it is only recorded
+    for the inner phases, so the phases add up to the total time.
+    '''
+
+    def __init__(self, recorder, phase, call=None):
+        self.recorder = recorder
+        self.phase = phase
+        self.call = call
+
+    def __enter__(self):
+        recorder = self.recorder
+        self.stack = recorder._stack()
+        self.stack.append(0.0)
+        if self.call is not None:
+            self.previous = current()
+            _current.recorder = recorder
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.start
+        inner = self.stack.pop()
+        if self.stack:
+            self.stack[-1] += elapsed
+        if self.call is not None:
+            _current.recorder = self.previous
+        self.recorder.add(self.phase, elapsed - inner, call=self.call)
+        return False
+
+
+def timed(phase):
+    '''
+    Decorator recording the time spent in a function as phase, when it is
+    called from an instrumented themed call.
+
+    Example:
+    @timed('decorate')
+    def remove_spines(ax, sides=None):
+    '''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = current()
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Phase(recorder, phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Recorder(object):
+    '''
+    Accumulates time per phase, call counts, bytes written and figure
+    and artist counts. Safe to share between threads.
+
+    Each callback is called as callback(phase, seconds, info) for every
+    recorded phase, where info is a dict with details such as the name
+    of the themed call, or the file written and its size. The counters
+    figures, artists and bytes are reported with seconds set to None.
+    '''
+
+    def __init__(self, callbacks=None):
+        self.callbacks = list(callbacks or [])
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget everything recorded so far.
+        '''
+        with self._lock:
+            self.time = defaultdict(float)
+            self.count = defaultdict(int)
+            self.calls = defaultdict(int)
+            self.totals = defaultdict(int)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def call(self, name):
+        '''
+        Return a context manager recording a themed call named name. The
+        time spent in it, but not in any nested phase, is recorded as
+        plot.
+        '''
+        return _Phase(self, 'plot', call=name)
+
+    def add(self, phase, seconds, call=None, **info):
+        '''
+        Record seconds spent in phase, by the themed call named call.
+        '''
+        with self._lock:
+            self.time[phase] += seconds
+            self.count[phase] += 1
+            if call is not None:
+                self.calls[call] += 1
+        if self.callbacks:
+            if call is not None:
+                info['call'] = call
+            for callback in self.callbacks:
+                callback(phase, seconds, info)
+
+    def increment(self, counter, value=1, **info):
+        '''
+        Add value to counter, for instance 'bytes' or 'figures'.
+        '''
+        with self._lock:
+            self.totals[counter] += value
+        for callback in self.callbacks:
+            callback(counter, None, dict(info, value=value))
+
+    def stats(self):
+        '''
+        Return a snapshot of everything recorded, as plain dicts:
+        {'time': {phase: seconds}, 'count': {phase: number},
+         'calls': {name: number}, 'figures': saved figures,
+         'artists': artists in saved figures, 'files': files written,
+         'bytes': bytes written, 'rasterized': artists rasterized in
+         vector files, 'open_figures': open pyplot figures}
+        '''
+        with self._lock:
+            snapshot = {'time': dict((p, self.time[p]) for p in phases),
+                        'count': dict((p, self.count[p]) for p in phases),
+                        'calls': dict(self.calls)}
+            for counter in ('figures', 'artists', 'files', 'bytes',
+                            'rasterized'):
+                snapshot[counter] = self.totals[counter]
+        plt = sys.modules.get('matplotlib.pyplot')
+        snapshot['open_figures'] = len(plt.get_fignums()) if plt else 0
+        return snapshot
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+'''
+Plots updated in place with new data, redrawing only what changed.
+See live_plot and live_errorbar.
+'''
+
+import abc
+import numbers
+import numpy as np
+from .artists import (errorbar_collections, _errorbar_fallback, _numeric,
+                      _to_numbers)
+from .decimate import decimators, pixel_size
+
+
+def _check_capacity(capacity):
+    '''
+    Return capacity as an int, if it is a whole number of at least 1.
+    '''
+    if (isinstance(capacity, bool) or
+            not isinstance(capacity, numbers.Integral)):
+        raise TypeError("The number of points to keep must be an "
+                        "integer, not {!r}".format(capacity))
+    if capacity < 1:
+        raise ValueError("The number of points to keep must be at "
+                         "least 1, not {}".format(capacity))
+    return int(capacity)
+
+
+def live_capacity(live):
+    '''
+    Return the number of points to keep given as the live argument of
+    themed plot and errorbar, or None if live is None or False. Other
+    values must be an integer of at least 1, so True raises TypeError.
+    '''
+    if live is None or live is False:
+        return None
+    return _check_capacity(live)
+
+
+class RingBuffer(object):
+    '''
+    A fixed number of rows, each of width values, where appending drops
+    the oldest rows once full. The rows are stored twice, so the current
+    contents are always available as one contiguous view without copying.
+    '''
+
+    def __init__(self, capacity, width=1):
+        capacity = _check_capacity(capacity)
+        self.capacity = capacity
+        self.width = width
+        self._data = np.full((2 * capacity, width), np.nan)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, rows):
+        '''
+        Append rows, an array of shape (n, width), or (n,) if width is 1.
+        '''
+        cap = self.capacity
+        rows = np.asarray(rows, dtype=float).reshape(-1, self.width)
+        if len(rows) >= cap:
+            self._data[:cap] = self._data[cap:] = rows[-cap:]
+            self._start, self._size = 0, cap
+            return
+        index = (self._start + self._size + np.arange(len(rows))) % cap
+        self._data[index] = self._data[index + cap] = rows
+        dropped = max(0, self._size + len(rows) - cap)
+        self._start = (self._start + dropped) % cap
+        self._size = min(cap, self._size + len(rows))
+
+    def view(self):
+        '''
+        The rows, oldest first, as a view of shape (len, width).
+        '''
+        return self._data[self._start:self._start + self._size]
+
+
+class LivePlot(abc.ABC):
+    '''
+    Base of live plots. Keeps the artists of a plot animated, so that
+    updates redraw only them over a saved background, by blitting.
+    Subclasses implement _refresh and _bounds.
+
+    When new data falls outside the axes limits, they are extended with
+    headroom, a fraction of their span, to make full redraws rare.
+
+    Animated artists are left out of normal draws, including savefig.
+    Call stop() to turn the plot back into a normal one.
+    '''
+
+    def __init__(self, ax, artists, headroom=0.25):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.artists = [a for a in artists if a is not None]
+        self.headroom = headroom
+        self._background = None
+        self._rescale = False
+        for artist in self.artists:
+            artist.set_animated(True)
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Everything but the animated artists has just been drawn
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    @abc.abstractmethod
+    def _refresh(self):
+        '''
+        Update the artists from the buffers.
+        '''
+
+    @abc.abstractmethod
+    def _bounds(self):
+        '''
+        Return the data bounds of the buffers, (xmin, xmax, ymin, ymax).
+        '''
+
+    def _extend_limits(self, x, y):
+        '''
+        Check if the points (x, y) are outside the axes limits, and if
+        so mark them to be rescaled on the next draw.
+        '''
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        with np.errstate(invalid='ignore'):
+            outside = (np.nanmin(x, initial=x0) < x0 or
+                       np.nanmax(x, initial=x1) > x1 or
+                       np.nanmin(y, initial=y0) < y0 or
+                       np.nanmax(y, initial=y1) > y1)
+        if outside:
+            self._rescale = True
+
+    def _apply_limits(self):
+        xmin, xmax, ymin, ymax = self._bounds()
+        for lo, hi, scale, setter in ((xmin, xmax, self.ax.get_xscale(),
+                                       self.ax.set_xlim),
+                                      (ymin, ymax, self.ax.get_yscale(),
+                                       self.ax.set_ylim)):
+            if not (np.isfinite(lo) and np.isfinite(hi)):
+                continue
+            if scale == 'linear':
+                pad = self.headroom * ((hi - lo) or abs(hi) or 1.0)
+                lo, hi = lo - pad, hi + pad
+            setter(lo, hi)
+
+    def draw(self):
+        '''
+        Redraw the live artists with the current data. Falls back to a
+        full redraw if the limits must change, or the canvas can not blit.
+        '''
+        self._refresh()
+        if self._rescale:
+            self._rescale = False
+            self._apply_limits()
+            self.canvas.draw()
+        elif (self._background is None or
+              not getattr(self.canvas, 'supports_blit', False)):
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_artists()
+            self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+
+    def stop(self):
+        '''
+        Stop updating, and make the artists normal ones again.
+        '''
+        self.canvas.mpl_disconnect(self._cid)
+        for artist in self.artists:
+            artist.set_animated(False)
+        self._background = None
+        self.canvas.draw_idle()
+
+
+class LiveLines(LivePlot):
+    '''
+    Live version of the lines from plot. Each line keeps its latest
+    capacity points. If decimate is 'minmax' or 'lttb', the drawn data
+    is reduced to the pixel resolution of the axes on each update. The
+    themes do so with 'minmax' unless plot is given decimate=False.
+    Three lines of 10**5 points then update at about 70 frames/s, and
+    at about 20 frames/s without decimation.
+
+    Points are kept as floats. Dates, categories and other values with
+    units are converted through the units of the axes when appended.
+
+    Example:
+    live = theme.plot(t, y, live=10**5)
+    live.append(new_t, new_y)
+    '''
+
+    def __init__(self, ax, lines, capacity, decimate=None, headroom=0.25):
+        super().__init__(ax, lines, headroom)
+        self.lines = lines
+        self.decimate = decimators[decimate] if decimate else None
+        self.buffers = []
+        for line in lines:
+            buffer = RingBuffer(capacity, 2)
+            buffer.extend(np.column_stack((line.get_xdata(orig=False),
+                                           line.get_ydata(orig=False))))
+            self.buffers.append(buffer)
+        self._refresh()
+
+    def append(self, x, y, draw=True):
+        '''
+        Append points to the lines. x has shape (n,), and y (n,) for one
+        line or (n, lines) for several.
+        '''
+        x = _to_numbers(self.ax.xaxis, x).reshape(-1)
+        y = _to_numbers(self.ax.yaxis, y).reshape(len(x), -1)
+        if y.shape[1] != len(self.buffers):
+            raise ValueError("Expected values for {} lines, got {}"
+                             .format(len(self.buffers), y.shape[1]))
+        for i, buffer in enumerate(self.buffers):
+            buffer.extend(np.column_stack((x, y[:, i])))
+        self._extend_limits(x, y)
+        if draw:
+            self.draw()
+
+    def _refresh(self):
+        npoints = 2 * pixel_size(self.ax)[0]
+        for line, buffer in zip(self.lines, self.buffers):
+            data = buffer.view()
+            x, y = data[:, 0], data[:, 1]
+            if self.decimate is not None and len(x) > npoints:
+                index = self.decimate(x, y, npoints)
+                x, y = x[index], y[index]
+            line.set_data(x, y)
+
+    def _bounds(self):
+        data = np.concatenate([b.view() for b in self.buffers])
+        with np.errstate(invalid='ignore'):
+            return (np.nanmin(data[:, 0], initial=np.inf),
+                    np.nanmax(data[:, 0], initial=-np.inf),
+                    np.nanmin(data[:, 1], initial=np.inf),
+                    np.nanmax(data[:, 1], initial=-np.inf))
+
+
+def _error_columns(v, err):
+    '''
+    Lower and upper error of err around v, as two columns, NaN if None.
+    '''
+    if err is None:
+        return np.full((len(v), 2), np.nan)
+    err = np.asarray(err, dtype=float)
+    if err.ndim == 2:
+        return err.T
+    err = np.broadcast_to(err, v.shape)
+    return np.column_stack((err, err))
+
+
+class LiveErrorbar(LivePlot):
+    '''
+    Live version of errorbar, keeping the latest capacity points with
+    their error bars. x and y are converted through the units of the
+    axes, as with LiveLines, but errors must be numbers.
+
+    Example:
+    live = theme.errorbar(t, y, yerr=e, live=1000)
+    live.append(new_t, new_y, yerr=new_e)
+    '''
+
+    def __init__(self, ax, container, capacity, x, y, yerr, xerr,
+                 headroom=0.25):
+        data_line, caps, bars = container
+        super().__init__(ax, [data_line] + list(caps) + list(bars), headroom)
+        self.container = container
+        self.has_yerr = yerr is not None
+        self.has_xerr = xerr is not None
+        # x, y, lower and upper yerr, lower and upper xerr
+        self.buffer = RingBuffer(capacity, 6)
+        self._extend(x, y, yerr, xerr)
+        self._refresh()
+
+    def _extend(self, x, y, yerr, xerr):
+        x = _to_numbers(self.ax.xaxis, x).reshape(-1)
+        y = _to_numbers(self.ax.yaxis, y).reshape(-1)
+        if (yerr is None) == self.has_yerr or (xerr is None) == self.has_xerr:
+            raise ValueError("The same kinds of errors as when created "
+                             "must be given")
+        ye, xe = _error_columns(y, yerr), _error_columns(x, xerr)
+        self.buffer.extend(np.column_stack((x, y, ye, xe)))
+        # Extent of the new points, with their error bars
+        return (np.concatenate((x, x - xe[:, 0], x + xe[:, 1])),
+                np.concatenate((y, y - ye[:, 0], y + ye[:, 1])))
+
+    def append(self, x, y, yerr=None, xerr=None, draw=True):
+        '''
+        Append points with their errors, given as to errorbar.
+        '''
+        self._extend_limits(*self._extend(x, y, yerr, xerr))
+        if draw:
+            self.draw()
+
+    def _ends(self):
+        data = self.buffer.view()
+        x, y = data[:, 0], data[:, 1]
+        ends = []
+        if self.has_xerr:
+            ends.append((x - data[:, 4], y, x + data[:, 5], y))
+        if self.has_yerr:
+            ends.append((x, y - data[:, 2], x, y + data[:, 3]))
+        return x, y, ends
+
+    def _refresh(self):
+        data_line, caps, bars = self.container
+        x, y, ends = self._ends()
+        if data_line is not None:
+            data_line.set_data(x, y)
+        for cap, (x0, y0, x1, y1) in zip(caps, ends):
+            cap.set_data(np.concatenate((x0, x1)), np.concatenate((y0, y1)))
+        if bars:
+            bars[0].set_segments(np.concatenate(
+                [np.stack((np.column_stack((x0, y0)),
+                           np.column_stack((x1, y1))), axis=1)
+                 for x0, y0, x1, y1 in ends]))
+
+    def _bounds(self):
+        x, y, ends = self._ends()
+        xs = np.concatenate([x] + [e[i] for e in ends for i in (0, 2)])
+        ys = np.concatenate([y] + [e[i] for e in ends for i in (1, 3)])
+        with np.errstate(invalid='ignore'):
+            return (np.nanmin(xs, initial=np.inf),
+                    np.nanmax(xs, initial=-np.inf),
+                    np.nanmin(ys, initial=np.inf),
+                    np.nanmax(ys, initial=-np.inf))
+
+
+def live_plot(ax, args, kwargs, capacity, decimate=None):
+    '''
+    Draw plot(*args, **kwargs) on ax and return its lines as LiveLines
+    keeping capacity points each.
+    '''
+    return LiveLines(ax, ax.plot(*args, **kwargs), capacity, decimate)
+
+
+def live_errorbar(ax, args, kwargs, capacity):
+    '''
+    Draw errorbar(*args, **kwargs) on ax and return it as a LiveErrorbar
+    keeping capacity points. Limits, errorevery and errors along dates
+    or categories are not supported.
+    '''
+    if any(k in kwargs for k in _errorbar_fallback) or len(args) > 5:
+        raise ValueError("Live errorbars do not support "
+                         + ", ".join(_errorbar_fallback))
+    names = ['x', 'y', 'yerr', 'xerr', 'fmt']
+    values = dict(zip(names, args))
+    values.update((k, kwargs[k]) for k in names if k in kwargs)
+    for name, err in (('x', 'xerr'), ('y', 'yerr')):
+        if values.get(err) is not None and not _numeric(values[name]):
+            raise ValueError("Live errorbars only support {} along "
+                             "numbers".format(err))
+    container = errorbar_collections(ax, args, kwargs)
+    return LiveErrorbar(ax, container, capacity, values['x'], values['y'],
+                        values.get('yerr'), values.get('xerr'))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+'''
+Theme parameters compiled once into validated, immutable sets which
+can be written to matplotlib.rcParams without validating them again.
+'''
+
+import matplotlib as mpl
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+def _color_cycler(colors):
+    from cycler import cycler
+    return cycler('color', colors)
+
+
+# Keys renamed in later versions of matplotlib, with how to convert
+# their values to the new key
+_renamed = {'axes.color_cycle': ('axes.prop_cycle', _color_cycler)}
+
+# Keys removed from later versions of matplotlib, without replacement
+_removed = frozenset(['axes.hold', 'text.latex.unicode', 'text.dvipnghack',
+                      'legend.isaxes', 'mathtext.fallback_to_cm'])
+
+
+def _freeze(value):
+    '''
+    Return a hashable stand-in for value.
+    '''
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ParamSet(Mapping):
+    '''
+    An immutable, hashable mapping of validated rcParams, as returned
+    by compile_params.
+    '''
+
+    def __init__(self, params=()):
+        self._params = dict(params)
+        self._hash = hash(frozenset((k, _freeze(v))
+                                    for k, v in self._params.items()))
+
+    def __getitem__(self, key):
+        return self._params[key]
+
+    def __iter__(self):
+        return iter(self._params)
+
+    def __len__(self):
+        return len(self._params)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, ParamSet):
+            return (self is other or
+                    (self._hash == other._hash and
+                     self._params == other._params))
+        return Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        # String hashes differ between processes, so hash again
+        return ParamSet, (self._params,)
+
+    def __repr__(self):
+        return 'ParamSet({!r})'.format(self._params)
+
+
+class TrackedParams(dict):
+    '''
+    A dict of rcParams which counts the changes made to it in version,
+    so what was compiled from it can be reused until it changes.
+    Values are expected to be replaced, not changed in place.
+    '''
+    version = 0
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.version += 1
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.version += 1
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return dict.setdefault(self, key, default)
+
+    def pop(self, *args):
+        self.version += 1
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+
+
+def compile_params(params):
+    '''
+    Validate params with matplotlib and return them as a ParamSet.
+
+    Keys from older versions of matplotlib are adapted to the running
+    version: renamed keys are translated, unless the new key is given
+    too, and removed keys are dropped. Unknown keys raise KeyError,
+    and invalid values ValueError.
+
+    Examples:
+    compile_params({'axes.grid': True})
+    compile_params({'axes.color_cycle': ['b', 'g']})
+    '''
+    valid = mpl.rcParams.validate
+    adapted = {}
+    for k, v in params.items():
+        if k in valid:
+            adapted[k] = v
+        elif k in _renamed:
+            new, convert = _renamed[k]
+            if new not in params:
+                adapted[new] = convert(v)
+        elif k not in _removed:
+            raise KeyError("{!r} is not a valid rc parameter".format(k))
+
+    # Validates, and handles matplotlib's own deprecated aliases
+    compiled = mpl.RcParams()
+    for k, v in adapted.items():
+        compiled[k] = v
+    return ParamSet(dict.items(compiled))
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+'''
+Reuse styled figures of the same layout, instead of creating a new
+figure for each of many similar plots. See FigurePool.
+'''
+
+import matplotlib as mpl
+from collections import OrderedDict
+from contextlib import contextmanager
+from .base import axes_is_polar, pyplot
+from .params import _freeze
+
+
+def clear_data(ax):
+    '''
+    Remove what was plotted on ax, and keep how a theme styled it.
+
+    Lines, collections, patches, images, texts, tables, containers and
+    the legend are removed, titles and labels emptied, and the color
+    cycle, data limits, autoscaling, margins, callbacks and, except on
+    polar axes, scales, locators, formatters, inversion and aspect are
+    as on a new axes. The spines, ticks, grid and colors a theme set are
+    kept, which is what makes this much cheaper than Axes.cla. Clear
+    axes with the theme's rcParams set, as FigurePool does.
+    '''
+    from matplotlib import cbook
+    for artist in (list(ax.lines) + list(ax.collections) +
+                   list(ax.patches) + list(ax.images) + list(ax.texts) +
+                   list(ax.tables) + list(ax.artists)):
+        artist.remove()
+    if ax.legend_ is not None:
+        ax.legend_.remove()
+    del ax.containers[:]
+    for loc in ('left', 'center', 'right'):
+        ax.set_title('', loc=loc)
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+
+    rc = mpl.rcParams
+    ax.set_prop_cycle(None)
+    ax.callbacks = cbook.CallbackRegistry(
+        signals=['xlim_changed', 'ylim_changed', 'zlim_changed'])
+    if not axes_is_polar(ax):
+        # Also sets the default locators and formatters
+        ax.set_xscale('linear')
+        ax.set_yscale('linear')
+        for axis in (ax.xaxis, ax.yaxis):
+            if axis.get_inverted():
+                axis.set_inverted(False)
+        ax.set_aspect('auto')
+        ax.set_autoscale_on(True)
+    else:
+        # The angle always spans the full circle
+        ax.set_autoscaley_on(True)
+    ax.margins(rc['axes.xmargin'], rc['axes.ymargin'])
+    ax.relim()
+    ax.autoscale_view()
+
+
+class FigurePool(object):
+    '''
+    A pool of figures created with a theme, kept between uses. Each
+    layout, meaning the arguments given to subplots, has its own figures.
+
+    Released figures have their data cleared, see clear_data, and are
+    handed out again by acquire with the same layout, still styled. So a
+    pool is meant for figures drawn the same way. At most maxsize
+    idle figures are kept. Beyond that, the least recently released
+    ones are closed. Idle figures stay open in pyplot. Close them all
+    with clear().
+
+    Figures whose set of axes changed while in use, through a colorbar
+    say, are closed instead of kept.
+
+    Example:
+    pool = theme.figure_pool()
+    for name, y in series.items():
+        with pool.subplots(figsize=(4, 3)) as (fig, ax):
+            theme.plot(x, y, ax=ax)
+            savefig(name, fig=fig)
+    '''
+
+    def __init__(self, theme, maxsize=8):
+        self.theme = theme
+        self.maxsize = maxsize
+        # Idle figures, least recently released first, with their layout
+        self._idle = OrderedDict()
+        # Layout, original axes positions, axes, size and dpi of every
+        # pooled figure
+        self._layouts = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._idle)
+
+    def acquire(self, nrows=1, ncols=1, **kwargs):
+        '''
+        Return (fig, axes) as theme.subplots(nrows, ncols, **kwargs),
+        reusing an idle figure of the same layout if there is one. The
+        figure is made current in pyplot.
+        '''
+        plt = pyplot()
+        layout = _freeze((nrows, ncols, sorted(kwargs.items())))
+        for fig, idle_layout in self._idle.items():
+            if idle_layout == layout:
+                del self._idle[fig]
+                if plt.fignum_exists(fig.number):
+                    self.hits += 1
+                    plt.figure(fig.number)
+                    return fig, self._layouts[fig][2]
+                # Closed while idle
+                del self._layouts[fig]
+                break
+
+        self.misses += 1
+        fig, axes = self.theme.subplots(nrows, ncols, **kwargs)
+        positions = [ax.get_position(original=True) for ax in fig.axes]
+        self._layouts[fig] = (layout, positions, axes,
+                              tuple(fig.get_size_inches()), fig.dpi)
+        return fig, axes
+
+    def release(self, fig):
+        '''
+        Clear the data of a figure from acquire and return it to the
+        pool, possibly closing the least recently used idle figure.
+        '''
+        layout, positions, axes, size, dpi = self._layouts[fig]
+        if len(fig.axes) != len(positions):
+            self.discard(fig)
+            return
+
+        # Axes are reset from the theme's rcParams, as when created
+        with self.theme.style():
+            for ax, position in zip(fig.axes, positions):
+                clear_data(ax)
+                ax.set_position(position)
+        for artist in list(fig.texts) + list(fig.legends):
+            artist.remove()
+        if getattr(fig, '_suptitle', None) is not None:
+            fig._suptitle.remove()
+            fig._suptitle = None
+        if tuple(fig.get_size_inches()) != size:
+            fig.set_size_inches(size)
+        if fig.dpi != dpi:
+            fig.set_dpi(dpi)
+
+        self._idle[fig] = layout
+        while len(self._idle) > self.maxsize:
+            old, _ = self._idle.popitem(last=False)
+            self.evictions += 1
+            self.discard(old)
+
+    def discard(self, fig):
+        '''
+        Close a figure from acquire instead of returning it to the pool.
+        '''
+        self._idle.pop(fig, None)
+        self._layouts.pop(fig, None)
+        pyplot().close(fig)
+
+    @contextmanager
+    def subplots(self, nrows=1, ncols=1, **kwargs):
+        '''
+        Context manager acquiring (fig, axes) and releasing the figure
+        when the block exits. If the block raises, the figure is
+        discarded rather than reused.
+        '''
+        fig, axes = self.acquire(nrows, ncols, **kwargs)
+        try:
+            yield fig, axes
+        except BaseException:
+            self.discard(fig)
+            raise
+        self.release(fig)
+
+    def clear(self):
+        '''
+        Close all idle figures.
+        '''
+        while self._idle:
+            fig, _ = self._idle.popitem()
+            self.discard(fig)
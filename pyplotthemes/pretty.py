@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from .base import *
-from matplotlib import pyplot as pl
 from matplotlib import cm
-from functools import wraps
+from .decimate import nanminmax, decimated_pcolormesh, decimated_plot
+from .stats import wants_chunks, chunked_hist, vectorized_boxplot
+from .artists import fill_boxes, errorbar_collections
+from .artists import series_collection, legend_handles, fill_bands
+from .decimate import decimators, wants_density, density_scatter
+from .live import live_capacity, live_plot, live_errorbar
 
 
 _almost_black = '#262626'
@@ -54,21 +58,32 @@ class PrettyTheme(BaseTheme):
 
         super().__init__(**kwargs)
 
-    @wraps(plt.legend)
+    @pyplot_wraps('legend')
+    @themed
     def legend(self, *args, **kwargs):
-        self.setstyle()
         cadd(kwargs, 'framealpha', 0.5)
         ax = get_ax(kwargs)
 
+        if not args and 'handles' not in kwargs and 'labels' not in kwargs:
+            # One entry per series of collection plots
+            args = legend_handles(ax)
+            if not args[0]:
+                args = ()
         lg = ax.legend(*args, **kwargs)
         # Remove border of box
         lg.get_frame().set_linewidth(0.0)
         return lg
 
-    @wraps(plt.plot)
+    @pyplot_wraps('plot')
+    @themed
     def plot(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
+        # Reduce long series to screen resolution: 'minmax' or 'lttb'
+        decimate = kwargs.pop('decimate', None)
+        # Number of points to keep when updated, see LiveLines
+        live = live_capacity(kwargs.pop('live', None))
+        # All series as one LineCollection
+        collection = kwargs.pop('collection', False)
 
         if axes_is_polar(ax):
             ax.grid(True, color='grey', linestyle=':')
@@ -78,12 +93,25 @@ class PrettyTheme(BaseTheme):
 
         set_spines(ax, _almost_black)
 
+        how = 'minmax' if decimate is True else decimate
+        if collection:
+            return series_collection(ax, args, kwargs, self.palette,
+                                     decimators[how] if how else None)
+        if live:
+            # Live plots are decimated unless asked not to, for speed
+            if decimate is None:
+                how = 'minmax'
+            return live_plot(ax, args, kwargs, live, how)
+        if decimate:
+            return decimated_plot(ax, args, kwargs, how)
         return ax.plot(*args, **kwargs)
 
-    @wraps(plt.errorbar)
+    @pyplot_wraps('errorbar')
+    @themed
     def errorbar(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
+        # Number of points to keep when updated, see LiveErrorbar
+        live = live_capacity(kwargs.pop('live', None))
 
         if axes_is_polar(ax):
             ax.grid(True, color='grey', linestyle=':')
@@ -93,11 +121,13 @@ class PrettyTheme(BaseTheme):
 
         set_spines(ax, _almost_black)
 
-        return ax.errorbar(*args, **kwargs)
+        if live:
+            return live_errorbar(ax, args, kwargs, live)
+        return errorbar_collections(ax, args, kwargs)
 
-    @wraps(plt.semilogx)
+    @pyplot_wraps('semilogx')
+    @themed
     def semilogx(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
 
         set_ticks_position(ax, 'bottom', 'left')
@@ -108,9 +138,9 @@ class PrettyTheme(BaseTheme):
 
         return ax.semilogx(*args, **kwargs)
 
-    @wraps(plt.semilogy)
+    @pyplot_wraps('semilogy')
+    @themed
     def semilogy(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
 
         set_ticks_position(ax, 'bottom', 'left')
@@ -121,9 +151,9 @@ class PrettyTheme(BaseTheme):
 
         return ax.semilogy(*args, **kwargs)
 
-    @wraps(plt.loglog)
+    @pyplot_wraps('loglog')
+    @themed
     def loglog(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
 
         set_ticks_position(ax, 'bottom', 'left')
@@ -133,10 +163,10 @@ class PrettyTheme(BaseTheme):
 
         return ax.loglog(*args, **kwargs)
 
-    @wraps(plt.hist)
+    @pyplot_wraps('hist')
+    @themed(**{'axes.grid': False,
+               'axes.axisbelow': False})
     def hist(self, *args, **kwargs):
-        self.setstyle(**{'axes.grid': False,
-                         'axes.axisbelow': False})
         ax = get_ax(kwargs)
         cadd(kwargs, 'edgecolor', 'white')
         remove_ticks(ax)
@@ -144,12 +174,16 @@ class PrettyTheme(BaseTheme):
         set_spines(ax, _almost_black)
         ax.grid(axis='y', color='white', linestyle='-', linewidth=0.5)
 
+        if wants_chunks(args, kwargs):
+            return chunked_hist(ax, args, kwargs)
         return ax.hist(*args, **kwargs)
 
-    @wraps(plt.pcolormesh)
+    @pyplot_wraps('pcolormesh')
+    @themed
     def pcolormesh(self, *args, **kwargs):
-        self.setstyle()
         ax = get_ax(kwargs)
+        # Block reduce to screen resolution: 'mean', 'max' or 'min'
+        decimate = kwargs.pop('decimate', None)
 
         if len(args) == 3:
             # x = args[0]
@@ -157,8 +191,10 @@ class PrettyTheme(BaseTheme):
             data = args[2]
         elif len(args) == 1:
             data = args[0]
-            kwargs.setdefault('vmax', data.max())
-            kwargs.setdefault('vmin', data.min())
+        if 'vmax' not in kwargs or 'vmin' not in kwargs:
+            vmin, vmax = nanminmax(data)
+            kwargs.setdefault('vmax', vmax)
+            kwargs.setdefault('vmin', vmin)
 
         center_value = kwargs.pop('center_value', 0)
         divergent_data = False
@@ -179,15 +215,19 @@ class PrettyTheme(BaseTheme):
             # cmap.set_under('white')
             kwargs['cmap'] = cmap
 
-        res = ax.pcolormesh(*args, **kwargs)
+        if decimate:
+            how = 'mean' if decimate is True else decimate
+            res = decimated_pcolormesh(ax, args, kwargs, how)
+        else:
+            res = ax.pcolormesh(*args, **kwargs)
 
         remove_ticks(ax)
 
         return res
 
-    @wraps(plt.boxplot)
+    @pyplot_wraps('boxplot')
+    @themed
     def boxplot(self, *args, **kwargs):
-        self.setstyle()
 
         # Support color argument, default is normal colors
         colors = kwargs.pop('colors', self.colors)
@@ -197,8 +237,8 @@ class PrettyTheme(BaseTheme):
         # For bug in Matplotlib 1.4, not respecting flierprops
         kwargs['sym'] = 'ko'
 
-        # Do boxplot
-        bp = ax.boxplot(*args, **kwargs)
+        # Do boxplot, accepts precomputed stats and chunked=True
+        bp = vectorized_boxplot(ax, args, kwargs)
 
         # Add grid lines
         ax.grid(True, color='grey', linestyle=':', axis='y')
@@ -214,28 +254,45 @@ class PrettyTheme(BaseTheme):
                  markersize=3)
         plt.setp(bp['medians'], color='black')
 
-        # Color boxes
+        # Color boxes, all in one collection
         if colors:
-            boxpolygons = []
-            for boxi, box in enumerate(bp['boxes']):
-                boxX = []
-                boxY = []
-                # TODO
-                # Does not support notch yet
-                for j in range(5):
-                    boxX.append(box.get_xdata()[j])
-                    boxY.append(box.get_ydata()[j])
-                boxCoords = list(zip(boxX, boxY))
-
-                boxPolygon = plt.Polygon(boxCoords,
-                                         facecolor=colors[boxi % len(colors)])
-
-                ax.add_patch(boxPolygon)
-                boxpolygons.append(boxPolygon)
-            bp['boxpolygons'] = boxpolygons
+            bp['boxpolygons'] = fill_boxes(ax, bp['boxes'], colors)
 
         return bp
 
+    @pyplot_wraps('scatter')
+    @themed
+    def scatter(self, *args, **kwargs):
+        ax = get_ax(kwargs)
+        # Draw as a density image: True, False, or None above a threshold
+        density = kwargs.pop('density', None)
+        threshold = kwargs.pop('density_threshold',
+                               self.density_threshold)
+        # Also draw points in bins with at most this many as markers
+        outliers = kwargs.pop('outliers', False)
+
+        remove_ticks(ax)
+        remove_spines(ax)
+        set_spines(ax, _almost_black)
+
+        if wants_density(args, kwargs, density, threshold):
+            color = self.palette[len(ax.images) % len(self.palette)]
+            return density_scatter(ax, args, kwargs, color, outliers)
+        cadd(kwargs, 'edgecolors', 'none')
+        return ax.scatter(*args, **kwargs)
+
+    @pyplot_wraps('fill_between')
+    @themed
+    def fill_between(self, *args, **kwargs):
+        ax = get_ax(kwargs)
+        # Reduce long bands to their envelope at screen resolution
+        decimate = kwargs.pop('decimate', True)
+        # Light bands without edges, so lines drawn over them stand out
+        cadd(kwargs, 'alpha', 0.3)
+        if 'lw' not in kwargs and 'linewidths' not in kwargs:
+            cadd(kwargs, 'linewidth', 0)
 
-        # TODO
-        # scatter
+        remove_ticks(ax)
+        remove_spines(ax)
+        set_spines(ax, _almost_black)
+        return fill_bands(ax, args, kwargs, self.palette, decimate)
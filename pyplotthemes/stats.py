@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+'''
+Statistics of data which is too large to hold in memory at once,
+computed from an iterable of chunks.
+'''
+
+import numpy as np
+from collections.abc import Iterator
+from .decimate import as_float
+
+
+def finite(chunk):
+    '''
+    Return the finite values of chunk as a flat float array.
+    '''
+    chunk = as_float(chunk).reshape(-1)
+    ok = np.isfinite(chunk)
+    if not ok.all():
+        chunk = chunk[ok]
+    return chunk
+
+
+class StreamingHistogram(object):
+    '''
+    A histogram of constant size which can be fed data chunk by chunk,
+    without knowing the range of the data beforehand.
+
+    Values are counted in resolution equally wide bins. Whenever a value
+    falls outside of them, the bin width is doubled by merging adjacent
+    bins pairwise, until everything fits. The exact minimum, maximum and
+    count are also tracked. Rebinning and quantiles are accurate to
+    within a bin width, which is at most about 4 / resolution of the
+    range of the data.
+
+    Example:
+    h = StreamingHistogram()
+    for chunk in chunks:
+        h.add(chunk)
+    counts, edges = h.histogram(20)
+    median = h.quantiles([0.5])[0]
+    '''
+
+    def __init__(self, resolution=2**14):
+        # Must be even, for the pairwise merging
+        self.resolution = resolution + resolution % 2
+        self.counts = None
+        self.lo = None
+        self.width = None
+        self.min = np.inf
+        self.max = -np.inf
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, chunk):
+        '''
+        Count the finite values of chunk.
+        '''
+        x = finite(chunk)
+        if x.size == 0:
+            return
+        cmin, cmax = x.min(), x.max()
+        r = self.resolution
+
+        if self.counts is None:
+            self.counts = np.zeros(r, dtype=np.int64)
+            self.lo = cmin
+            span = cmax - cmin
+            self.width = (span or abs(cmin) or 1.0) / (r - 1)
+
+        while cmin < self.lo or cmax >= self.lo + r * self.width:
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            zeros = np.zeros(r // 2, dtype=np.int64)
+            if cmin < self.lo:
+                self.lo -= r * self.width
+                self.counts = np.concatenate((zeros, merged))
+            else:
+                self.counts = np.concatenate((merged, zeros))
+            self.width *= 2
+
+        index = ((x - self.lo) / self.width).astype(np.intp)
+        np.clip(index, 0, r - 1, out=index)
+        self.counts += np.bincount(index, minlength=r)
+        self.min = min(self.min, cmin)
+        self.max = max(self.max, cmax)
+        self.count += x.size
+        self.sum += x.sum()
+
+    def histogram(self, bins=10, range=None):
+        '''
+        Return (counts, edges) like numpy.histogram. bins is a number of
+        equally wide bins over range, which defaults to the range of the
+        data, or a sequence of bin edges.
+        '''
+        if np.ndim(bins) == 0:
+            if range is None:
+                range = (self.min, self.max) if self.count else (0, 1)
+            edges = np.linspace(range[0], range[1], int(bins) + 1)
+        else:
+            edges = np.asarray(bins, dtype=float)
+
+        if self.counts is None:
+            return np.zeros(len(edges) - 1, dtype=np.int64), edges
+
+        centers = self.lo + (np.arange(self.resolution) + 0.5) * self.width
+        # Keep the extremes inside, as numpy does with the last edge
+        np.clip(centers, self.min, self.max, out=centers)
+        index = np.searchsorted(edges, centers, side='right') - 1
+        index[centers == edges[-1]] = len(edges) - 2
+        inside = (index >= 0) & (index < len(edges) - 1)
+        counts = np.bincount(index[inside], weights=self.counts[inside],
+                             minlength=len(edges) - 1)
+        return counts.astype(np.int64), edges
+
+    def quantiles(self, q):
+        '''
+        Return the quantiles q, in [0, 1], interpolated within bins.
+        '''
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan)
+        edges = self.lo + np.arange(self.resolution + 1) * self.width
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        values = np.interp(q * self.count, cumulative, edges)
+        return np.clip(values, self.min, self.max)
+
+
+def is_iterator(data):
+    '''
+    Returns true if data is a one-shot iterator such as a generator.
+    '''
+    return isinstance(data, Iterator)
+
+
+def _weighed(chunks, weights):
+    '''
+    Yield (values, weights) of the finite values of each chunk, with
+    weights an iterable of chunks of the same shapes as chunks.
+    '''
+    weights = iter(weights)
+    for chunk in chunks:
+        weight = next(weights, None)
+        chunk = as_float(chunk).reshape(-1)
+        if weight is None or np.size(weight) != chunk.size:
+            raise ValueError("weights must be chunks of the same sizes "
+                             "as the data")
+        weight = as_float(weight).reshape(-1)
+        ok = np.isfinite(chunk)
+        if not ok.all():
+            chunk, weight = chunk[ok], weight[ok]
+        yield chunk, weight
+
+
+def histogram_chunks(chunks, bins=10, range=None, resolution=2**14,
+                     weights=None):
+    '''
+    Return (counts, edges) like numpy.histogram, for data given as an
+    iterable of chunks. Only one chunk at a time is held in memory.
+
+    The result is exact if bins are given as edges, if range is given,
+    or if chunks can be iterated twice (a list of memmap slices say),
+    in which case the range is found in a first pass. For one-shot
+    iterators without a range, a StreamingHistogram is used instead and
+    the result is approximate.
+
+    weights, if given, is an iterable of chunks of the same sizes as
+    the data, each value counting as its weight. The approximate case
+    does not support them.
+    '''
+    if np.ndim(bins) == 0 and range is None and not is_iterator(chunks):
+        lo, hi = np.inf, -np.inf
+        for chunk in chunks:
+            chunk = finite(chunk)
+            if chunk.size:
+                lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+        range = (lo, hi) if lo <= hi else (0, 1)
+
+    if np.ndim(bins) == 0 and range is None:
+        if weights is not None:
+            raise ValueError("Weighted histograms of one-shot chunks "
+                             "need a range or bin edges")
+        sketch = StreamingHistogram(resolution)
+        for chunk in chunks:
+            sketch.add(chunk)
+        return sketch.histogram(bins)
+
+    if np.ndim(bins) == 0:
+        if range[0] == range[1]:
+            # As numpy, widen an empty range
+            range = (range[0] - 0.5, range[1] + 0.5)
+        edges = np.linspace(range[0], range[1], int(bins) + 1)
+    else:
+        edges = np.asarray(bins, dtype=float)
+
+    if weights is not None:
+        counts = np.zeros(len(edges) - 1)
+        for chunk, weight in _weighed(chunks, weights):
+            counts += np.histogram(chunk, edges, weights=weight)[0]
+        return counts, edges
+
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in chunks:
+        counts += np.histogram(finite(chunk), edges)[0]
+    return counts, edges
+
+
+def wants_chunks(args, kwargs):
+    '''
+    Returns true if hist was called with chunked data, either as a one-shot
+    iterator or explicitly with chunked=True. Removes chunked from kwargs.
+    '''
+    chunked = kwargs.pop('chunked', None)
+    if chunked is None:
+        return bool(args) and is_iterator(args[0])
+    return chunked
+
+
+# Parameters of hist after bins, which matplotlib takes by keyword only
+_hist_params = ('range', 'density', 'weights', 'cumulative', 'bottom',
+                'histtype', 'align', 'orientation', 'rwidth', 'log',
+                'color', 'label', 'stacked')
+
+
+def chunked_hist(ax, args, kwargs):
+    '''
+    Draw hist(*args, **kwargs) on ax where the data, args[0], is an
+    iterable of chunks. The counts are accumulated with
+    histogram_chunks and drawn as a pre-binned histogram. weights, if
+    given, are chunks too, of the same sizes as those of the data.
+    '''
+    args = list(args)
+    chunks = args.pop(0)
+    bins = args.pop(0) if args else kwargs.pop('bins', 10)
+    if isinstance(bins, str):
+        raise ValueError("Chunked histograms need a number of bins or "
+                         "bin edges, not '{}'".format(bins))
+    kwargs.update(zip(_hist_params, args))
+    range = kwargs.pop('range', None)
+    weights = kwargs.pop('weights', None)
+    counts, edges = histogram_chunks(chunks, bins, range, weights=weights)
+    return ax.hist(edges[:-1], edges, weights=counts, **kwargs)
+
+
+# Arguments of boxplot which vectorized_boxplot leaves to matplotlib
+_boxplot_fallback = ('bootstrap', 'usermedians', 'conf_intervals',
+                     'autorange')
+
+
+def _box_groups(x):
+    '''
+    Split boxplot data into a list of 1-D float arrays, one per box, the
+    same way matplotlib does. A 2-D array is returned as is, its columns
+    being the boxes. Returns None if the data is not numeric.
+    '''
+    if np.ma.isMaskedArray(x):
+        x = as_float(x)
+    if isinstance(x, np.ndarray) and x.dtype != object:
+        if x.ndim == 2:
+            return x
+        if x.ndim <= 1:
+            return [x.reshape(-1)]
+        return None
+    x = list(x)
+    if all(np.ndim(el) == 0 for el in x):
+        x = [x]
+    groups = []
+    for el in x:
+        el = np.ma.asarray(el).reshape(-1)
+        if el.dtype.kind not in 'iufb':
+            return None
+        groups.append(as_float(el))
+    return groups
+
+
+def _sorted_groups(groups):
+    '''
+    Return the values of each group sorted, all in one flat array, with
+    the start of each group in it and the number of values in each,
+    NaN excluded, which sort last within a group.
+
+    Each group of a list is sorted on its own, so memory stays linear
+    in the number of values however ragged the groups are.
+    '''
+    if isinstance(groups, np.ndarray):
+        # Columns of a 2-D array, transposed in cache-sized blocks
+        data = np.empty(groups.shape[::-1])
+        for i in range(0, groups.shape[0], 4096):
+            data[:, i:i + 4096] = groups[i:i + 4096].T
+        data.sort(axis=1)
+        sizes = np.full(data.shape[0], data.shape[1], dtype=np.intp)
+        flat = data.reshape(-1)
+    else:
+        sorted_groups = [np.sort(g) for g in groups]
+        sizes = np.array([len(g) for g in sorted_groups], dtype=np.intp)
+        flat = (np.concatenate(sorted_groups) if len(sorted_groups)
+                else np.array([]))
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    # NaN in each group, from a running count
+    nans = np.concatenate(([0], np.cumsum(np.isnan(flat))))
+    return flat, starts, sizes - (nans[ends] - nans[starts])
+
+
+def _sorted_quantiles(flat, starts, n, q):
+    '''
+    Return the linearly interpolated quantiles q of each group of sorted
+    values in flat, where group i starts at starts[i] and has n[i]
+    values. The result has shape (len(q), groups).
+    '''
+    last = np.maximum(n - 1, 0)
+    top = max(flat.size - 1, 0)
+    result = []
+    for quantile in q:
+        pos = quantile * last
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, last)
+        frac = pos - lo
+        if flat.size:
+            value = (flat[np.minimum(starts + lo, top)] * (1 - frac) +
+                     flat[np.minimum(starts + hi, top)] * frac)
+        else:
+            value = np.zeros(len(starts))
+        value[n == 0] = np.nan
+        result.append(value)
+    return np.array(result)
+
+
+def boxplot_stats(x, whis=1.5, labels=None, fliers=True):
+    '''
+    Return a list of dicts of statistics, one per box, for use with
+    Axes.bxp. Same as matplotlib.cbook.boxplot_stats without bootstrap,
+    but NaN values are ignored.
+
+    The boxes are sorted into one flat array, after which the quartiles
+    of all of them are picked out together and the whiskers and outliers
+    found by binary search.
+
+    x is a 2-D array, where each column is a box, or a sequence of
+    1-D arrays. whis is the reach of the whiskers as a multiple of the
+    inter-quartile range, or a pair of percentiles. If fliers is False,
+    no outliers are collected.
+    '''
+    groups = _box_groups(x)
+    if groups is None:
+        raise ValueError("boxplot_stats needs numeric data")
+    flat, starts, n = _sorted_groups(groups)
+
+    q1, med, q3 = _sorted_quantiles(flat, starts, n, [0.25, 0.5, 0.75])
+    if np.ndim(whis) == 0:
+        iqr = q3 - q1
+        loval, hival = q1 - whis * iqr, q3 + whis * iqr
+    else:
+        loval, hival = _sorted_quantiles(flat, starts, n,
+                                         np.divide(whis, 100.0))
+    notch = 1.57 * (q3 - q1) / np.sqrt(np.maximum(n, 1))
+
+    stats = []
+    for i in range(len(starts)):
+        row = flat[starts[i]:starts[i] + n[i]]
+        lo = np.searchsorted(row, loval[i], side='left')
+        hi = np.searchsorted(row, hival[i], side='right')
+        whislo = row[lo] if lo < n[i] and row[lo] <= q1[i] else q1[i]
+        whishi = row[hi - 1] if hi > 0 and row[hi - 1] >= q3[i] else q3[i]
+        if fliers:
+            outliers = np.concatenate((row[:lo], row[hi:]))
+        else:
+            outliers = np.array([])
+        stat = {'mean': row.mean() if n[i] else np.nan,
+                'iqr': q3[i] - q1[i],
+                'cilo': med[i] - notch[i], 'cihi': med[i] + notch[i],
+                'whislo': whislo, 'whishi': whishi,
+                'q1': q1[i], 'med': med[i], 'q3': q3[i],
+                'fliers': outliers}
+        if labels is not None:
+            stat['label'] = labels[i]
+        stats.append(stat)
+    return stats
+
+
+def boxplot_stats_chunks(x, whis=1.5, labels=None, resolution=2**14):
+    '''
+    As boxplot_stats, but each box in x is an iterable of chunks. The
+    quartiles come from a StreamingHistogram per box and are accurate to
+    within its bin width. Whiskers end at the whisker limit or the most
+    extreme value, whichever is closer. No outliers are collected.
+    '''
+    stats = []
+    for i, chunks in enumerate(x):
+        sketch = StreamingHistogram(resolution)
+        for chunk in chunks:
+            sketch.add(chunk)
+        q1, med, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+        if np.ndim(whis) == 0:
+            iqr = q3 - q1
+            loval, hival = q1 - whis * iqr, q3 + whis * iqr
+        else:
+            loval, hival = sketch.quantiles(np.divide(whis, 100.0))
+        notch = 1.57 * (q3 - q1) / np.sqrt(max(sketch.count, 1))
+        stat = {'mean': sketch.sum / max(sketch.count, 1),
+                'iqr': q3 - q1, 'cilo': med - notch, 'cihi': med + notch,
+                'whislo': max(loval, sketch.min),
+                'whishi': min(hival, sketch.max),
+                'q1': q1, 'med': med, 'q3': q3, 'fliers': np.array([])}
+        if labels is not None:
+            stat['label'] = labels[i]
+        stats.append(stat)
+    return stats
+
+
+def is_stats(x):
+    '''
+    Returns true if x is a list of precomputed boxplot statistics.
+    '''
+    return (isinstance(x, (list, tuple)) and len(x) > 0 and
+            all(isinstance(el, dict) for el in x))
+
+
+def vectorized_boxplot(ax, args, kwargs):
+    '''
+    Draw boxplot(*args, **kwargs) on ax, with the statistics computed by
+    boxplot_stats and drawn with Axes.bxp.
+
+    The data may also be a list of precomputed statistics, as returned
+    by boxplot_stats, or with chunked=True, a sequence where each box
+    is an iterable of chunks (see boxplot_stats_chunks). Falls back to
+    Axes.boxplot for options which need the raw data, like bootstrap.
+    '''
+    kwargs = dict(kwargs)
+    chunked = kwargs.pop('chunked', False)
+    args = list(args)
+    x = args.pop(0) if args else kwargs.pop('x')
+
+    fallback = args or any(k in kwargs for k in _boxplot_fallback)
+    if not fallback and not chunked and not is_stats(x):
+        fallback = _box_groups(x) is None
+    if fallback:
+        return ax.boxplot(x, *args, **kwargs)
+
+    whis = kwargs.pop('whis', 1.5)
+    labels = kwargs.pop('labels', kwargs.pop('tick_labels', None))
+    # Fliers are styled by the themes
+    kwargs.pop('sym', None)
+    if 'notch' in kwargs:
+        kwargs['shownotches'] = kwargs.pop('notch')
+
+    if is_stats(x):
+        stats = x
+        if labels is not None:
+            stats = [dict(stat, label=label)
+                     for stat, label in zip(stats, labels)]
+    elif chunked:
+        stats = boxplot_stats_chunks(x, whis, labels)
+    else:
+        stats = boxplot_stats(x, whis, labels,
+                              kwargs.get('showfliers', True))
+    return ax.bxp(stats, **kwargs)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+'''
+Faster LaTeX text for themes with latex=True.
+
+Matplotlib keeps what TeX renders in a cache on disk, named by a hash of
+the TeX source, font settings and size, which processes can share. Each
+string missing from it costs a latex run, and a dvipng run per dpi, when
+a figure is first drawn. set_tex_cache moves the cache, to share it
+between machines say, and warm_tex fills it ahead of time, in parallel.
+'''
+
+import numpy as np
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _texmanager():
+    from matplotlib.texmanager import TexManager
+    return TexManager
+
+
+def set_tex_cache(path):
+    '''
+    Make matplotlib keep rendered TeX in the directory path, which is
+    created if needed. Returns the previous directory.
+    '''
+    manager = _texmanager()
+    os.makedirs(path, exist_ok=True)
+    if hasattr(manager, 'texcache'):
+        previous = manager.texcache
+        manager.texcache = path
+    else:
+        from pathlib import Path
+        previous = str(manager._cache_dir)
+        manager._cache_dir = Path(path)
+    return previous
+
+
+# Sizes of text set by rcParams, which tick labels, titles etc. use
+_size_params = ('font.size', 'xtick.labelsize', 'ytick.labelsize',
+                'axes.labelsize', 'axes.titlesize', 'legend.fontsize')
+
+
+def text_sizes():
+    '''
+    Return the font sizes in points used by the current rcParams.
+    '''
+    import matplotlib as mpl
+    from matplotlib.font_manager import FontProperties
+    return sorted(set(FontProperties(size=mpl.rcParams[k]).get_size_in_points()
+                      for k in _size_params))
+
+
+def tick_labels():
+    '''
+    Return the tick labels matplotlib's formatters produce, with the
+    current rcParams, for common ranges on linear and log axes.
+    '''
+    from matplotlib import ticker
+    labels = set()
+    scalar = ticker.ScalarFormatter()
+    scalar.create_dummy_axis()
+    for locs in (np.arange(-10, 11), np.arange(-100, 101, 10),
+                 np.arange(0, 1001, 100), np.arange(0, 10001, 1000),
+                 np.round(np.arange(-1, 1.01, 0.1), 1),
+                 np.round(np.arange(0, 1.01, 0.05), 2),
+                 np.round(np.arange(-5, 5.1, 0.5), 1)):
+        scalar.axis.set_view_interval(locs.min(), locs.max())
+        labels.update(scalar.format_ticks(locs))
+
+    log = ticker.LogFormatterSciNotation()
+    log.create_dummy_axis()
+    log.axis.set_view_interval(1e-10, 1e10)
+    labels.update(log(10.0 ** k) for k in range(-10, 11))
+    labels.discard('')
+    return sorted(labels)
+
+
+def _render(tex, size, dpis):
+    '''
+    Render tex at size to the cache: a DVI file for layout and a PNG per
+    dpi for raster output. Returns True if it was cached already.
+    '''
+    manager = _texmanager()
+    cached = os.path.exists(manager.get_basefile(tex, size) + '.dvi')
+    manager.make_dvi(tex, size)
+    for dpi in dpis:
+        manager.make_png(tex, size, dpi)
+    return cached
+
+
+def warm_tex(strings=(), sizes=None, dpis=None, ticks=True, workers=None):
+    '''
+    Render strings, and common tick labels if ticks is true, with TeX at
+    each font size in sizes and each dpi in dpis, so that later figures
+    find them in the cache. Uses the current rcParams, so call it with
+    a theme's style set, as BaseTheme.warm_tex does.
+
+    latex and dvipng run in parallel in workers threads, by default one
+    per CPU. Returns a dict with the number of renderings 'rendered',
+    those found in the cache 'cached', and a list of (string, error) for
+    those which 'failed'.
+
+    Keyword arguments:
+    sizes - Font sizes in points, defaults to those of the rcParams.
+    dpis - Resolutions of raster output, defaults to figure.dpi,
+           savefig.dpi, and the 300 get_savefig uses.
+    '''
+    import matplotlib as mpl
+    if shutil.which('latex') is None:
+        raise RuntimeError("Failed to find latex, which text.usetex needs")
+
+    if sizes is None:
+        sizes = text_sizes()
+    if dpis is None:
+        dpis = [mpl.rcParams['figure.dpi'], 300]
+        if mpl.rcParams['savefig.dpi'] != 'figure':
+            dpis.append(mpl.rcParams['savefig.dpi'])
+    dpis = sorted(set(dpis))
+    strings = list(strings)
+    if ticks:
+        strings += tick_labels()
+
+    jobs = [(s, size) for s in sorted(set(strings)) for size in sizes]
+    result = {'rendered': 0, 'cached': 0, 'failed': []}
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_render, s, size, dpis) for s, size in jobs]
+        for (s, size), future in zip(jobs, futures):
+            try:
+                cached = future.result()
+            except Exception as e:
+                result['failed'].append((s, e))
+                continue
+            result['cached' if cached else 'rendered'] += 1
+    return result
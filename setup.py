@@ -9,5 +9,5 @@ setup(name = 'pyplotthemes',
       url = 'https://github.com/spacecowboy/pyplotthemes',
       packages = ['pyplotthemes'],
       package_dir = {'pyplotthemes': 'pyplotthemes'},
-      install_requires = ['matplotlib>=1.3'],
+      install_requires = ['matplotlib>=1.3', 'numpy'],
      )
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+import matplotlib
+matplotlib.use('Agg')
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    import matplotlib.pyplot as plt
+    plt.close('all')
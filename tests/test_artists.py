@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import datetime
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from pyplotthemes.artists import (errorbar_collections, fill_bands,
+                                  legend_handles, series_collection)
+from pyplotthemes.decimate import minmax, pixel_size
+
+
+def _pixels(fig):
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+
+def _both(args, kwargs):
+    '''
+    Draw errorbar with matplotlib and with errorbar_collections, and
+    return the two figures and containers.
+    '''
+    figs, containers = [], []
+    for draw in (lambda ax: ax.errorbar(*args, **kwargs),
+                 lambda ax: errorbar_collections(ax, args, dict(kwargs))):
+        fig, ax = plt.subplots(figsize=(3, 2), dpi=72)
+        containers.append(draw(ax))
+        figs.append(fig)
+    return figs, containers
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'yerr': 0.3},
+    {'yerr': 0.3, 'xerr': 0.2, 'capsize': 3},
+    {'yerr': 0.3, 'fmt': 'o-', 'ecolor': 'red', 'elinewidth': 3},
+    {'yerr': 0.3, 'barsabove': True, 'elinewidth': 4},
+    {'yerr': 0.3, 'fmt': 'none', 'alpha': 0.5, 'zorder': 5},
+    {'yerr': 0.3, 'fmt': 'none', 'color': 'green', 'capsize': 2},
+    {'xerr': [np.full(5, 0.1), np.full(5, 0.4)], 'linewidth': 4},
+])
+def test_errorbar_matches_matplotlib(kwargs):
+    x = np.arange(5.0)
+    figs, (expected, mine) = _both((x, x ** 0.5), kwargs)
+    assert (mine[0] is None) == (expected[0] is None)
+    if mine[0] is not None:
+        assert mine[0].get_zorder() == expected[0].get_zorder()
+    bars, expected_bars = mine[2][0], expected[2][0]
+    assert bars.get_zorder() == expected_bars.get_zorder()
+    assert bars.get_alpha() == expected_bars.get_alpha()
+    assert np.allclose(bars.get_colors(), expected_bars.get_colors())
+    assert np.allclose(bars.get_linewidths(), expected_bars.get_linewidths())
+    for cap, expected_cap in zip(mine[1], expected[1][::2]):
+        assert cap.get_zorder() == expected_cap.get_zorder()
+        assert cap.get_alpha() == expected_cap.get_alpha()
+        assert cap.get_markersize() == expected_cap.get_markersize()
+    assert np.array_equal(_pixels(figs[0]), _pixels(figs[1]))
+
+
+def test_errorbar_dates():
+    x = [datetime.datetime(2024, 1, d) for d in range(1, 6)]
+    figs, (expected, mine) = _both((x, np.arange(5.0)), {'yerr': 0.5})
+    assert type(mine[2][0]).__name__ == 'LineCollection'
+    assert np.allclose(figs[0].axes[0].get_xlim(), figs[1].axes[0].get_xlim())
+    assert np.array_equal(_pixels(figs[0]), _pixels(figs[1]))
+
+
+def test_errorbar_categories():
+    figs, (expected, mine) = _both((['a', 'b', 'c'], [1.0, 2.0, 3.0]),
+                                   {'yerr': 0.5})
+    labels = [[t.get_text() for t in f.axes[0].get_xticklabels()]
+              for f in figs]
+    assert labels[0] == labels[1] == ['a', 'b', 'c']
+    assert np.array_equal(_pixels(figs[0]), _pixels(figs[1]))
+
+
+def test_errorbar_falls_back_for_errors_along_dates():
+    x = [datetime.datetime(2024, 1, d) for d in range(1, 4)]
+    fig, ax = plt.subplots()
+    container = errorbar_collections(
+        ax, (x, [1.0, 2.0, 3.0]), {'xerr': datetime.timedelta(hours=6)})
+    assert container.has_xerr
+
+
+_palette = np.array([[1.0, 0, 0, 1], [0, 0, 1.0, 1]])
+
+
+def test_series_collection_one_segment_per_series():
+    fig, ax = plt.subplots()
+    y = np.random.default_rng(0).standard_normal((100, 3))
+    collection = series_collection(ax, (y,), {}, _palette)
+    segments = collection.get_segments()
+    assert len(segments) == 3
+    assert np.array_equal(segments[1][:, 1], y[:, 1])
+    assert np.array_equal(collection.get_colors()[2], _palette[0])
+    assert ax.get_ylim()[0] <= y.min()
+
+
+def test_series_collection_ragged():
+    fig, ax = plt.subplots()
+    xs = [np.arange(5.0), np.arange(8.0)]
+    collection = series_collection(ax, (xs, [x ** 2 for x in xs]),
+                                   {'color': 'k'}, _palette)
+    assert [len(s) for s in collection.get_segments()] == [5, 8]
+
+
+def test_series_collection_decimated_at_saved_resolution():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    y = np.random.default_rng(1).standard_normal((10 ** 5, 2))
+    collection = series_collection(ax, (y,), {}, _palette, minmax, dpi=300)
+    npoints = 2 * pixel_size(ax, 300)[0]
+    for segment, column in zip(collection.get_segments(), y.T):
+        assert len(segment) <= npoints + 4
+        assert segment[:, 1].max() == column.max()
+        assert segment[:, 1].min() == column.min()
+    # By default at the dpi figures are saved at, not the screen's
+    default = series_collection(ax, (y,), {}, _palette, minmax)
+    assert len(default.get_segments()[0]) > 2 * pixel_size(ax)[0]
+
+
+def test_legend_handles_per_series():
+    fig, ax = plt.subplots()
+    y = np.ones((10, 3))
+    series_collection(ax, (y,), {'label': ['a', '_hidden', 'c']}, _palette)
+    fill_bands(ax, (np.arange(10.0), y, 0), {'label': ['band', None, None]},
+               _palette)
+    ax.plot([0, 1], label='line')
+    handles, labels = legend_handles(ax)
+    assert labels == ['line', 'a', 'c', 'band']
+    assert np.allclose(handles[1].get_color(), _palette[0])
+    assert np.allclose(handles[2].get_color(), _palette[0])
+    assert np.allclose(handles[3].get_facecolor(), _palette[0])
+
+
+def test_fill_bands_keeps_outline():
+    fig, ax = plt.subplots(figsize=(2, 2), dpi=50)
+    x = np.linspace(0, 1, 10 ** 5)
+    y = np.sin(40 * x)
+    y[12345] = 5
+    band = fill_bands(ax, (x, y, y - 1), {}, _palette)
+    vertices = band.get_paths()[0].vertices
+    assert len(vertices) < len(x)
+    assert vertices[:, 1].max() == 5
+    assert vertices[:, 0].min() == 0 and vertices[:, 0].max() == 1
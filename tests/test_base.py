@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import pytest
+
+
+def _backend(setup, **environ):
+    '''
+    Return the backend pyplot() ends up with in a fresh interpreter
+    without a display, after running setup.
+    '''
+    env = {k: v for k, v in os.environ.items()
+           if k not in ('DISPLAY', 'WAYLAND_DISPLAY', 'MPLBACKEND')}
+    env.update(environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [p for p in [env.get('PYTHONPATH')] if p])
+    code = ('import matplotlib as mpl\n' + setup +
+            '\nfrom pyplotthemes.base import pyplot\n'
+            'pyplot()\nprint(mpl.get_backend().lower())')
+    out = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return out.decode().split()[-1]
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason="Agg is only forced on Linux")
+def test_pyplot_selects_agg_without_display():
+    assert _backend('') == 'agg'
+
+
+def test_pyplot_respects_matplotlib_use():
+    assert _backend("mpl.use('svg')") == 'svg'
+    pytest.importorskip('tkinter')
+    assert _backend("mpl.use('TkAgg')") == 'tkagg'
+
+
+def test_pyplot_respects_mplbackend():
+    assert _backend('', MPLBACKEND='pdf') == 'pdf'
+
+
+def test_theme_params_not_deprecated():
+    import warnings
+    from matplotlib import MatplotlibDeprecationWarning
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', MatplotlibDeprecationWarning)
+        for theme in (PrettyTheme(), ClassicTheme()):
+            with theme.style():
+                pass
+
+
+def test_colors_through_prop_cycle():
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    theme = PrettyTheme(colors=['red', 'black'])
+    assert theme.colors == ['red', 'black']
+    assert 'axes.color_cycle' not in theme.rcParams
+    theme.colors = ['blue']
+    assert theme.params['axes.prop_cycle'].by_key()['color'] == ['blue']
+    assert theme.palette.shape == (1, 4)
+    # The legacy key still sets the colors
+    theme = ClassicTheme(**{'axes.color_cycle': ['green']})
+    assert theme.colors == ['green']
+
+
+def test_params_cached_until_rcparams_change():
+    from pyplotthemes import PrettyTheme
+    theme = PrettyTheme()
+    params = theme.params
+    assert theme.params is params
+    theme.rcParams['axes.grid'] = not params['axes.grid']
+    assert theme.params is not params
+    assert theme.params['axes.grid'] is not params['axes.grid']
+    theme.rcParams = dict(theme.rcParams, **{'lines.linewidth': 3})
+    assert theme.params['lines.linewidth'] == 3
+
+
+def test_apply_writes_only_differences():
+    import matplotlib as mpl
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    from pyplotthemes.base import _apply
+    pretty, classic = PrettyTheme(), ClassicTheme()
+    with mpl.rc_context():
+        _apply(pretty, {})
+        for k, v in pretty.params.items():
+            assert dict.get(mpl.rcParams, k) is v
+        _, previous = _apply(classic, {})
+        differing = set(k for k, v in classic.params.items()
+                        if pretty.params[k] is not v)
+        assert set(previous) == differing
+        for k, v in classic.params.items():
+            assert dict.get(mpl.rcParams, k) is v
+
+
+def test_apply_same_theme_is_noop():
+    import matplotlib as mpl
+    from pyplotthemes import PrettyTheme
+    from pyplotthemes.base import _active, _apply
+    theme = PrettyTheme()
+    with mpl.rc_context():
+        _apply(theme, {})
+        values = _active['values']
+        _, previous = _apply(theme, {})
+        assert previous == {}
+        # Short-circuited before the values were gathered again
+        assert _active['values'] is values
+
+
+def test_external_rcparams_edit_detected_and_restored():
+    import matplotlib as mpl
+    from pyplotthemes import PrettyTheme
+    from pyplotthemes.base import _apply, rcparams_modified
+    theme = PrettyTheme()
+    grid = theme.params['axes.grid']
+    with mpl.rc_context():
+        _apply(theme, {})
+        assert not rcparams_modified()
+        mpl.rcParams['axes.grid'] = not grid
+        assert rcparams_modified()
+        _, previous = _apply(theme, {})
+        assert previous == {'axes.grid': (not grid)}
+        assert mpl.rcParams['axes.grid'] == grid
+        assert not rcparams_modified()
+
+
+def _differing(a, b):
+    return sorted(k for k, v in a.params.items()
+                  if k in b.params and b.params[k] != v)
+
+
+def test_styled_wrapper_cached_per_instance():
+    from pyplotthemes import PrettyTheme
+    theme, other = PrettyTheme(), PrettyTheme()
+    xlabel = theme.xlabel
+    assert theme.__dict__['xlabel'] is xlabel
+    assert theme.xlabel is xlabel
+    assert other.xlabel is not xlabel
+
+
+def test_cached_wrapper_applies_theme_again():
+    import matplotlib as mpl
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    pretty, classic = PrettyTheme(), ClassicTheme()
+    keys = _differing(pretty, classic)
+    assert keys
+    with mpl.rc_context():
+        gca = pretty.gca
+        gca()
+        classic.setstyle()
+        ax = gca()
+        for k in keys:
+            assert mpl.rcParams[k] == pretty.params[k], k
+        assert ax.get_facecolor() == \
+            mpl.colors.to_rgba(pretty.params['axes.facecolor'])
+
+
+def test_unstyled_functions_bypass_wrapper():
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    pretty, classic = PrettyTheme(), ClassicTheme()
+    keys = _differing(pretty, classic)
+    assert pretty.get_fignums is plt.get_fignums
+    assert pretty.close is plt.close
+    with mpl.rc_context():
+        classic.setstyle()
+        pretty.get_fignums()
+        pretty.close('all')
+        for k in keys:
+            assert mpl.rcParams[k] == classic.params[k], k
+
+
+def test_scoped_style_restores_rcparams():
+    import matplotlib as mpl
+    from pyplotthemes import PrettyTheme
+    theme = PrettyTheme(scoped=True)
+    with mpl.rc_context():
+        mpl.rcParams['axes.grid'] = not theme.params['axes.grid']
+        before = dict(mpl.rcParams)
+        with theme.style(**{'lines.linewidth': 7}):
+            assert mpl.rcParams['lines.linewidth'] == 7
+            assert mpl.rcParams['axes.grid'] == theme.params['axes.grid']
+        assert dict(mpl.rcParams) == before
+
+        with pytest.raises(RuntimeError):
+            with theme.style():
+                raise RuntimeError()
+        assert dict(mpl.rcParams) == before
+
+
+def test_scoped_themes_in_threads():
+    import threading
+    import matplotlib as mpl
+    from matplotlib.figure import Figure
+    from pyplotthemes import ClassicTheme, PrettyTheme
+    themes = [PrettyTheme(scoped=True), ClassicTheme(scoped=True)]
+    keys = _differing(*themes)
+    start = threading.Barrier(len(themes))
+    failures = []
+
+    def draw(theme):
+        start.wait()
+        for _ in range(20):
+            with theme.style():
+                seen = dict((k, mpl.rcParams[k]) for k in keys)
+                fig = Figure()
+                ax = fig.add_subplot()
+                ax.plot([1, 2, 3])
+                fig.canvas.draw()
+            if seen != dict((k, theme.params[k]) for k in keys):
+                failures.append(theme)
+            if ax.get_facecolor() != \
+                    mpl.colors.to_rgba(theme.params['axes.facecolor']):
+                failures.append(theme)
+
+    with mpl.rc_context():
+        threads = [threading.Thread(target=draw, args=(theme,))
+                   for theme in themes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert failures == []
+
+
+def test_star_import_only_exports_the_api():
+    import types
+    import pyplotthemes
+    namespace = {}
+    exec('from pyplotthemes import *', namespace)
+    assert 'PrettyTheme' in namespace and 'get_savefig' in namespace
+    for name in ('os', 'sys', 'mpl', 'plt', 'wraps', 'Future'):
+        assert name not in namespace
+    for name in pyplotthemes.__all__:
+        assert not isinstance(namespace[name], types.ModuleType)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy as np
+
+
+def test_render_many_in_process_pool(tmp_path, monkeypatch):
+    from pyplotthemes import PrettyTheme, batch
+    created = []
+    share = batch._share
+
+    def recorded(value, blocks, min_bytes, used):
+        result = share(value, blocks, min_bytes, used)
+        created.extend(b[0].name for b in blocks.values()
+                       if b[0].name not in created)
+        return result
+    monkeypatch.setattr(batch, '_share', recorded)
+
+    x = np.linspace(0, 1, 1000)
+    specs = [{'name': 'fig{}'.format(i),
+              'calls': [('plot', (x, x * i)), ('xlabel', ('x',))]}
+             for i in range(5)]
+    specs.append({'name': 'broken', 'calls': [('no_such_function', ())]})
+    statuses = PrettyTheme().render_many(specs, str(tmp_path), workers=2,
+                                         min_shared=1024)
+
+    assert [s['name'] for s in statuses] == [s['name'] for s in specs]
+    assert all(s['ok'] for s in statuses[:-1])
+    assert not statuses[-1]['ok']
+    for spec in specs[:-1]:
+        assert os.path.exists(os.path.join(str(tmp_path),
+                                           spec['name'] + '.png'))
+    # The arrays were shared, and are all freed
+    assert created
+    for name in created if os.path.isdir('/dev/shm') else ():
+        assert not os.path.exists(os.path.join('/dev/shm', name))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from pyplotthemes import PrettyTheme, get_savefig
+from pyplotthemes.cache import SaveCache, digest, figure_digest
+
+
+def test_digest_empty_arrays():
+    empty = digest(np.empty((0, 2)))
+    assert empty == digest(np.zeros((0, 2)))
+    assert empty != digest(np.empty((0, 3)))
+    assert empty != digest(np.empty((0, 2), dtype=int))
+    assert digest(np.arange(3)) != digest(np.arange(3)[::-1])
+
+
+def test_empty_artists_figure(tmp_path):
+    fig, ax = plt.subplots()
+    ax.plot([], [])
+    ax.scatter([], [])
+    ax.fill_between([], [], [])
+    ax.pcolormesh(np.empty((0, 0)))
+    first = figure_digest(fig)
+    assert first == figure_digest(fig)
+
+    savefig = get_savefig(str(tmp_path), extensions=['png'], cache=True)
+    savefig('empty', fig=fig)
+    savefig('empty', fig=fig)
+    assert savefig.cache.stats()['hits'] == 1
+
+
+def _figure(y, theme=None):
+    fig, ax = (theme or plt).subplots(figsize=(2, 2))
+    ax.plot(y)
+    ax.set_title('title')
+    return fig
+
+
+def test_figure_digest_same_when_drawn():
+    fig = _figure(np.arange(5) * 1e7)
+    before = figure_digest(fig)
+    fig.canvas.draw()
+    assert figure_digest(fig) == before
+    fig.axes[0].set_ylim(0, 1)
+    assert figure_digest(fig) != before
+
+
+def test_hit_and_miss(tmp_path):
+    theme = PrettyTheme()
+    savefig = get_savefig(str(tmp_path), extensions=['png'], cache=True,
+                          theme=theme)
+    fname = os.path.join(str(tmp_path), 'fig.png')
+    savefig('fig', fig=_figure([1, 2, 3], theme))
+    os.utime(fname, (0, 0))
+    # Unchanged: the file is left alone
+    savefig('fig', fig=_figure([1, 2, 3], theme))
+    assert os.path.getmtime(fname) == 0
+    # Changed data, and a missing file, are saved again
+    savefig('fig', fig=_figure([1, 2, 4], theme))
+    assert os.path.getmtime(fname) > 0
+    os.remove(fname)
+    savefig('fig', fig=_figure([1, 2, 4], theme))
+    assert os.path.exists(fname)
+    assert savefig.cache.stats()['hits'] == 1
+    assert savefig.cache.stats()['misses'] == 3
+
+
+def test_is_cached_inputs(tmp_path):
+    savefig = get_savefig(str(tmp_path), extensions=['png'], cache=True)
+    x = np.arange(10.0)
+    assert not savefig.is_cached('fig', x)
+    savefig('fig', fig=_figure(x))
+    assert savefig.is_cached('fig', x)
+    assert not savefig.is_cached('fig', x + 1)
+
+
+def test_store_merges_with_index_on_disk(tmp_path):
+    savedir = str(tmp_path)
+    first, second = SaveCache(savedir), SaveCache(savedir)
+    first.store([os.path.join(savedir, 'a.png')], 'key-a')
+    second.store([os.path.join(savedir, 'b.png')], 'key-b')
+    with open(second.path) as f:
+        entries = json.load(f)
+    assert sorted(entries) == ['a', 'b']
+    assert not [f for f in os.listdir(savedir) if f.endswith('.tmp')]
+
+    # Pruning keeps the stale entries others stored again since
+    third = SaveCache(savedir)
+    first.store([os.path.join(savedir, 'a.png')], 'key-a2')
+    assert third.prune() == ['b']
+    with open(third.path) as f:
+        assert sorted(json.load(f)) == ['a']
+
+
+def test_prune_removes_files(tmp_path):
+    savedir = str(tmp_path)
+    savefig = get_savefig(savedir, extensions=['png'], cache=True)
+    savefig('old', fig=_figure([1, 2]))
+    savefig = get_savefig(savedir, extensions=['png'], cache=True)
+    savefig('new', fig=_figure([1, 2]))
+    assert savefig.cache.prune(remove_files=True) == ['old']
+    assert sorted(os.listdir(savedir)) == ['.pyplotthemes-cache.json',
+                                           'new.png']
+
+
+def test_asave_skips_cached(tmp_path):
+    theme = PrettyTheme()
+    savefig = get_savefig(str(tmp_path), extensions=['png'], theme=theme,
+                          background=1, cache=True)
+
+    async def save():
+        for _ in range(2):
+            future = await savefig.asave('fig',
+                                         fig=_figure([3, 2, 1], theme))
+            await future
+        await savefig.aflush()
+
+    asyncio.run(save())
+    assert savefig.cache.stats()['hits'] == 1
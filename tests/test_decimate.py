@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from pyplotthemes.decimate import (bin_points, block_reduce,
+                                   decimated_pcolormesh, decimated_plot,
+                                   density_scatter,
+                                   lttb, minmax, output_dpi, pixel_size,
+                                   sparse_points)
+
+
+def test_block_reduce_mean_ignores_nan():
+    data = np.arange(16, dtype=float).reshape(4, 4)
+    data[0, 0] = np.nan
+    reduced = block_reduce(data, (2, 2))
+    assert reduced.shape == (2, 2)
+    assert reduced[0, 0] == np.mean([1, 4, 5])
+    assert reduced[1, 1] == np.mean([10, 11, 14, 15])
+
+
+def test_block_reduce_pads_edges():
+    reduced = block_reduce(np.ones((5, 3)), (2, 2), how='max')
+    assert reduced.shape == (3, 2)
+    assert np.all(reduced == 1)
+
+
+def test_pcolormesh_reduced_to_saved_resolution():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    data = np.random.default_rng(0).random((3000, 3000))
+    image = decimated_pcolormesh(ax, (data,), {}, dpi=300)
+    ny, nx = image.get_array().shape
+    width, height = pixel_size(ax, 300)
+    # At least one cell per pixel at 300 dpi, not at the figure's 100 dpi
+    assert width <= nx < 2 * width
+    assert height <= ny < 2 * height
+    assert nx > pixel_size(ax)[0]
+
+
+def test_pcolormesh_default_dpi_is_save_dpi():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    data = np.zeros((3000, 3000))
+    image = decimated_pcolormesh(ax, (data,), {})
+    assert image.get_array().shape[1] >= pixel_size(ax, 300)[0]
+
+
+def test_pcolormesh_irregular_grid_stays_mesh():
+    fig, ax = plt.subplots(figsize=(2, 2), dpi=50)
+    x = np.cumsum(np.random.default_rng(1).random(2001))
+    y = np.arange(2001.0)
+    data = np.ones((2000, 2000))
+    mesh = decimated_pcolormesh(ax, (x, y, data), {}, dpi=50)
+    assert type(mesh).__name__ == 'QuadMesh'
+    assert mesh.get_array().size < data.size
+
+
+def _series(n=100000, seed=2):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, n)
+    y = np.cumsum(rng.standard_normal(n))
+    return x, y
+
+
+@pytest.mark.parametrize('decimate', [minmax, lttb])
+def test_decimator_keeps_ends_and_extrema(decimate):
+    x, y = _series()
+    index = decimate(x, y, 1000)
+    assert len(index) <= 1002
+    assert index[0] == 0 and index[-1] == len(y) - 1
+    assert np.all(np.diff(index) > 0)
+    if decimate is minmax:
+        assert np.argmax(y) in index and np.argmin(y) in index
+
+
+@pytest.mark.parametrize('decimate', [minmax, lttb])
+def test_decimator_short_series_unchanged(decimate):
+    x, y = _series(500)
+    assert np.array_equal(decimate(x, y, 500), np.arange(500))
+    assert np.array_equal(decimate(x, y, 1000), np.arange(500))
+
+
+def test_minmax_ignores_nan():
+    x, y = _series(10000)
+    y[5000:5100] = np.nan
+    index = minmax(x, y, 100)
+    assert np.nanargmax(y) in index and np.nanargmin(y) in index
+
+
+def test_lttb_keeps_spike():
+    x = np.arange(100000.0)
+    y = np.zeros_like(x)
+    y[54321] = 10.0
+    assert 54321 in lttb(x, y, 200)
+
+
+def test_decimated_plot_resolution_follows_save_dpi():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    x, y = _series()
+    line, = decimated_plot(ax, (x, y), {})
+    width = pixel_size(ax, output_dpi(fig))[0]
+    assert width > pixel_size(ax)[0]
+    assert width < len(line.get_xdata()) <= 2 * width + 2
+
+
+def test_decimated_plot_redecimates_on_zoom():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    x, y = _series()
+    line, = decimated_plot(ax, (x, y), {})
+    ax.set_xlim(0.25, 0.5)
+    xs = line.get_xdata()
+    assert xs.min() >= x[np.searchsorted(x, 0.25) - 1]
+    assert xs.max() <= x[np.searchsorted(x, 0.5) + 1]
+    inside = y[(x >= 0.25) & (x <= 0.5)]
+    assert inside.max() in line.get_ydata()
+
+
+def test_bin_points_counts_everything():
+    rng = np.random.default_rng(3)
+    x, y = rng.standard_normal(10 ** 4), rng.standard_normal(10 ** 4)
+    x[5] = np.nan
+    counts, sums, extent = bin_points(x, y, (20, 30), weights=np.ones_like(x),
+                                      chunksize=999)
+    assert counts.shape == (20, 30)
+    assert counts.sum() == 10 ** 4 - 1
+    assert np.array_equal(sums, counts)
+    assert extent == (np.nanmin(x), np.nanmax(x), y.min(), y.max())
+
+
+@pytest.mark.parametrize('x, y', [
+    (np.full(100, 2.0), np.linspace(0, 1, 100)),
+    (np.linspace(0, 1, 100), np.full(100, -3.0)),
+    (np.full(100, 1.0), np.full(100, 1.0)),
+])
+def test_sparse_points_same_bins_on_degenerate_range(x, y):
+    counts, _, extent = bin_points(x, y, (10, 10))
+    assert counts.sum() == 100
+    ox, oy = sparse_points(x, y, counts, extent, most=counts.max() - 1)
+    # Only the points of bins below the fullest are sparse
+    assert len(ox) == 100 - (counts == counts.max()).sum() * counts.max()
+    ox, oy = sparse_points(x, y, counts, extent, most=counts.max())
+    assert len(ox) == 100
+
+
+def test_density_scatter_bins_at_saved_resolution():
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    x, y = np.random.default_rng(1).random((2, 10000))
+    image = density_scatter(ax, (x, y), {}, 'C0', dpi=200)
+    assert image.get_array().shape[::-1] == pixel_size(ax, 200)
+    image = density_scatter(ax, (x, y), {}, 'C0')
+    assert image.get_array().shape[::-1] == \
+        pixel_size(ax, output_dpi(fig))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+from pyplotthemes import PrettyTheme, get_savefig
+
+
+def test_asave_returns_awaitable(tmp_path):
+    theme = PrettyTheme()
+    savefig = get_savefig(str(tmp_path), theme=theme, background=1)
+
+    async def save():
+        fig = theme.figure()
+        theme.plot([1, 2, 3])
+        future = await savefig.asave('fig', fig=fig)
+        await future
+        await savefig.aflush()
+
+    asyncio.run(save())
+    assert os.path.exists(os.path.join(str(tmp_path), 'fig.png'))
+
+
+def _count_tight_bbox(monkeypatch):
+    from pyplotthemes import export
+    calls = []
+    tight_bbox = export.tight_bbox
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return tight_bbox(*args, **kwargs)
+    monkeypatch.setattr(export, 'tight_bbox', counted)
+    return calls
+
+
+def test_tight_bbox_only_shared_between_files(tmp_path, monkeypatch):
+    from pyplotthemes.export import save_formats
+    from pyplotthemes.instrument import Recorder
+    import matplotlib.pyplot as plt
+    calls = _count_tight_bbox(monkeypatch)
+    fig, ax = plt.subplots()
+    ax.plot([1, 2, 3])
+    kwargs = {'bbox_inches': 'tight'}
+    single = [str(tmp_path / 'single.png')]
+    save_formats(fig, single, [], kwargs, recorder=Recorder())
+    assert calls == []
+    both = [str(tmp_path / 'both.png'), str(tmp_path / 'both.pdf')]
+    save_formats(fig, both, [], kwargs, recorder=Recorder())
+    assert len(calls) == 1
+    assert all(os.path.exists(f) for f in single + both)
+
+
+def _layout_figure(layout):
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(2, 2, layout=layout, figsize=(6, 3))
+    for ax in axes.flat:
+        ax.plot([1, 2, 3])
+        ax.set_title('title')
+        ax.set_ylabel('label')
+    fig.suptitle('suptitle')
+    return fig
+
+
+def _png_size(fname):
+    from PIL import Image
+    with Image.open(fname) as image:
+        return image.size
+
+
+def test_shared_tight_bbox_matches_savefig(tmp_path):
+    from pyplotthemes.export import save_formats
+    for layout in ('constrained', 'tight', None):
+        reference = str(tmp_path / 'reference.png')
+        _layout_figure(layout).savefig(reference, bbox_inches='tight',
+                                       dpi=150)
+        fnames = [str(tmp_path / 'fig.png'), str(tmp_path / 'fig.pdf')]
+        save_formats(_layout_figure(layout), fnames, [],
+                     {'bbox_inches': 'tight', 'dpi': 150})
+        assert _png_size(fnames[0]) == _png_size(reference), layout
+
+
+def test_save_formats_parallel(tmp_path):
+    from pyplotthemes.export import save_formats
+    reference = str(tmp_path / 'reference.png')
+    _layout_figure(None).savefig(reference, bbox_inches='tight', dpi=100)
+    for parallel in ('thread', 'process'):
+        fnames = [str(tmp_path / '{0}.pdf'.format(parallel)),
+                  str(tmp_path / '{0}.png'.format(parallel)),
+                  str(tmp_path / '{0}.svg'.format(parallel))]
+        save_formats(_layout_figure(None), fnames, [],
+                     {'bbox_inches': 'tight', 'dpi': 100},
+                     parallel=parallel, workers=2)
+        for fname in fnames:
+            assert os.path.getsize(fname) > 0
+        assert _png_size(fnames[1]) == _png_size(reference), parallel
+
+
+def _heavy_figure():
+    import numpy as np
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    heavy, = ax.plot(np.arange(1000))
+    light, = ax.plot(np.arange(10))
+    marked, = ax.plot(np.arange(1000))
+    marked.set_rasterized(True)
+    return fig, heavy, light, marked
+
+
+def test_rasterized_heavy_threshold():
+    from pyplotthemes.export import heavy_artists, rasterized_heavy
+    fig, heavy, light, marked = _heavy_figure()
+    assert heavy_artists(fig, 999) == [heavy]
+    assert heavy_artists(fig, 1000) == []
+    with rasterized_heavy(fig, 100) as rasterized:
+        assert rasterized == [heavy]
+        assert heavy.get_rasterized() and not light.get_rasterized()
+    assert not heavy.get_rasterized() and not light.get_rasterized()
+    assert marked.get_rasterized()
+    with rasterized_heavy(fig, None) as rasterized:
+        assert rasterized == []
+
+
+def test_savefig_rasterize_restores_flags(tmp_path):
+    from pyplotthemes import PrettyTheme
+    theme = PrettyTheme()
+    assert theme.rasterize_threshold is None
+    fig, heavy, light, marked = _heavy_figure()
+    savefig = get_savefig(str(tmp_path), extensions=['pdf'], theme=theme)
+    assert savefig('default', fig=fig) == []
+
+    savefig = get_savefig(str(tmp_path), extensions=['png', 'pdf'],
+                          theme=theme, rasterize=100)
+    assert savefig('heavy', fig=fig) == [heavy]
+    assert not heavy.get_rasterized() and not light.get_rasterized()
+    assert marked.get_rasterized()
+    # Only vector files rasterize
+    savefig = get_savefig(str(tmp_path), extensions=['png'], theme=theme,
+                          rasterize=100)
+    assert savefig('raster', fig=fig) == []
+
+
+def test_background_save_isolated_from_plotting(tmp_path, monkeypatch):
+    import threading
+    import matplotlib as mpl
+    from pyplotthemes import ClassicTheme, base
+    pretty, classic = PrettyTheme(), ClassicTheme()
+    keys = [k for k, v in pretty.params.items()
+            if k in classic.params and classic.params[k] != v and
+            k != 'lines.markersize']
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def save_formats(fig, *args, **kwargs):
+        seen.append(dict((k, mpl.rcParams[k]) for k in keys))
+        started.set()
+        release.wait(10)
+        seen.append(dict((k, mpl.rcParams[k]) for k in keys))
+        return []
+    monkeypatch.setattr(base, 'save_formats', save_formats)
+
+    with mpl.rc_context():
+        classic.setstyle()
+        savefig = get_savefig(str(tmp_path), theme=pretty, background=1)
+        expected = dict((k, pretty.params[k]) for k in keys)
+
+        # Plain rcParams edits meanwhile are kept
+        future = savefig('edited', fig=classic.figure())
+        assert started.wait(10)
+        mpl.rcParams['lines.markersize'] = 42
+        release.set()
+        future.result()
+        assert seen == [expected, expected]
+        assert mpl.rcParams['lines.markersize'] == 42
+        for k in keys:
+            assert mpl.rcParams[k] == classic.params[k], k
+
+        # Themed calls wait for the save
+        started.clear()
+        release.clear()
+        del seen[:]
+        future = savefig('styled', fig=classic.figure())
+        assert started.wait(10)
+        styling = threading.Thread(target=classic.setstyle)
+        styling.start()
+        styling.join(0.2)
+        assert styling.is_alive()
+        release.set()
+        future.result()
+        styling.join()
+        assert seen == [expected, expected]
+        for k in keys:
+            assert mpl.rcParams[k] == classic.params[k], k
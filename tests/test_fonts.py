@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import warnings
+import pytest
+from pyplotthemes import PrettyTheme
+from pyplotthemes.fonts import resolve_stacks
+
+
+def test_stacks_narrowed_to_installed():
+    params, found, missing = resolve_stacks({
+        'font.family': ['serif'],
+        'font.serif': ['No Such Serif', 'DejaVu Serif', 'serif']})
+    assert params['font.serif'] == ['DejaVu Serif']
+    assert missing['font.serif'] == ['No Such Serif']
+    assert found['font.serif'][0][1] is not None
+
+
+def test_warns_when_used_stack_missing():
+    with pytest.warns(UserWarning, match='font.sans-serif'):
+        params, _, _ = resolve_stacks({
+            'font.family': 'sans-serif',
+            'font.sans-serif': ['No Such Sans', 'sans-serif']})
+    assert params['font.sans-serif'] == ['DejaVu Sans']
+
+
+def test_no_warning_for_unused_stack():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        params, _, missing = resolve_stacks({
+            'font.family': ['serif'],
+            'font.serif': ['DejaVu Serif'],
+            'font.cursive': ['No Such Cursive']})
+    assert missing['font.cursive'] == ['No Such Cursive']
+
+
+def test_family_fonts_resolved():
+    params, found, missing = resolve_stacks({
+        'font.family': ['No Such Font', 'DejaVu Serif', 'monospace']})
+    assert params['font.family'] == ['DejaVu Serif', 'monospace']
+    assert missing['font.family'] == ['No Such Font']
+    with pytest.warns(UserWarning, match='font.family'):
+        params, _, _ = resolve_stacks({'font.family': ['No Such Font']})
+    assert params['font.family'] == ['sans-serif']
+
+
+def test_usetex_left_alone():
+    params = {'text.usetex': True, 'font.serif': ['No Such Serif']}
+    assert resolve_stacks(params)[0] == params
+
+
+def test_theme_resolves_fonts():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        theme = PrettyTheme(resolve_fonts=True)
+    family = theme.params['font.family']
+    stack = theme.params['font.' + family[0]]
+    assert all(theme.fonts['font.' + family[0]])
+    assert stack == [name for name, _ in theme.fonts['font.' + family[0]]]
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy as np
+import pytest
+from pyplotthemes import PrettyTheme
+from pyplotthemes.frames import FrameExporter, canvas_rgba
+
+
+def _animation(theme):
+    fig = theme.figure(figsize=(2, 1.5), dpi=50)
+    line, = theme.plot(np.zeros(10))
+    theme.ylim(0, 10)
+    return fig, line
+
+
+def test_canvas_rgba_is_read_only_view():
+    theme = PrettyTheme()
+    fig, _ = _animation(theme)
+    rgba = canvas_rgba(fig)
+    assert rgba.shape == (75, 100, 4) and rgba.dtype == np.uint8
+    with pytest.raises(ValueError):
+        rgba[0, 0, 0] = 0
+
+
+def test_png_frames(tmp_path):
+    pytest.importorskip('PIL')
+    from PIL import Image
+    theme = PrettyTheme()
+    fig, line = _animation(theme)
+    expected = []
+    with theme.frame_exporter(str(tmp_path), fig=fig, workers=2,
+                              buffers=2) as frames:
+        for i in range(6):
+            line.set_ydata(np.full(10, i))
+            frames.add()
+            expected.append(canvas_rgba(fig).copy())
+    assert frames.fnames == [os.path.join(str(tmp_path),
+                                          'frame{:05d}.png'.format(i))
+                             for i in range(6)]
+    for fname, rgba in zip(frames.fnames, expected):
+        assert np.array_equal(np.asarray(Image.open(fname)), rgba)
+    stats = frames.stats()
+    assert stats['frames'] == 6 and stats['fps'] > 0
+
+
+def test_npy_frames(tmp_path):
+    theme = PrettyTheme()
+    fig, line = _animation(theme)
+    exporter = FrameExporter(theme, str(tmp_path), fig=fig, format='npy',
+                             nframes=3)
+    expected = []
+    for i in range(3):
+        line.set_ydata(np.full(10, 3 * i))
+        exporter.add()
+        expected.append(canvas_rgba(fig).copy())
+    with pytest.raises(IndexError):
+        exporter.add()
+    assert exporter.close()['frames'] == 3
+    frames = np.load(os.path.join(str(tmp_path), 'frame.npy'))
+    assert frames.shape == (3, 75, 100, 4)
+    assert np.array_equal(frames, np.stack(expected))
+    assert not np.array_equal(frames[0], frames[1])
+
+
+def test_invalid_arguments(tmp_path):
+    theme = PrettyTheme()
+    with pytest.raises(ValueError):
+        FrameExporter(theme, str(tmp_path), format='gif')
+    with pytest.raises(ValueError):
+        FrameExporter(theme, str(tmp_path), format='npy')
+
+
+def test_frames_recorded(tmp_path):
+    theme = PrettyTheme()
+    recorder = theme.instrument()
+    fig, line = _animation(theme)
+    with theme.frame_exporter(str(tmp_path), fig=fig) as frames:
+        for _ in range(2):
+            frames.add()
+    stats = recorder.stats()
+    assert stats['files'] == 2
+    assert stats['bytes'] > 0
+    assert stats['count']['encode'] == 2
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import datetime
+import numpy as np
+import pytest
+from matplotlib import dates
+from pyplotthemes import ClassicTheme, PrettyTheme
+from pyplotthemes.live import LivePlot, RingBuffer
+
+
+def test_live_plot_is_abstract():
+    with pytest.raises(TypeError):
+        LivePlot(None, [])
+
+
+def test_ring_buffer_keeps_latest():
+    buffer = RingBuffer(4)
+    buffer.extend(np.arange(3))
+    buffer.extend(np.arange(3, 6))
+    assert buffer.view()[:, 0].tolist() == [2, 3, 4, 5]
+    buffer.extend(np.arange(10))
+    assert buffer.view()[:, 0].tolist() == [6, 7, 8, 9]
+
+
+def test_live_lines_dates():
+    theme = PrettyTheme()
+    theme.figure()
+    start = datetime.datetime(2024, 1, 1)
+    t = [start + datetime.timedelta(minutes=i) for i in range(10)]
+    live = theme.plot(t, np.arange(10.0), live=100)
+    later = [start + datetime.timedelta(hours=1)]
+    live.append(later, [5.0])
+    x = live.lines[0].get_xdata()
+    assert len(x) == 11
+    assert x[-1] == dates.date2num(later[0])
+
+
+def test_live_errorbar_dates():
+    theme = PrettyTheme()
+    theme.figure()
+    t = np.array(['2024-01-01', '2024-01-02'], dtype='datetime64[D]')
+    live = theme.errorbar(t, [1.0, 2.0], yerr=0.1, live=10)
+    live.append(np.array(['2024-01-03'], dtype='datetime64[D]'), [3.0],
+                yerr=[0.2])
+    assert len(live.buffer) == 3
+    with pytest.raises(ValueError):
+        theme.errorbar(t, [1.0, 2.0], xerr=0.1, live=10)
+
+
+@pytest.mark.parametrize('capacity, error', [(0, ValueError),
+                                             (-5, ValueError),
+                                             (True, TypeError),
+                                             (2.5, TypeError)])
+def test_ring_buffer_capacity_checked(capacity, error):
+    with pytest.raises(error):
+        RingBuffer(capacity)
+
+
+@pytest.mark.parametrize('Theme', [PrettyTheme, ClassicTheme])
+def test_live_argument_checked(Theme):
+    theme = Theme()
+    theme.figure()
+    for live in (True, 0, -1, 1.5):
+        with pytest.raises((TypeError, ValueError)):
+            theme.plot([1, 2, 3], live=live)
+        with pytest.raises((TypeError, ValueError)):
+            theme.errorbar([1, 2, 3], [1, 2, 3], yerr=0.1, live=live)
+    # Off, as when not given
+    assert isinstance(theme.plot([1, 2, 3], live=False), list)
+    lines = theme.plot([1, 2, 3], live=np.int64(2))
+    assert len(lines.buffers[0]) == 2
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from pyplotthemes import ClassicTheme, PrettyTheme
+
+
+def _pixels(fig):
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+
+def _draw(theme, kind, ax):
+    x = np.linspace(0, 10, 50)
+    if kind == 'hist':
+        theme.hist(np.sin(x), bins=10, ax=ax)
+        theme.title('hist')
+        ax.set_xscale('log')
+        ax.set_xlim(0.1, 5)
+        ax.legend(['data'])
+    elif kind == 'plot':
+        theme.plot(x, np.cos(x), ax=ax)
+    elif kind == 'boxplot':
+        theme.boxplot([x, x ** 2], ax=ax)
+    elif kind == 'polar':
+        theme.plot(x, x ** 2, ax=ax)
+        ax.set_title('polar')
+
+
+@pytest.mark.parametrize('Theme', [PrettyTheme, ClassicTheme])
+@pytest.mark.parametrize('first, second', [('hist', 'hist'),
+                                           ('boxplot', 'boxplot'),
+                                           ('plot', 'plot'),
+                                           ('plot', 'hist')])
+def test_reused_figure_matches_fresh(Theme, first, second):
+    theme = Theme()
+    pool = theme.figure_pool()
+    with pool.subplots(figsize=(3, 2), dpi=72) as (fig, ax):
+        _draw(theme, first, ax)
+    with pool.subplots(figsize=(3, 2), dpi=72) as (fig, ax):
+        _draw(theme, second, ax)
+        reused = _pixels(fig)
+    assert pool.hits == 1
+
+    fresh_fig, fresh_ax = theme.subplots(figsize=(3, 2), dpi=72)
+    _draw(theme, second, fresh_ax)
+    assert np.array_equal(reused, _pixels(fresh_fig))
+
+
+@pytest.mark.parametrize('Theme', [PrettyTheme, ClassicTheme])
+def test_data_cleared_styling_kept(Theme):
+    theme = Theme()
+    pool = theme.figure_pool()
+    with pool.subplots(figsize=(3, 2), dpi=72) as (fig, ax):
+        _draw(theme, 'hist', ax)
+        ax.set_xlabel('x')
+        ax.invert_yaxis()
+        ax.set_aspect('equal')
+        spines = dict((k, s.get_visible()) for k, s in ax.spines.items())
+    with pool.subplots(figsize=(3, 2), dpi=72) as (fig, ax):
+        assert not (ax.lines or ax.collections or ax.patches or
+                    ax.images or ax.texts or ax.containers)
+        assert ax.legend_ is None
+        assert ax.get_title() == ax.get_xlabel() == ''
+        assert ax.get_xscale() == 'linear'
+        assert not ax.yaxis.get_inverted()
+        assert ax.get_aspect() == 'auto'
+        assert ax.get_autoscalex_on() and ax.get_autoscaley_on()
+        assert spines == dict((k, s.get_visible())
+                              for k, s in ax.spines.items())
+        _draw(theme, 'plot', ax)
+        fresh_fig, fresh_ax = theme.subplots(figsize=(3, 2), dpi=72)
+        _draw(theme, 'plot', fresh_ax)
+        assert ax.get_xlim() == fresh_ax.get_xlim()
+        assert ax.get_ylim() == fresh_ax.get_ylim()
+        assert ax.get_lines()[0].get_color() == \
+            fresh_ax.get_lines()[0].get_color()
+
+
+def test_callbacks_cleared():
+    theme = PrettyTheme()
+    pool = theme.figure_pool()
+    calls = []
+    with pool.subplots() as (fig, ax):
+        ax.callbacks.connect('xlim_changed', calls.append)
+    with pool.subplots() as (fig, ax):
+        ax.set_xlim(0, 2)
+    assert calls == []
+
+
+def test_changed_axes_discarded():
+    theme = PrettyTheme()
+    pool = theme.figure_pool()
+    with pool.subplots() as (fig, ax):
+        image = ax.imshow(np.eye(3))
+        fig.colorbar(image)
+    assert len(pool) == 0
+
+
+@pytest.mark.parametrize('kwargs, first', [
+    ({'subplot_kw': {'projection': 'polar'}}, 'polar'),
+    ({'nrows': 2, 'sharex': True}, 'hist'),
+])
+def test_reused_layouts_match_fresh(kwargs, first):
+    theme = PrettyTheme()
+    pool = theme.figure_pool()
+    kwargs = dict(kwargs, figsize=(3, 3), dpi=72)
+    for kind in (first, 'plot'):
+        with pool.subplots(**kwargs) as (fig, axes):
+            for ax in np.atleast_1d(axes):
+                _draw(theme, kind, ax)
+            pixels = _pixels(fig)
+    assert pool.hits == 1
+
+    fresh_fig, fresh_axes = theme.subplots(**kwargs)
+    for ax in np.atleast_1d(fresh_axes):
+        _draw(theme, 'plot', ax)
+    assert np.array_equal(pixels, _pixels(fresh_fig))
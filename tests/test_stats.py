@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from matplotlib import cbook
+from pyplotthemes.stats import (boxplot_stats, boxplot_stats_chunks,
+                                histogram_chunks, StreamingHistogram)
+
+
+_keys = ('mean', 'iqr', 'cilo', 'cihi', 'whislo', 'whishi', 'q1', 'med',
+         'q3')
+
+
+def _compare(ours, groups, whis=1.5):
+    expected = cbook.boxplot_stats([g[~np.isnan(g)] for g in groups],
+                                   whis=whis)
+    assert len(ours) == len(expected)
+    for mine, theirs in zip(ours, expected):
+        for key in _keys:
+            assert np.allclose(mine[key], theirs[key], equal_nan=True), key
+        assert np.array_equal(np.sort(mine['fliers']),
+                              np.sort(theirs['fliers']))
+
+
+def test_boxplot_stats_matches_cbook_ragged():
+    rng = np.random.default_rng(0)
+    groups = [rng.standard_normal(n) for n in (1, 2, 7, 100, 1001)]
+    _compare(boxplot_stats(groups), groups)
+
+
+def test_boxplot_stats_matches_cbook_2d():
+    data = np.random.default_rng(1).standard_normal((500, 6))
+    _compare(boxplot_stats(data), list(data.T))
+
+
+def test_boxplot_stats_ignores_nan():
+    rng = np.random.default_rng(2)
+    groups = [rng.standard_normal(50), rng.standard_normal(30)]
+    groups[0][[3, 10, 40]] = np.nan
+    _compare(boxplot_stats(groups), groups)
+    data = rng.standard_normal((40, 3))
+    data[5, 1] = np.nan
+    _compare(boxplot_stats(data), list(data.T))
+
+
+@pytest.mark.parametrize('whis', [1.5, 0.5, (5, 95)])
+def test_boxplot_stats_whiskers(whis):
+    rng = np.random.default_rng(3)
+    groups = [rng.standard_normal(200), rng.exponential(size=77)]
+    _compare(boxplot_stats(groups, whis=whis), groups, whis)
+
+
+def test_boxplot_stats_empty_groups():
+    groups = [np.array([]), np.array([1.0, 2.0, 3.0]), np.array([np.nan]),
+              np.array([])]
+    stats = boxplot_stats(groups)
+    assert np.isnan(stats[0]['med']) and np.isnan(stats[2]['med'])
+    assert np.isnan(stats[3]['med'])
+    assert stats[1]['med'] == 2.0
+    assert len(stats[0]['fliers']) == 0
+
+
+def test_boxplot_stats_memory_linear_in_values():
+    import tracemalloc
+    groups = [np.zeros(10**6)] + [np.zeros(10)] * 199
+    tracemalloc.start()
+    boxplot_stats(groups)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Padding to the longest group would take 200 * 8 MB
+    assert peak < 100 * 2**20
+
+
+def test_boxplot_stats_chunks_close_to_exact():
+    data = np.random.default_rng(4).standard_normal(10**5)
+    exact = boxplot_stats([data])[0]
+    approx = boxplot_stats_chunks([np.array_split(data, 10)])[0]
+    for key in ('q1', 'med', 'q3'):
+        assert abs(exact[key] - approx[key]) < 1e-2
+
+
+def test_histogram_chunks_exact_with_range():
+    data = np.random.default_rng(5).standard_normal(10**4)
+    counts, edges = histogram_chunks(np.array_split(data, 7), 20)
+    expected, expected_edges = np.histogram(data, 20)
+    assert np.array_equal(counts, expected)
+    assert np.allclose(edges, expected_edges)
+
+
+def test_histogram_chunks_weighted():
+    rng = np.random.default_rng(7)
+    data = rng.standard_normal(10**4)
+    data[::100] = np.nan
+    weights = rng.random(10**4)
+    counts, edges = histogram_chunks(np.array_split(data, 7), 20,
+                                     weights=np.array_split(weights, 7))
+    ok = np.isfinite(data)
+    expected, _ = np.histogram(data[ok], edges, weights=weights[ok])
+    assert np.allclose(counts, expected)
+    with pytest.raises(ValueError):
+        histogram_chunks(np.array_split(data, 7), 20,
+                         weights=np.array_split(weights, 5))
+    with pytest.raises(ValueError):
+        histogram_chunks(iter(np.array_split(data, 7)), 20,
+                         weights=np.array_split(weights, 7))
+
+
+def test_chunked_hist_weights():
+    from pyplotthemes import PrettyTheme
+    theme = PrettyTheme()
+    theme.figure()
+    data = np.random.default_rng(8).standard_normal(1000)
+    weights = np.linspace(0, 2, 1000)
+    n, edges, _ = theme.hist(iter(np.array_split(data, 4)), 10, (-4, 4),
+                             weights=np.array_split(weights, 4))
+    expected, _ = np.histogram(data, edges, weights=weights)
+    assert np.allclose(n, expected)
+    n, _, _ = theme.hist(iter(np.array_split(data, 4)), 10, (-4, 4), True)
+    assert np.allclose(n, np.histogram(data, edges, density=True)[0])
+
+
+def test_streaming_histogram_counts_everything():
+    sketch = StreamingHistogram(64)
+    rng = np.random.default_rng(6)
+    for scale in (1, 10, 1000):
+        sketch.add(rng.standard_normal(1000) * scale)
+    counts, _ = sketch.histogram(10)
+    assert counts.sum() == 3000 == sketch.count
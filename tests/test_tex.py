@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import shutil
+import matplotlib as mpl
+import pytest
+from pyplotthemes import PrettyTheme
+from pyplotthemes import tex
+
+no_latex = shutil.which('latex') is None
+
+
+def test_text_sizes_follow_rcparams():
+    with mpl.rc_context({'font.size': 10, 'xtick.labelsize': 'large',
+                         'ytick.labelsize': 8, 'axes.labelsize': 10,
+                         'axes.titlesize': 'x-large',
+                         'legend.fontsize': 'medium'}):
+        assert tex.text_sizes() == pytest.approx([8, 10, 12, 14.4])
+
+
+def test_tick_labels_linear_and_log():
+    with mpl.rc_context({'axes.formatter.use_mathtext': False}):
+        labels = tex.tick_labels()
+    assert labels == sorted(set(labels))
+    assert '' not in labels
+    for label in ('0', '10', '1000', '0.5', '\N{MINUS SIGN}5'):
+        assert label in labels
+    assert '$\\mathdefault{10^{5}}$' in labels
+
+
+def test_set_tex_cache(tmp_path):
+    path = str(tmp_path / 'tex')
+    previous = tex.set_tex_cache(path)
+    try:
+        assert (tmp_path / 'tex').is_dir()
+        assert tex.set_tex_cache(previous) == path
+    finally:
+        tex.set_tex_cache(previous)
+
+
+@pytest.mark.skipif(not no_latex, reason="latex is installed")
+def test_warm_tex_needs_latex():
+    with pytest.raises(RuntimeError):
+        tex.warm_tex(['x'])
+
+
+def _theme_sizes(theme):
+    with theme.style():
+        return tex.text_sizes()
+
+
+@pytest.mark.skipif(no_latex, reason="latex is not installed")
+def test_warm_tex_fills_cache(tmp_path):
+    previous = tex.set_tex_cache(str(tmp_path))
+    try:
+        theme = PrettyTheme(latex=True)
+        first = theme.warm_tex(['$x$'], ticks=False, dpis=[100])
+        assert first['failed'] == []
+        assert first['rendered'] == len(_theme_sizes(theme))
+        again = theme.warm_tex(['$x$'], ticks=False, dpis=[100])
+        assert again['cached'] == first['rendered']
+    finally:
+        tex.set_tex_cache(previous)
+
+
+def test_mathtext_without_latex(tmp_path):
+    theme = PrettyTheme(latex='mathtext')
+    assert theme.params['text.usetex'] is False
+    assert theme.params['mathtext.fontset'] == 'cm'
+    assert theme.params['axes.formatter.use_mathtext'] is True
+    with mpl.rc_context():
+        fig = theme.figure()
+        theme.plot([1, 2, 3])
+        theme.xlabel(r'$\alpha_1$ (s)')
+        fig.savefig(str(tmp_path / 'mathtext.png'))
+    assert (tmp_path / 'mathtext.png').stat().st_size > 0
+
+    # What mathtext changed is restored when it is turned off
+    plain = PrettyTheme()
+    theme.latex = False
+    for k in ('mathtext.fontset', 'axes.formatter.use_mathtext'):
+        assert theme.params[k] == plain.params[k]
+    assert theme.params['font.family'] == plain.params['font.family']